@@ -11,7 +11,8 @@ from lbdrabbit.lbd_func_config.lbd_func_config import (
 )
 from lbdrabbit.example.app_config_init import app_config
 from lbdrabbit.example.cf import template
-from lbdrabbit.stack import upload_cf_template, deploy_stack
+from lbdrabbit.stack import deploy_stack_if_changed
+from lbdrabbit.template_writer import write_template_file
 
 module_name = "lbdrabbit.example.handlers"
 config_inherit_handler(
@@ -43,19 +44,12 @@ template.update_tags(dict(
     EnvName=app_config.ENVIRONMENT_NAME.get_value(),
 ))
 template.create_resource_type_label()
-template.to_file("master.json")
+write_template_file(template, "master.json")
 
 print("We have {} resources in template".format(len(template.resources)))
 
 boto_ses = boto3.session.Session(profile_name=app_config.AWS_PROFILE_FOR_DEPLOY.get_value())
 
-template_url = upload_cf_template(
-    boto_ses=boto_ses,
-    template_content=template.to_json(),
-    bucket_name=app_config.S3_BUCKET_FOR_DEPLOY.get_value(),
-    prefix="cloudformation/upload"
-)
-
 cf_config_data = app_config.to_cloudformation_config_data()
 stack_parameters = [
     {
@@ -66,11 +60,14 @@ stack_parameters = [
     if cf_config_data.get(key) is not None
 ]
 
-deploy_stack(
+diff = deploy_stack_if_changed(
     boto_ses=boto_ses,
     stack_name=app_config.STACK_NAME.get_value(),
-    template_url=template_url,
+    template_content=template,
+    bucket_name=app_config.S3_BUCKET_FOR_DEPLOY.get_value(),
+    prefix="cloudformation/upload",
     stack_tags=[],
     stack_parameters=stack_parameters,
     # execution_role_arn,
 )
+print(diff.render_table())
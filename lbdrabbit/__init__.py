@@ -13,13 +13,18 @@ __author__ = "Sanhe Hu"
 __author_email__ = "husanhe@gmail.com"
 __github_username__ = "MacHu-GWU"
 
+from .runtime import is_runtime_recorder_enabled
 
-try:
-    from .app import AppConfig, App, Constant, Derivable
-    from .lbd_func_config import (
-        LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
-        ApiMethodIntType,
-    )
-    from .const import VALID_LBD_HANDLER_FUNC_NAME_LIST
-except ImportError:
-    pass
\ No newline at end of file
+# opt-in for the lambda runtime, the handler modules only declare their
+# config, don't load the template building dependencies on cold start
+if is_runtime_recorder_enabled():
+    from .runtime import LbdFuncConfig
+else:
+    try:
+        from .app import AppConfig, App, Constant, Derivable
+        from .lbd_func_config import (
+            LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        )
+        from .const import VALID_LBD_HANDLER_FUNC_NAME_LIST
+    except ImportError:
+        pass
@@ -1,15 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from picage import Package
+import typing
 from configirl import Constant, Derivable, ConfigClass
 from .lbd_func_config import (
-    walk_lbd_handler,
     config_inherit_handler,
-    DEFAULT_LBD_FUNC_CONFIG_FIELD, LbdFuncConfig, lbd_func_config_value_handler
+    DEFAULT_LBD_FUNC_CONFIG_FIELD, LbdFuncConfig, lbd_func_config_value_handler,
+    template_creation_handler, HandlerIndex, get_handler_index, ModuleFilter,
+    ValidationReport, validate_configs,
+    ShardedTemplate, shard_template, MonolithRouter,
 )
 from .apigw import HttpMethod
 from .const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
-from importlib import import_module
 from troposphere_mate import Template
 
 
@@ -76,6 +77,60 @@ class AppConfig(ConfigClass):
     DEFAULT_LBD_FUNC_CONFIG_FIELD = Constant(default=DEFAULT_LBD_FUNC_CONFIG_FIELD)
     DEFAULT_LBD_HANDLER_FUNC_NAME = Constant(default=DEFAULT_LBD_HANDLER_FUNC_NAME)
     VALID_LBD_HANDLER_FUNC_NAME_LIST = Constant(default=VALID_LBD_HANDLER_FUNC_NAME_LIST)
+    STATIC_HANDLER_DISCOVERY = Constant(default=False)
+    """
+    If True, discover lambda handler by parsing the source code, a handler
+    module is imported only if its config can't be evaluated statically.
+    """
+    HANDLER_INDEX_CACHE_PATH = Constant(default=None)
+    """
+    Path of the on disk handler index, for example ``.lbdrabbit/index.json``.
+    If set, only changed, added and deleted handler modules are rediscovered.
+    """
+    PARALLEL_HANDLER_DISCOVERY = Constant(default=False)
+    """
+    If True, import the top level handler sub packages in a process pool.
+    Can't be used with ``STATIC_HANDLER_DISCOVERY`` or
+    ``HANDLER_INDEX_CACHE_PATH``.
+    """
+    HANDLER_DISCOVERY_MAX_WORKERS = Constant(default=None)
+    """
+    Number of worker processes in parallel discovery, default is the number
+    of CPU.
+    """
+    HANDLER_MODULE_INCLUDE = Constant(default=None)
+    """
+    List of glob patterns, only collect handlers in the matched modules, for
+    example ``["my_project.handlers.rest.*"]``.
+    """
+    HANDLER_MODULE_EXCLUDE = Constant(default=None)
+    """
+    List of glob patterns, the matched modules are never imported, for
+    example ``["*.tests", "*.helpers"]``.
+    """
+    HANDLER_SUBTREE = Constant(default=None)
+    """
+    Only build the handlers in this sub package, config values are still
+    inherited from its ancestors.
+    """
+    LAZY_CONFIG_INHERIT = Constant(default=False)
+    """
+    If True, child configs resolve the inherited values through the parent
+    configs on first access, changing a parent config value is visible
+    below it without inheriting again.
+    """
+    TEMPLATE_FRAGMENT_CACHE_PATH = Constant(default=None)
+    """
+    Path of the on disk template fragment cache, for example
+    ``.lbdrabbit/fragments.json``. If set, only the changed handlers are
+    built again.
+    """
+    MONOLITH_ROUTER_MODULE_NAME = Constant(default=None)
+    """
+    Full name of the generated router module, for example
+    ``my_project.router``. If set, the api gateway handlers share one lambda
+    function, which dispatches the requests to the handler functions.
+    """
 
 
 class App(object):
@@ -90,12 +145,43 @@ class App(object):
         self.config = app_config
         self.cf_tpl = None  # type: Template
 
+    def get_module_filter(self) -> typing.Union[ModuleFilter, None]:
+        include = self.config.HANDLER_MODULE_INCLUDE.get_value()
+        exclude = self.config.HANDLER_MODULE_EXCLUDE.get_value()
+        subtree = self.config.HANDLER_SUBTREE.get_value()
+        if include is None and exclude is None and subtree is None:
+            return None
+        return ModuleFilter(include=include, exclude=exclude, subtree=subtree)
+
+    def get_handler_index(self, refresh: bool = False) -> HandlerIndex:
+        """
+        The handler tree is walked only once per process, every build step
+        and repeated builds reuse the same index.
+
+        :param refresh: if True, walk the handler tree again, for example
+            after adding new handler modules.
+        """
+        return get_handler_index(
+            module_name=self.config.HANDLER_MODULE_NAME.get_value(),
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            static=self.config.STATIC_HANDLER_DISCOVERY.get_value(),
+            cache_path=self.config.HANDLER_INDEX_CACHE_PATH.get_value(),
+            parallel=self.config.PARALLEL_HANDLER_DISCOVERY.get_value(),
+            max_workers=self.config.HANDLER_DISCOVERY_MAX_WORKERS.get_value(),
+            module_filter=self.get_module_filter(),
+            refresh=refresh,
+        )
+
     def inherit_lbd_func_config(self):
         config_inherit_handler(
             module_name=self.config.HANDLER_MODULE_NAME.get_value(),
             config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
             config_class=LbdFuncConfig,
             valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            handler_index=self.get_handler_index(),
+            lazy=self.config.LAZY_CONFIG_INHERIT.get_value(),
         )
 
     def derive_lbd_func_config_value(self):
@@ -105,24 +191,56 @@ class App(object):
             config_class=LbdFuncConfig,
             valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
             default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            handler_index=self.get_handler_index(),
         )
 
-    def create_cf_template(self):
-        root_module = Package(self.config.HANDLER_MODULE_NAME.get_value())
-        # sub_packages = list(root_module.sub_packages.values())
-        # sub_modules = list(root_module.sub_modules.values())
-        #
-        # py_module = import_module(root_module.fullname)
-        # print(current_pkg)
-
-        for py_current_module, py_parent_module, py_handler_func in walk_lbd_handler(
-                self.config.HANDLER_MODULE_NAME.get_value(), VALID_LBD_HANDLER_FUNC_NAME_LIST):
-            if py_handler_func is not None:
-                lbd_func_config = getattr(py_handler_func,
-                                          self.config.DEFAULT_LBD_FUNC_CONFIG_FIELD.get_value())  # type: LbdFuncConfig
-                lbd_func_config.create_aws_resource(template=template)
-
-                # print(py_current_module.__name__)
+    def validate_lbd_func_config(self) -> ValidationReport:
+        """
+        Validate every derived config, collect all errors and skipped
+        resources in one report. Run it after
+        :meth:`derive_lbd_func_config_value`.
+        """
+        return validate_configs(
+            handler_index=self.get_handler_index(),
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        )
+
+    def create_cf_template(self, template: Template = None) -> Template:
+        if template is None:
+            template = Template()
+        monolith_router = None
+        router_module_name = self.config.MONOLITH_ROUTER_MODULE_NAME.get_value()
+        if router_module_name is not None:
+            monolith_router = MonolithRouter.build(
+                handler_index=self.get_handler_index(),
+                config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+                module_name=router_module_name,
+            )
+            monolith_router.write()
+        template_creation_handler(
+            module_name=self.config.HANDLER_MODULE_NAME.get_value(),
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            template=template,
+            handler_index=self.get_handler_index(),
+            fragment_cache_path=self.config.TEMPLATE_FRAGMENT_CACHE_PATH.get_value(),
+            monolith_router=monolith_router,
+        )
+        self.cf_tpl = template
+        return template
+
+    def create_sharded_cf_template(self, template: Template = None) -> ShardedTemplate:
+        """
+        Create the template, split it into nested stacks by handler sub
+        package if it exceeds the CloudFormation limits.
+        """
+        template = self.create_cf_template(template)
+        return shard_template(
+            template.to_dict(),
+            handler_index=self.get_handler_index(),
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        )
 
     def deploy(self):
         self.inherit_lbd_func_config()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reusable boto3 client registry.
+
+Creating a boto3 session and a client takes tens of milliseconds (loading
+the service model, resolving the credentials and the endpoint). The
+registry creates a client on first use, keyed by
+``(service name, region name, profile name)``, and returns the same client
+afterwards. In the lambda runtime, the module level registry lives in the
+container, the clients and their connection pools are reused across warm
+invocations. At build time, :mod:`lbdrabbit.stack` uses it to upload and
+deploy the templates.
+
+All the clients of a registry share one ``botocore.config.Config``, with
+the connection pool size, retries and timeouts of the registry.
+
+Example::
+
+    from lbdrabbit.boto_client import get_client
+
+    def handler(event, context):
+        s3_client = get_client("s3")
+        ...
+
+**中文文档**
+
+boto3 client 注册表. 创建 session 和 client 需要几十毫秒, 注册表按
+(服务名, 区域, profile) 在第一次使用时创建 client, 之后一直复用. 在 Lambda 运行时
+中, 同一个容器的多次调用会复用 client 以及连接池. 可以设置连接池大小, 重试以及
+超时.
+"""
+
+import threading
+import weakref
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_MODE = "standard"
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+
+
+class ClientRegistry(object):
+    """
+    :param max_pool_connections: max number of connections kept in the
+        connection pool of each client.
+    :param max_attempts: max number of attempts of a request, including the
+        first one.
+    :param retry_mode: ``"legacy"``, ``"standard"`` or ``"adaptive"``.
+    :param connect_timeout: in seconds.
+    :param read_timeout: in seconds.
+    """
+
+    def __init__(self,
+                 max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retry_mode: str = DEFAULT_RETRY_MODE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT):
+        self.max_pool_connections = max_pool_connections
+        self.max_attempts = max_attempts
+        self.retry_mode = retry_mode
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._config = None
+        self._sessions = dict()
+        self._clients = dict()
+        # clients created from a user supplied session, dropped with the session
+        self._session_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        """
+        :rtype: botocore.config.Config
+        """
+        if self._config is None:
+            from botocore.config import Config
+            self._config = Config(
+                max_pool_connections=self.max_pool_connections,
+                retries={
+                    "total_max_attempts": self.max_attempts,
+                    "mode": self.retry_mode,
+                },
+                connect_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+            )
+        return self._config
+
+    def get_session(self, profile_name: str = None, region_name: str = None):
+        """
+        :rtype: boto3.session.Session
+        """
+        key = (profile_name, region_name)
+        try:
+            return self._sessions[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._sessions:
+                import boto3
+                self._sessions[key] = boto3.session.Session(
+                    profile_name=profile_name,
+                    region_name=region_name,
+                )
+            return self._sessions[key]
+
+    def get_client(self,
+                   service_name: str,
+                   region_name: str = None,
+                   profile_name: str = None,
+                   boto_ses=None):
+        """
+        :param boto_ses: create the client from this ``boto3.session.Session``
+            instead, ``profile_name`` is ignored. The clients are cached per
+            session.
+        """
+        if boto_ses is None:
+            clients = self._clients
+            key = (service_name, region_name, profile_name)
+        else:
+            clients = self._session_clients.get(boto_ses)
+            if clients is None:
+                with self._lock:
+                    clients = self._session_clients.setdefault(boto_ses, dict())
+            key = (service_name, region_name)
+        try:
+            return clients[key]
+        except KeyError:
+            pass
+
+        if boto_ses is None:
+            boto_ses = self.get_session(profile_name=profile_name)
+        config = self.config
+        with self._lock:
+            if key not in clients:
+                clients[key] = boto_ses.client(
+                    service_name,
+                    region_name=region_name,
+                    config=config,
+                )
+            return clients[key]
+
+    def clear(self):
+        """
+        Drop all the sessions and clients.
+        """
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+            self._session_clients.clear()
+
+
+#: module level registry, lives as long as the lambda container
+registry = ClientRegistry()
+
+
+def get_client(service_name: str,
+               region_name: str = None,
+               profile_name: str = None,
+               boto_ses=None):
+    """
+    Get a client from the module level :data:`registry`.
+    """
+    return registry.get_client(
+        service_name,
+        region_name=region_name,
+        profile_name=profile_name,
+        boto_ses=boto_ses,
+    )
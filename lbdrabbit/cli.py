@@ -5,16 +5,76 @@ Console script for lbdrabbit.
 """
 
 import sys
+import json
 import click
 
 
-@click.command()
-def main(args=None):
+@click.group()
+def main():
     """Console script for lbdrabbit."""
-    click.echo("Replace this message by putting your code into "
-               "lbdrabbit.cli.main")
-    click.echo("See click documentation at http://click.pocoo.org/")
-    return 0
+
+
+@main.command(name="profile-import")
+@click.argument("module_name")
+@click.option("--top", "top_n", default=5, show_default=True,
+              help="number of heavy transitive imports per handler module")
+@click.option("--json", "as_json", is_flag=True, default=False,
+              help="print the report in JSON")
+def profile_import(module_name, top_n, as_json):
+    """
+    Report the import cost of every handler module under MODULE_NAME.
+    """
+    from .lbd_func_config.profiler import profile_handler_discovery
+
+    profile = profile_handler_discovery(module_name, top_n=top_n)
+    if as_json:
+        click.echo(json.dumps(profile.to_dict(), indent=4))
+    else:
+        click.echo(profile.render_table())
+
+
+@main.command(name="validate")
+@click.argument("module_name")
+@click.option("--static", is_flag=True, default=False,
+              help="discover handlers without importing handler modules")
+@click.option("--json", "as_json", is_flag=True, default=False,
+              help="print the report in JSON")
+def validate(module_name, static, as_json):
+    """
+    Report every invalid config and skipped resource under MODULE_NAME,
+    exit with 1 if there's any error.
+    """
+    from .lbd_func_config.validation import validate_handler_tree
+
+    report = validate_handler_tree(module_name, static=static)
+    if as_json:
+        click.echo(report.to_json())
+    else:
+        click.echo(report.render_table())
+    if report.has_error:
+        sys.exit(1)
+
+
+@main.command(name="diff")
+@click.argument("old_template", type=click.Path())
+@click.argument("new_template", type=click.Path(exists=True))
+@click.option("--json", "as_json", is_flag=True, default=False,
+              help="print the diff in JSON")
+def diff(old_template, new_template, as_json):
+    """
+    Compare NEW_TEMPLATE with OLD_TEMPLATE (a template file or a deploy
+    snapshot), list the added, removed, modified and renamed resources.
+    """
+    from .template_diff import DeploySnapshot, diff_templates
+
+    previous = DeploySnapshot.from_file(old_template)
+    current = DeploySnapshot.from_file(new_template)
+    template_diff = diff_templates(
+        None if previous is None else previous.template, current.template)
+    if as_json:
+        click.echo(template_diff.to_json())
+    else:
+        click.echo(template_diff.render_table())
 
 
 if __name__ == "__main__":
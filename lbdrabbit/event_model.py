@@ -1,99 +1,269 @@
 # -*- coding: utf-8 -*-
 
-import attr
-import typing
+"""
+Lazy parser of the api gateway lambda integration event.
+
+The integration request mapping template passes the request to the handler
+as ``{"body-json": ..., "params": {"path": ..., "querystring": ...,
+"header": ...}, "stage-variables": ..., "context": {"http-method": ...}}``.
+:class:`Event` wraps the raw dict, nothing is converted until it is read:
+
+- the ``params``, ``context`` views are created on first access.
+- query string values are coerced to ``int``, ``float`` or ``bool`` when
+  they are read, and memoized.
+- header names are matched case-insensitively, the lower cased index is
+  only built if the exact name is not found.
+
+It doesn't import anything but the standard library, it is safe to use in
+the lambda runtime.
+
+Example::
+
+    def handler(event, context):
+        event = Event(event)
+        limit = event.params.query_string.get("limit", 10)
+        content_type = event.params.header.get("content-type")
+        http_method = event.context.http_method
+
+**中文文档**
+
+Api Gateway Lambda 集成事件的惰性解析器. 只包装原始的 dict, 每个字段在第一次
+访问时才解析. 查询字符串的值会被转换为 int, float, bool. Header 的名字不区分
+大小写. 只读一个 Header 的 handler 不需要转换整个事件.
+"""
+
+import re
+
+_INT_PATTERN = re.compile(r"^-?(0|[1-9]\d*)$")
+_FLOAT_PATTERN = re.compile(r"^-?(0|[1-9]\d*)\.\d+$")
+_BOOL_MAPPER = {"true": True, "false": False}
+
+_NOTHING = object()
+
+
+def coerce_value(value):
+    """
+    Convert a query string value to ``int``, ``float`` or ``bool``, other
+    values are returned as it is. Numbers with a leading zero, such as zip
+    codes, are kept as string.
+
+    Example::
+
+        >>> coerce_value("5"), coerce_value("1.5"), coerce_value("True")
+        (5, 1.5, True)
+        >>> coerce_value("alice"), coerce_value("02134")
+        ('alice', '02134')
+    """
+    if not isinstance(value, str):
+        return value
+    if _INT_PATTERN.match(value):
+        return int(value)
+    if _FLOAT_PATTERN.match(value):
+        return float(value)
+    return _BOOL_MAPPER.get(value.lower(), value)
 
 
-@attr.s
 class QueryString(object):
-    pass
+    """
+    Query string view, values are coerced on first access.
+
+    :param raw: the ``params.querystring`` dict of the event.
+    """
+    __slots__ = ("_raw", "_cache")
+
+    def __init__(self, raw: dict = None):
+        self._raw = raw if raw is not None else dict()
+        self._cache = None
+
+    def get(self, name: str, default=None, coerce: bool = True):
+        """
+        :param coerce: if False, returns the original string value.
+        """
+        if not coerce:
+            return self._raw.get(name, default)
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = dict()
+        else:
+            value = cache.get(name, _NOTHING)
+            if value is not _NOTHING:
+                return value
+        value = self._raw.get(name, _NOTHING)
+        if value is _NOTHING:
+            return default
+        value = cache[name] = coerce_value(value)
+        return value
+
+    def __getitem__(self, name: str):
+        value = self.get(name, _NOTHING)
+        if value is _NOTHING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._raw
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def to_dict(self) -> dict:
+        return {name: self.get(name) for name in self._raw}
+
+
+class Headers(object):
+    """
+    Case-insensitive header view.
+
+    :param raw: the ``params.header`` dict of the event.
+    """
+    __slots__ = ("_raw", "_lower")
+
+    def __init__(self, raw: dict = None):
+        self._raw = raw if raw is not None else dict()
+        self._lower = None
+
+    def get(self, name: str, default=None):
+        value = self._raw.get(name, _NOTHING)
+        if value is not _NOTHING:
+            return value
+        lower = self._lower
+        if lower is None:
+            lower = self._lower = {
+                key.lower(): value for key, value in self._raw.items()
+            }
+        return lower.get(name.lower(), default)
+
+    def __getitem__(self, name: str):
+        value = self.get(name, _NOTHING)
+        if value is _NOTHING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name, _NOTHING) is not _NOTHING
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def to_dict(self) -> dict:
+        return dict(self._raw)
 
 
-@attr.s
 class Params(object):
-    path = attr.ib(factory=dict)  # type: dict
-    query_string = attr.ib(factory=QueryString)  # type: QueryString
-    header = attr.ib(factory=dict)  # type: dict
+    """
+    :param raw: the ``params`` dict of the event.
+    """
+    __slots__ = ("_raw", "_query_string", "_header")
+
+    def __init__(self, raw: dict = None):
+        self._raw = raw if raw is not None else dict()
+        self._query_string = None
+        self._header = None
+
+    @property
+    def path(self) -> dict:
+        return self._raw.get("path") or dict()
+
+    @property
+    def query_string(self) -> QueryString:
+        if self._query_string is None:
+            self._query_string = QueryString(self._raw.get("querystring"))
+        return self._query_string
+
+    @property
+    def header(self) -> Headers:
+        if self._header is None:
+            self._header = Headers(self._raw.get("header"))
+        return self._header
 
 
-@attr.s
 class Context(object):
-    authorizer_principal_id = attr.ib(default=None)
-    api_key = attr.ib(default=None)
-    api_id = attr.ib(default=None)
-    resource_id = attr.ib(default=None)
-    http_method = attr.ib(default=None)
-    stage = attr.ib(default=None)
-    caller = attr.ib(default=None)
-    source_ip = attr.ib(default=None)
-    user = attr.ib(default=None)
-    user_agent = attr.ib(default=None)
-    user_arn = attr.ib(default=None)
-    request_id = attr.ib(default=None)
-    cognito_authentication_provider = attr.ib(default=None)
-    cognito_authentication_type = attr.ib(default=None)
-    cognito_identity_id = attr.ib(default=None)
-    cognito_identity_pool_id = attr.ib(default=None)
-
-
-@attr.s
+    """
+    Request context, the attributes are the snake case version of the
+    hyphenated keys, for example ``http_method`` reads ``http-method``.
+    Empty values are returned as None.
+
+    :param raw: the ``context`` dict of the event.
+    """
+    __slots__ = ("_raw",)
+
+    _fields = (
+        "account_id",
+        "api_id",
+        "api_key",
+        "authorizer_principal_id",
+        "caller",
+        "cognito_authentication_provider",
+        "cognito_authentication_type",
+        "cognito_identity_id",
+        "cognito_identity_pool_id",
+        "http_method",
+        "stage",
+        "source_ip",
+        "user",
+        "user_agent",
+        "user_arn",
+        "request_id",
+        "resource_id",
+        "resource_path",
+    )
+
+    def __init__(self, raw: dict = None):
+        self._raw = raw if raw is not None else dict()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self._fields}
+
+
+def _context_property(key: str) -> property:
+    def getter(self):
+        return self._raw.get(key) or None
+
+    return property(getter)
+
+
+for _name in Context._fields:
+    setattr(Context, _name, _context_property(_name.replace("_", "-")))
+del _name
+
+
 class Event(object):
-    context = attr.ib()  # type: Context
-    params = attr.ib()  # type: Params
-    body = attr.ib()  # type: dict
-    stage_variables = attr.ib()
-
-
-@attr.s
-class Response(object):
-    pass
-
-
-a = {
-    "event": {
-        "body-json": {
-            "name": "Alice"
-        },
-        "params": {
-            "path": {},
-            "querystring": {
-                "limit": "5"
-            },
-            "header": {
-                "Accept": "*/*",
-                "Accept-Encoding": "gzip, deflate",
-                "auth": "allow",
-                "Cache-Control": "no-cache",
-                "Content-Type": "application/json",
-                "Host": "npwh0mpo01.execute-api.us-east-1.amazonaws.com",
-                "Postman-Token": "86ae9783-bbff-492e-a86a-5b147395a464",
-                "User-Agent": "PostmanRuntime/7.15.2",
-                "X-Amzn-Trace-Id": "Root=1-5d9908b5-c1d528d87a2b9890924332ac",
-                "X-Forwarded-For": "138.88.94.112",
-                "X-Forwarded-Port": "443",
-                "X-Forwarded-Proto": "https"
-            }
-        },
-        "stage-variables": {},
-        "context": {
-            "account-id": "",
-            "api-id": "npwh0mpo01",
-            "api-key": "",
-            "authorizer-principal-id": "",
-            "caller": "",
-            "cognito-authentication-provider": "",
-            "cognito-authentication-type": "",
-            "cognito-identity-id": "",
-            "cognito-identity-pool-id": "",
-            "http-method": "POST",
-            "stage": "dev",
-            "source-ip": "138.88.94.112",
-            "user": "",
-            "user-agent": "PostmanRuntime/7.15.2",
-            "user-arn": "",
-            "request-id": "1734556b-0647-42aa-9e62-4982cb9a52cc",
-            "resource-id": "gpwyfh",
-            "resource-path": "/users2"
-        }
-    }
-}
+    """
+    :param raw: the lambda event.
+    """
+    __slots__ = ("_raw", "_params", "_context")
+
+    def __init__(self, raw: dict):
+        self._raw = raw
+        self._params = None
+        self._context = None
+
+    @property
+    def raw(self) -> dict:
+        return self._raw
+
+    @property
+    def body(self):
+        return self._raw.get("body-json")
+
+    @property
+    def params(self) -> Params:
+        if self._params is None:
+            self._params = Params(self._raw.get("params"))
+        return self._params
+
+    @property
+    def context(self) -> Context:
+        if self._context is None:
+            self._context = Context(self._raw.get("context"))
+        return self._context
+
+    @property
+    def stage_variables(self) -> dict:
+        return self._raw.get("stage-variables") or dict()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Keep warm pings.
+
+With ``LbdFuncConfig.keep_warm_yes = True``, an ``events.Rule`` invokes the
+lambda function on ``keep_warm_expression`` with a ping event, once per
+target. ``keep_warm_concurrency = N`` sends N pings at the same time, each
+ping holds its container for a short delay, so the N pings land on N
+different containers and keep them warm.
+
+The handler has to recognize the ping, decorate it with :func:`keep_warm`::
+
+    from lbdrabbit.keep_warm import keep_warm
+
+    @keep_warm
+    def handler(event, context):
+        import pandas  # never imported by a ping
+        ...
+
+The ping returns before the user code runs. This module only uses the
+standard library, it is safe to import in the lambda runtime.
+
+**中文文档**
+
+定时向 Lambda 函数发送 ping 事件以保持容器处于热状态. 设置
+``keep_warm_concurrency = N`` 会同时发送 N 个 ping, 每个 ping 会占用容器一小段
+时间, 使得 N 个 ping 落在 N 个不同的容器上. 用 :func:`keep_warm` 装饰 handler,
+ping 事件会在执行用户代码之前直接返回.
+"""
+
+import json
+import time
+import functools
+
+#: the ping event is ``{KEEP_WARM_EVENT_KEY: {"index": ..., ...}}``
+KEEP_WARM_EVENT_KEY = "lbdrabbit-keep-warm"
+
+#: how long a ping holds its container, if more than one ping is sent
+DEFAULT_KEEP_WARM_DELAY_MS = 100
+
+
+def get_keep_warm_event(index: int,
+                        concurrency: int,
+                        delay_ms: int = DEFAULT_KEEP_WARM_DELAY_MS) -> dict:
+    """
+    :param index: number of the ping, from 1 to ``concurrency``.
+    :param concurrency: number of pings sent at the same time.
+    :param delay_ms: how long the ping holds its container, ignored if
+        ``concurrency`` is 1.
+    """
+    return {
+        KEEP_WARM_EVENT_KEY: {
+            "index": index,
+            "concurrency": concurrency,
+            "delay_ms": delay_ms if concurrency > 1 else 0,
+        }
+    }
+
+
+def get_keep_warm_input(index: int,
+                        concurrency: int,
+                        delay_ms: int = DEFAULT_KEEP_WARM_DELAY_MS) -> str:
+    """
+    ``events.Target.Input`` of a ping, see :func:`get_keep_warm_event`.
+    """
+    return json.dumps(
+        get_keep_warm_event(index, concurrency, delay_ms), sort_keys=True)
+
+
+def is_keep_warm_event(event) -> bool:
+    return isinstance(event, dict) and KEEP_WARM_EVENT_KEY in event
+
+
+def handle_keep_warm_event(event: dict) -> dict:
+    """
+    Hold the container for the delay of the ping, and returns the ping.
+    """
+    ping = event[KEEP_WARM_EVENT_KEY]
+    delay_ms = ping.get("delay_ms", 0)
+    if delay_ms:
+        time.sleep(delay_ms / 1000.0)
+    return {KEEP_WARM_EVENT_KEY: ping}
+
+
+def keep_warm(func):
+    """
+    Lambda handler decorator, returns the ping event before calling the
+    handler.
+    """
+
+    @functools.wraps(func)
+    def handler(event, context):
+        if isinstance(event, dict) and KEEP_WARM_EVENT_KEY in event:
+            return handle_keep_warm_event(event)
+        return func(event, context)
+
+    return handler
@@ -1,9 +1,25 @@
 # -*- coding: utf-8 -*-
 
 from .base import config_inherit_handler
-from .iterator import walk_lbd_handler
+from .iterator import ModuleFilter, walk_lbd_handler
+from .index import HandlerIndex, get_handler_index, clear_handler_index_cache
+from .index_cache import HandlerIndexCache, walk_lbd_handler_incremental
+from .parallel_iterator import walk_lbd_handler_parallel
+from .builder import ResourceBuilder, BuilderRegistry, BuilderTimer
+from .fragment_cache import FragmentCache
+from .shard import ShardedTemplate, shard_template
+from .monolith import MonolithRouter
 from .lbd_func_config import (
     LbdFuncConfig,
+    LBD_FUNC_BUILDER_REGISTRY,
     DEFAULT_LBD_FUNC_CONFIG_FIELD,
     lbd_func_config_value_handler,
+    template_creation_handler,
+    build_template,
+)
+from .validation import (
+    ValidationReport,
+    ConfigValidationError,
+    validate_configs,
+    validate_handler_tree,
 )
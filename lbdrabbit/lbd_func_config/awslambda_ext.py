@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+"""
+``awslambda`` properties missing in the pinned ``troposphere`` version.
+
+``AWS::Lambda::Alias.ProvisionedConcurrencyConfig`` is not declared by
+``troposphere_mate.awslambda.Alias``, :class:`Alias` adds it, the rest of
+the class is unchanged.
+
+**中文文档**
+
+当前依赖的 ``troposphere`` 版本中 ``awslambda.Alias`` 还没有
+``ProvisionedConcurrencyConfig`` 属性, 这里做一个最小的扩展.
+"""
+
+from troposphere import AWSProperty
+from troposphere.validators import integer
+from troposphere_mate import awslambda
+
+
+class ProvisionedConcurrencyConfiguration(AWSProperty):
+    props = {
+        "ProvisionedConcurrentExecutions": (integer, True),
+    }
+
+
+class Alias(awslambda.Alias):
+    props = dict(
+        awslambda.Alias.props,
+        ProvisionedConcurrencyConfig=(ProvisionedConcurrencyConfiguration, False),
+    )
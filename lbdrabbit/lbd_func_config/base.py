@@ -9,13 +9,67 @@
 
 """
 
+import time
 import attr
 import typing
 from troposphere_mate.core.sentiel import Sentinel, NOTHING, REQUIRED
 from .iterator import walk_lbd_handler
+from .index import HandlerIndex
+from .builder import BuilderRegistry, BuilderTimer
+from . import view
 
+NOT_INHERITED = {"inherit": False}
 
-@attr.s
+# derived per config, never inherited, declared first in BaseConfig
+_DERIVED_FIELD_NAMES = frozenset(["_aws_object_cache", "_readiness_cache", "_view_link"])
+
+_field_names_cache = dict()  # type: typing.Dict[type, typing.Tuple[str, ...]]
+_field_name_set_cache = dict()  # type: typing.Dict[type, typing.FrozenSet[str]]
+
+
+def get_field_names(config_class: type) -> typing.Tuple[str, ...]:
+    """
+    Get the attribute names of the inheritable ``attr.ib`` fields of a config
+    class, computed once per class. A field declared with
+    ``metadata=NOT_INHERITED`` is derived per config and is skipped.
+    """
+    try:
+        return _field_names_cache[config_class]
+    except KeyError:
+        field_names = tuple([
+            field.name
+            for field in attr.fields(config_class)
+            if field.metadata.get("inherit", True)
+        ])
+        _field_names_cache[config_class] = field_names
+        _field_name_set_cache[config_class] = frozenset(field_names)
+        return field_names
+
+
+def get_field_name_set(config_class: type) -> typing.FrozenSet[str]:
+    try:
+        return _field_name_set_cache[config_class]
+    except KeyError:
+        get_field_names(config_class)
+        return _field_name_set_cache[config_class]
+
+
+def invalidate_on_setattr(config: 'BaseConfig', attribute: attr.Attribute, value):
+    """
+    ``on_setattr`` hook of the config subclasses, discard the derived state
+    when a field is set. With the hook, the ``attrs`` generated ``__init__``
+    sets the fields directly, a new config doesn't pay for the
+    invalidation::
+
+        @attr.s(slots=True, on_setattr=invalidate_on_setattr)
+        class MyConfig(BaseConfig):
+            ...
+    """
+    config._invalidate(attribute.name)
+    return value
+
+
+@attr.s(slots=True)
 class BaseConfig(object):
     """
     Lambda Function Level Config.
@@ -33,22 +87,178 @@ class BaseConfig(object):
     """
     _default = dict()  # type: dict
 
+    builder_registry = None  # type: BuilderRegistry
+
+    # derived per config by the resource builder engine, see
+    # :mod:`~lbdrabbit.lbd_func_config.builder`
+    _aws_object_cache = attr.ib(
+        default=NOTHING, repr=False, eq=False, metadata=NOT_INHERITED,
+    )  # type: typing.Dict[str, typing.Any]
+    _readiness_cache = attr.ib(
+        default=NOTHING, repr=False, eq=False, metadata=NOT_INHERITED,
+    )  # type: typing.Dict[str, bool]
+    # see :mod:`~lbdrabbit.lbd_func_config.view`
+    _view_link = attr.ib(
+        default=NOTHING, repr=False, eq=False, metadata=NOT_INHERITED,
+    )  # type: view.ViewLink
+
     def absorb(self, other):
         """
         inherit values from other config if the current one is a Sentinel.
 
+        Values are shared by reference, nothing is copied.
+
         :type other: FunctionConfig
 
         **中文文档**
 
-        从另一个 实例 当中吸取那些被数值化的数据.
+        从另一个 实例 当中吸取那些被数值化的数据. 只读取属性, 不复制任何值.
+        """
+        # nothing to invalidate, skip the setattr hook
+        if self._has_derived_state():
+            set_value = setattr
+        else:
+            set_value = object.__setattr__
+        other_class = other.__class__
+        if other_class is self.__class__:
+            for key in get_field_names(other_class):
+                if isinstance(getattr(self, key), Sentinel):
+                    set_value(self, key, getattr(other, key))
+        else:
+            other_keys = get_field_name_set(other_class)
+            for key in get_field_names(self.__class__):
+                if key in other_keys and isinstance(getattr(self, key), Sentinel):
+                    set_value(self, key, getattr(other, key))
+
+    def __getattr__(self, name):
+        # only called if the attribute is not found, in view mode an unset
+        # field is resolved through the parent config
+        return view.resolve(self, name)
+
+    def __setattr__(self, name, value):
+        # fallback of the subclasses not declared with
+        # ``on_setattr=invalidate_on_setattr``
+        object.__setattr__(self, name, value)
+        self._invalidate(name)
+
+    def _has_derived_state(self) -> bool:
+        return self._readiness_cache is not NOTHING \
+               or self._aws_object_cache is not NOTHING \
+               or self._view_link is not NOTHING
+
+    def _invalidate(self, name: str):
+        """
+        Discard the derived state depending on field ``name``.
+        """
+        # the derived state doesn't invalidate itself, these fields are also
+        # the first ones set by __init__
+        if name in _DERIVED_FIELD_NAMES:
+            return
+        if self._readiness_cache is not NOTHING:
+            object.__setattr__(self, "_readiness_cache", NOTHING)
+        aws_object_cache = self._aws_object_cache
+        if aws_object_cache is not NOTHING and aws_object_cache:
+            for res_name in self.builder_registry.affected_by(name):
+                aws_object_cache.pop(res_name, None)
+        if self._view_link is not NOTHING:
+            view.invalidate(self, name)
+
+    @property
+    def readiness(self) -> typing.Dict[str, bool]:
+        """
+        Resource name -> whether the aws object can be created. Evaluated
+        once over :attr:`builder_registry`, cached until a field of this
+        config is set.
+
+        **中文文档**
+
+        一次性计算所有资源是否满足创建条件, 并缓存. 修改任何配置值都会清除缓存.
+        """
+        if self._readiness_cache is NOTHING:
+            readiness = dict()
+            if self.builder_registry is not None:
+                for builder in self.builder_registry.ordered:
+                    readiness[builder.name] = (
+                        (builder.yes_field is None or getattr(self, builder.yes_field) is True)
+                        and (builder.check is None or getattr(self, builder.check)())
+                        and all([readiness[dep] for dep in builder.depends_on])
+                    )
+            object.__setattr__(self, "_readiness_cache", readiness)
+        return self._readiness_cache
+
+    def get_aws_object(self, res_name: str):
+        """
+        Build the aws object (or a dict of aws objects) of a resource, cached
+        until one of its input fields is set.
+
+        **中文文档**
+
+        调用 builder 生成 AWS Object 并缓存. 修改该 builder 使用的配置项时清除缓存.
+        """
+        aws_object_cache = self._aws_object_cache
+        if aws_object_cache is NOTHING:
+            aws_object_cache = dict()
+            object.__setattr__(self, "_aws_object_cache", aws_object_cache)
+        try:
+            return aws_object_cache[res_name]
+        except KeyError:
+            aws_object = getattr(self, self.builder_registry[res_name].build)()
+            aws_object_cache[res_name] = aws_object
+            return aws_object
+
+    def add_aws_object(self, template, res_name: str) -> int:
+        """
+        Add the aws objects of a resource to the template, if it is ready.
+
+        :type template: troposphere_mate.Template
+
+        :return: number of aws objects added.
+        """
+        if not self.readiness[res_name]:
+            return 0
+        aws_object = self.get_aws_object(res_name)
+        if isinstance(aws_object, dict):
+            for value in aws_object.values():
+                template.add_resource(value, ignore_duplicate=True)
+            return len(aws_object)
+        template.add_resource(aws_object, ignore_duplicate=True)
+        return 1
+
+    def create_aws_resource(self, template, timer: BuilderTimer = None):
+        """
+        Add the aws objects of all ready resources to the template, in the
+        topological order of :attr:`builder_registry`.
+
+        :type template: troposphere_mate.Template
+
+        :param timer: if given, record the time spent in each builder.
+        """
+        if self.builder_registry is None:
+            return
+        if timer is None:
+            for builder in self.builder_registry.ordered:
+                self.add_aws_object(template, builder.name)
+        else:
+            for builder in self.builder_registry.ordered:
+                start = time.perf_counter()
+                n_object = self.add_aws_object(template, builder.name)
+                if n_object:
+                    timer.record(builder.name, n_object, time.perf_counter() - start)
+
+    def link_parent(self, parent: 'BaseConfig'):
+        """
+        Resolve the unset public fields through ``parent`` lazily, instead
+        of copying the values like :meth:`absorb`. See
+        :mod:`~lbdrabbit.lbd_func_config.view`.
+
+        **中文文档**
+
+        惰性的继承 ``parent`` 中的值, 在第一次访问时才查找, 并缓存.
         """
-        this_data = attr.asdict(self)
-        other_data = attr.asdict(other)
-        for key, value in this_data.items():
-            if isinstance(value, Sentinel):
-                if key in other_data:
-                    setattr(self, key, other_data[key])
+        view.link_config(self, parent, [
+            key for key in get_field_names(self.__class__)
+            if (not key.startswith("_")) and key in get_field_name_set(parent.__class__)
+        ])
 
     def fill_na_with_default(self):
         """
@@ -72,7 +282,10 @@ class BaseConfig(object):
 def config_inherit_handler(module_name: str,
                            config_field: str,
                            config_class: typing.Type[BaseConfig],
-                           valid_func_name_list: typing.List[str]):
+                           valid_func_name_list: typing.List[str],
+                           static: bool = False,
+                           handler_index: HandlerIndex = None,
+                           lazy: bool = False):
     """
     Recursively iterate all sub modules and potential lambda handler functions.
     assign them a instance lambda function config class. sub module will inherit
@@ -82,6 +295,13 @@ def config_inherit_handler(module_name: str,
     :param config_field:
     :param config_class:
     :param valid_func_name_list:
+    :param static: if True, use
+        :func:`~lbdrabbit.lbd_func_config.static_iterator.walk_lbd_handler_static`
+        to discover handlers without importing handler modules.
+    :param handler_index: reuse an existing handler index instead of walking
+        the handler tree again.
+    :param lazy: if True, link the configs with :meth:`BaseConfig.link_parent`
+        instead of copying values with :meth:`BaseConfig.absorb`.
 
     **中文文档**
 
@@ -111,8 +331,18 @@ def config_inherit_handler(module_name: str,
 
     如果我们指定了 timeout, 那么以我们的指定值为准, 忽略上层 module 中的定义值.
     """
-    for py_current_module, py_parent_module, py_handler_func in walk_lbd_handler(
-            module_name, valid_func_name_list):
+    if handler_index is None:
+        handler_index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+        )
+
+    for node in handler_index.nodes:
+        py_current_module = node.py_module
+        py_parent_module = node.py_parent_module
 
         current_module_config = py_current_module.__dict__.get(
             config_field, config_class()
@@ -125,12 +355,18 @@ def config_inherit_handler(module_name: str,
         except:
             parent_module_config = config_class()
 
-        current_module_config.absorb(parent_module_config)
+        if lazy:
+            current_module_config.link_parent(parent_module_config)
+        else:
+            current_module_config.absorb(parent_module_config)
         setattr(py_current_module, config_field, current_module_config)
 
-        if py_handler_func is not None:
+        for py_handler_func in node.py_handler_funcs:
             py_handler_func_config = py_handler_func.__dict__.get(
                 config_field, config_class()
             )  # type: BaseConfig
-            py_handler_func_config.absorb(current_module_config)
+            if lazy:
+                py_handler_func_config.link_parent(current_module_config)
+            else:
+                py_handler_func_config.absorb(current_module_config)
             setattr(py_handler_func, config_field, py_handler_func_config)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+Resource builder registry.
+
+Every aws resource kind created from a config (lambda function, api
+gateway resource, method, ...) is declared as a :class:`ResourceBuilder`:
+
+- ``yes_field`` and ``check``: the conditions to create it.
+- ``depends_on``: the resource kinds have to be ready, otherwise it is
+  not created.
+- ``references``: the resource kinds whose aws objects are used to build
+  it, for example a ``awslambda.Permission`` references the
+  ``awslambda.Function``.
+- ``inputs``: the config fields used to build it, a field name or a prefix
+  ending with ``_``. Setting an input field drops the cached aws object,
+  and the cached aws objects referencing it.
+
+The engine (:meth:`~lbdrabbit.lbd_func_config.base.BaseConfig.readiness`,
+:meth:`~lbdrabbit.lbd_func_config.base.BaseConfig.get_aws_object`,
+:meth:`~lbdrabbit.lbd_func_config.base.BaseConfig.create_aws_resource`)
+evaluates, builds and caches the resources in topological order, and
+optionally times each builder with a :class:`BuilderTimer`.
+
+**中文文档**
+
+将每一种 AWS 资源的创建条件, 依赖关系, 以及使用的配置项注册为一个 builder.
+判断是否创建, 创建, 缓存, 计时 都由统一的引擎完成, 添加新的资源类型只需要注册
+一个新的 builder.
+"""
+
+import typing
+import attr
+from collections import OrderedDict
+
+
+@attr.s(frozen=True)
+class ResourceBuilder(object):
+    """
+    A resource kind in the registry. A resource is ready if:
+
+    - ``yes_field`` is not given, or its value is ``True``
+    - ``check`` is not given, or the config method named ``check`` returns
+        True. A check returns a boolean and doesn't raise.
+    - all the resource kinds in ``depends_on`` are ready.
+
+    :param name: resource name, for example ``lbd_func``.
+    :param build: name of the config method builds the aws object, or a
+        dict of aws objects.
+    :param references: resource kinds whose aws objects are used by ``build``
+    :param inputs: config field names, or prefix ending with ``_``, used by
+        ``build``.
+    """
+    name = attr.ib()  # type: str
+    build = attr.ib()  # type: str
+    yes_field = attr.ib(default=None)  # type: str
+    check = attr.ib(default=None)  # type: str
+    depends_on = attr.ib(default=tuple(), converter=tuple)  # type: typing.Tuple[str, ...]
+    references = attr.ib(default=tuple(), converter=tuple)  # type: typing.Tuple[str, ...]
+    inputs = attr.ib(default=tuple(), converter=tuple)  # type: typing.Tuple[str, ...]
+
+    def use_field(self, field_name: str) -> bool:
+        for name in self.inputs:
+            if name == field_name \
+                    or (name.endswith("_") and field_name.startswith(name)):
+                return True
+        return False
+
+
+class BuilderRegistry(object):
+    """
+    An ordered collection of :class:`ResourceBuilder`.
+
+    :param builders: initial builders, in registration order.
+    """
+
+    def __init__(self, builders: typing.Iterable[ResourceBuilder] = None):
+        self._builders = OrderedDict()  # type: typing.Dict[str, ResourceBuilder]
+        self._ordered = None  # type: typing.Tuple[ResourceBuilder, ...]
+        self._affected_by = dict()  # type: typing.Dict[str, typing.FrozenSet[str]]
+        if builders is not None:
+            for builder in builders:
+                self.register(builder)
+
+    def register(self, builder: ResourceBuilder) -> ResourceBuilder:
+        """
+        :raises ValueError: if the name is already registered.
+        """
+        if builder.name in self._builders:
+            raise ValueError("builder {!r} is already registered".format(builder.name))
+        self._builders[builder.name] = builder
+        self._ordered = None
+        self._affected_by = dict()
+        return builder
+
+    def copy(self) -> 'BuilderRegistry':
+        """
+        A new registry with the same builders, for a config subclass which
+        registers more resource kinds.
+        """
+        return self.__class__(self._builders.values())
+
+    def __getitem__(self, name: str) -> ResourceBuilder:
+        return self._builders[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._builders
+
+    def __len__(self) -> int:
+        return len(self._builders)
+
+    @property
+    def ordered(self) -> typing.Tuple[ResourceBuilder, ...]:
+        """
+        Builders in topological order of ``depends_on`` and ``references``,
+        ties are broken by registration order.
+
+        :raises ValueError: on unknown or circular dependencies.
+        """
+        if self._ordered is None:
+            ordered = list()
+            done = set()
+            pending = list(self._builders.values())
+            while pending:
+                for builder in pending:
+                    deps = set(builder.depends_on + builder.references)
+                    unknown = deps.difference(self._builders)
+                    if unknown:
+                        raise ValueError("builder {!r} depends on unknown {}".format(
+                            builder.name, sorted(unknown)))
+                    if deps.issubset(done):
+                        ordered.append(builder)
+                        done.add(builder.name)
+                        pending.remove(builder)
+                        break
+                else:
+                    raise ValueError("circular dependencies between {}".format(
+                        [builder.name for builder in pending]))
+            self._ordered = tuple(ordered)
+        return self._ordered
+
+    def affected_by(self, field_name: str) -> typing.FrozenSet[str]:
+        """
+        Names of the builders whose aws object becomes stale when
+        ``field_name`` changes, including the builders referencing them.
+        """
+        try:
+            return self._affected_by[field_name]
+        except KeyError:
+            affected = set()
+            for builder in self.ordered:
+                if builder.use_field(field_name) \
+                        or affected.intersection(builder.references):
+                    affected.add(builder.name)
+            affected = frozenset(affected)
+            self._affected_by[field_name] = affected
+            return affected
+
+
+@attr.s
+class BuilderTiming(object):
+    """
+    :param n_call: number of configs the builder was run on.
+    :param n_object: number of aws objects added to the template.
+    :param total_time: time spent, in seconds.
+    """
+    name = attr.ib()  # type: str
+    n_call = attr.ib(default=0)  # type: int
+    n_object = attr.ib(default=0)  # type: int
+    total_time = attr.ib(default=0.0)  # type: float
+
+
+@attr.s
+class BuilderTimer(object):
+    """
+    Collect the time spent in each builder, pass it to
+    :func:`~lbdrabbit.lbd_func_config.lbd_func_config.template_creation_handler`.
+    """
+    timings = attr.ib(factory=OrderedDict)  # type: typing.Dict[str, BuilderTiming]
+
+    def record(self, name: str, n_object: int, elapsed: float):
+        try:
+            timing = self.timings[name]
+        except KeyError:
+            timing = BuilderTiming(name=name)
+            self.timings[name] = timing
+        timing.n_call += 1
+        timing.n_object += n_object
+        timing.total_time += elapsed
+
+    def to_dict(self) -> dict:
+        return attr.asdict(self)
+
+    def render_table(self) -> str:
+        lines = ["{:>10} {:>8} {:>8}  {}".format("time(s)", "calls", "objects", "builder")]
+        for timing in sorted(
+                self.timings.values(), key=lambda t: t.total_time, reverse=True):
+            lines.append("{:>10.4f} {:>8} {:>8}  {}".format(
+                timing.total_time, timing.n_call, timing.n_object, timing.name))
+        return "\n".join(lines)
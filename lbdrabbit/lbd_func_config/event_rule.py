@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+Shared scheduled job event rules.
+
+By default every (schedule expression, lambda function) pair has its own
+``events.Rule``. With ``scheduled_job_event_rule_shared_yes = True`` the
+functions on the same schedule expression share rules, each rule has at
+most :data:`MAX_TARGETS_PER_RULE` targets. This cuts the resource count and
+the event rule quota usage.
+
+The groups are assigned over the whole handler tree in the derive phase,
+by :func:`assign_event_rule_groups`, because a single config doesn't know
+the other functions on the same expression. The functions are sorted by
+logical id and chunked, the rule logical id only depends on the expression
+and the chunk number. Adding or removing a function updates the ``Targets``
+of the existing rules in place, it never renames a rule.
+
+**中文文档**
+
+默认每个 (定时表达式, Lambda 函数) 都会创建一个 ``events.Rule``. 开启
+``scheduled_job_event_rule_shared_yes`` 后, 相同表达式的函数共用 Rule, 每个
+Rule 最多 5 个 Target, 以减少资源数量和 Rule 的配额占用. Rule 的 logical id
+只和表达式以及分组序号有关, 增减函数只会修改已有 Rule 的 Targets.
+"""
+
+import typing
+import attr
+from troposphere_mate import Ref, GetAtt
+
+from .base import NOTHING
+from .index import HandlerIndex
+from ..pkg.fingerprint import fingerprint
+
+#: a event rule has at most 5 targets
+MAX_TARGETS_PER_RULE = 5
+
+#: events.Target.Id allows at most 64 characters
+MAX_TARGET_ID_LENGTH = 64
+
+
+@attr.s
+class EventRuleTarget(object):
+    """
+    A lambda function invoked by a shared rule.
+
+    :param lbd_func_logic_id: logical id of the lambda function
+    :param lbd_alias_logic_id: logical id of the alias, if the rule invokes
+        the alias, see ``LbdFuncConfig.lbd_alias_yes``.
+    """
+    lbd_func_logic_id = attr.ib()  # type: str
+    lbd_alias_logic_id = attr.ib(default=None)  # type: str
+
+    @property
+    def id(self) -> str:
+        return get_event_target_id(self.lbd_func_logic_id)
+
+    @property
+    def invoked_logic_id(self) -> str:
+        if self.lbd_alias_logic_id is None:
+            return self.lbd_func_logic_id
+        return self.lbd_alias_logic_id
+
+    @property
+    def arn(self) -> typing.Union[Ref, GetAtt]:
+        if self.lbd_alias_logic_id is None:
+            return GetAtt(self.lbd_func_logic_id, "Arn")
+        return Ref(self.lbd_alias_logic_id)
+
+
+@attr.s
+class EventRuleGroup(object):
+    """
+    A shared ``events.Rule`` and the lambda functions it invokes.
+
+    :param logic_id: logical id of the ``events.Rule``
+    :param targets: the target lambda functions
+    """
+    logic_id = attr.ib()  # type: str
+    targets = attr.ib()  # type: typing.List[EventRuleTarget]
+
+    @property
+    def lbd_func_logic_id_list(self) -> typing.List[str]:
+        return [target.lbd_func_logic_id for target in self.targets]
+
+
+def get_event_rule_group_logic_id(expression: str, nth: int) -> str:
+    """
+    Logical id of the ``nth`` (starts from 1) shared rule of an expression.
+    """
+    return "EventRuleShared{}{}".format(fingerprint.of_text(expression), nth)
+
+
+def get_event_target_id(lbd_func_logic_id: str) -> str:
+    """
+    ``events.Target.Id`` of a lambda function, unique in a rule.
+    """
+    if len(lbd_func_logic_id) <= MAX_TARGET_ID_LENGTH:
+        return lbd_func_logic_id
+    return fingerprint.of_text(lbd_func_logic_id)
+
+
+def assign_event_rule_groups(handler_index: HandlerIndex,
+                             config_field: str,
+                             max_targets: int = MAX_TARGETS_PER_RULE
+                             ) -> typing.Dict[str, typing.List[EventRuleGroup]]:
+    """
+    Group the functions using shared scheduled job event rules by schedule
+    expression, and set the ``_scheduled_job_event_rule_groups`` of each
+    function config to ``{expression: its group}``.
+
+    :return: expression -> groups
+    """
+    members = dict()  # type: typing.Dict[str, list]
+    for config in handler_index.iter_configs(config_field):
+        if not config.is_function():
+            continue
+        if config.scheduled_job_event_rule_shared_yes is not True:
+            continue
+        if not config.readiness["scheduled_job_event_rule"]:
+            continue
+        for expression in config.scheduled_job_expression_list:
+            members.setdefault(expression, list()).append(config)
+
+    groups = dict()  # type: typing.Dict[str, typing.List[EventRuleGroup]]
+    config_groups = dict()  # type: typing.Dict[int, typing.Dict[str, EventRuleGroup]]
+    for expression in sorted(members):
+        config_list = sorted(
+            members[expression], key=lambda config: config.lbd_func_logic_id)
+        groups[expression] = list()
+        for nth, i in enumerate(range(0, len(config_list), max_targets), 1):
+            chunk = config_list[i:i + max_targets]
+            group = EventRuleGroup(
+                logic_id=get_event_rule_group_logic_id(expression, nth),
+                targets=[
+                    EventRuleTarget(
+                        lbd_func_logic_id=config.lbd_func_logic_id,
+                        lbd_alias_logic_id=config.lbd_alias_logic_id
+                        if config.readiness["lbd_alias"] else None,
+                    )
+                    for config in chunk
+                ],
+            )
+            groups[expression].append(group)
+            for config in chunk:
+                config_groups.setdefault(id(config), dict())[expression] = group
+
+    for config in handler_index.iter_configs(config_field):
+        if not config.is_function():
+            continue
+        config_group = config_groups.get(id(config), NOTHING)
+        if config._scheduled_job_event_rule_groups != config_group:
+            config._scheduled_job_event_rule_groups = config_group
+    return groups
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persistent per handler template fragment cache, for incremental template
+generation.
+
+The cache file (default ``.lbdrabbit/fragments.json``) records, for every
+config, the rendered CloudFormation JSON of the aws objects it created, and
+the key of the inputs:
+
+- the content fingerprint of the module source file.
+- the resolved config values (inherited and derived) of the fields used by
+  the resource builders, see
+  :class:`~lbdrabbit.lbd_func_config.builder.ResourceBuilder`.
+
+On the next build, a config with the same key splices the cached JSON into
+the template, the aws objects are not built at all. Only the configs of the
+changed handlers, and the configs below a changed config value, are built
+again. The template is identical to a full build.
+
+A config value which can't be rendered as a stable key (for example an
+arbitrary python object) makes the config uncacheable, it is always built.
+
+**中文文档**
+
+将每个 handler 的 config 生成的 CloudFormation JSON 片段缓存到磁盘上. 缓存的键
+由模块源码的指纹, 以及继承和推导之后的 config 值组成. 下次构建时, 只有键变化了
+的 handler 会重新生成 AWS 资源, 其他的直接使用缓存的 JSON 片段.
+"""
+
+import os
+import json
+import time
+import typing
+import types
+import attr
+from collections import OrderedDict
+from troposphere import BaseAWSObject, AWSProperty, AWSHelperFn
+from troposphere_mate import Template
+from troposphere_mate.core.sentiel import Sentinel
+
+from .._version import __version__
+from ..pkg.fingerprint import fingerprint
+from .base import get_field_names
+from .builder import BuilderTimer
+
+DEFAULT_FRAGMENT_CACHE_PATH = os.path.join(".lbdrabbit", "fragments.json")
+
+FRAGMENT_CACHE_VERSION = 2
+
+
+class CachedResource(object):
+    """
+    A rendered aws object loaded from the cache, can be added to a
+    ``Template`` like a troposphere ``AWSObject``.
+    """
+
+    def __init__(self, title: str, data: dict):
+        self.title = title
+        self.data = data
+
+    def to_dict(self) -> dict:
+        return self.data
+
+
+@attr.s
+class FragmentRecord(object):
+    """
+    Cached aws objects of one config.
+
+    :param key: fingerprint of the inputs
+    :param resources: list of ``[resource name, [[logical id, json], ...]]``,
+        in the topological order of the builder registry.
+    """
+    identifier = attr.ib()  # type: str
+    key = attr.ib()  # type: str
+    resources = attr.ib(factory=list)  # type: typing.List[list]
+
+    def to_dict(self) -> dict:
+        return attr.asdict(self, recurse=False)
+
+
+@attr.s
+class FragmentDiff(object):
+    """
+    Which configs are built and which are spliced from the cache in the
+    last build.
+    """
+    reused = attr.ib(factory=list)  # type: typing.List[str]
+    rebuilt = attr.ib(factory=list)  # type: typing.List[str]
+
+
+class UncacheableValue(ValueError):
+    pass
+
+
+def _class_path(klass: type) -> str:
+    return "{}.{}".format(klass.__module__, klass.__qualname__)
+
+
+def _to_dict(value) -> dict:
+    try:
+        return value.to_dict()
+    except Exception as e:  # troposphere validation error
+        raise UncacheableValue(str(e))
+
+
+def _digest(value) -> str:
+    return fingerprint.of_text(json.dumps(value, sort_keys=True))
+
+
+def encode_key_value(value, memo: dict = None):
+    """
+    Render a config value as a json serializable, stable value.
+
+    Troposphere objects are rendered as the fingerprint of their properties,
+    the key of a config stays small.
+
+    :param memo: ``{id(value): (value, encoded value)}``, encoded troposphere
+        and attrs objects. The same objects are usually shared by many
+        configs (for example the ``RestApi`` or the iam role inherited from
+        the root config), with a memo they are rendered only once. Only valid
+        as long as the objects are not modified, use one memo per build.
+
+    :raises UncacheableValue:
+    """
+    if isinstance(value, Sentinel):
+        return repr(value)
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_key_value(v, memo) for v in value]
+    if isinstance(value, dict):
+        return [[str(k), encode_key_value(v, memo)] for k, v in sorted(
+            value.items(), key=lambda kv: str(kv[0]))]
+    if isinstance(value, types.ModuleType):
+        return value.__name__
+    if isinstance(value, types.FunctionType):
+        return "{}.{}".format(value.__module__, value.__qualname__)
+    if memo is not None:
+        try:
+            # the value is kept in the memo, its id can't be reused
+            return memo[id(value)][1]
+        except KeyError:
+            pass
+    if isinstance(value, BaseAWSObject):
+        # a Ref to an aws object only uses the title, but an aws object
+        # created by this config uses the properties
+        encoded = [_class_path(value.__class__), value.title,
+                   _digest(encode_key_value(_to_dict(value), memo))]
+    elif isinstance(value, (AWSProperty, AWSHelperFn)):
+        encoded = [_class_path(value.__class__),
+                   _digest(encode_key_value(_to_dict(value), memo))]
+    elif attr.has(value.__class__):
+        encoded = [_class_path(value.__class__), [
+            [field.name, encode_key_value(getattr(value, field.name), memo)]
+            for field in attr.fields(value.__class__)
+        ]]
+    else:
+        raise UncacheableValue(
+            "can't render {!r} as a cache key".format(value.__class__))
+    if memo is not None:
+        memo[id(value)] = (value, encoded)
+    return encoded
+
+
+class FragmentCache(object):
+    """
+    Load, update and dump the on disk fragment cache.
+
+    :param path: path of the cache file
+    :param module_name: root handler module name
+    :param config_class:
+    """
+
+    def __init__(self,
+                 path: str,
+                 module_name: str,
+                 config_class: type):
+        self.path = path
+        self.module_name = module_name
+        self.config_class = config_class
+        self.records = OrderedDict()  # type: typing.Dict[str, FragmentRecord]
+        self.last_diff = None  # type: FragmentDiff
+        self._new_records = OrderedDict()  # type: typing.Dict[str, FragmentRecord]
+        self._key_fields = None  # type: typing.Tuple[str, ...]
+        self._file_fingerprints = dict()  # type: typing.Dict[str, str]
+        self._encoded_values = dict()  # type: typing.Dict[int, tuple]
+        self.load()
+
+    @property
+    def settings(self) -> dict:
+        """
+        If any of these changed, all cached records are invalid.
+        """
+        return {
+            "version": FRAGMENT_CACHE_VERSION,
+            "lbdrabbit_version": __version__,
+            "module_name": self.module_name,
+            "config_class": _class_path(self.config_class),
+        }
+
+    def load(self):
+        self.records = OrderedDict()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(f.read().decode("utf-8"))
+        except (IOError, ValueError):
+            return
+        if data.get("settings") != self.settings:
+            return
+        for dct in data["fragments"]:
+            record = FragmentRecord(**dct)
+            self.records[record.identifier] = record
+
+    def dump(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        data = {
+            "settings": self.settings,
+            "fragments": [record.to_dict() for record in self.records.values()],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(data).encode("utf-8"))
+        os.replace(tmp_path, self.path)
+
+    @property
+    def key_fields(self) -> typing.Tuple[str, ...]:
+        """
+        Config fields used by any resource builder, other fields (for example
+        ``boto3_ses``) don't change the template.
+        """
+        if self._key_fields is None:
+            registry = self.config_class.builder_registry
+            yes_fields = {builder.yes_field for builder in registry.ordered}
+            # affected_by is memoized by the registry
+            self._key_fields = tuple([
+                field_name
+                for field_name in get_field_names(self.config_class)
+                if field_name in yes_fields or registry.affected_by(field_name)
+            ])
+        return self._key_fields
+
+    def _file_fingerprint(self, path: str) -> str:
+        try:
+            return self._file_fingerprints[path]
+        except KeyError:
+            fp = fingerprint.of_file(path)
+            self._file_fingerprints[path] = fp
+            return fp
+
+    def config_key(self, config) -> typing.Union[str, None]:
+        """
+        :return: fingerprint of the module source and the resolved config
+            values, None if the config is uncacheable.
+        """
+        module_file = getattr(config._py_module, "__file__", None)
+        if not module_file or not os.path.exists(module_file):
+            return None
+        try:
+            values = [
+                [field_name, encode_key_value(
+                    getattr(config, field_name), self._encoded_values)]
+                for field_name in self.key_fields
+            ]
+        except UncacheableValue:
+            return None
+        return fingerprint.of_text(json.dumps(
+            [self._file_fingerprint(module_file), values], sort_keys=True))
+
+    def _build_record(self, config, key: str, template: Template,
+                      timer: BuilderTimer = None) -> typing.Union[FragmentRecord, None]:
+        """
+        Build the aws objects and add them to the template, like
+        :meth:`~lbdrabbit.lbd_func_config.base.BaseConfig.create_aws_resource`,
+        and render them to a record.
+        """
+        resources = list()
+        readiness = config.readiness
+        for builder in config.builder_registry.ordered:
+            if not readiness[builder.name]:
+                continue
+            start = time.perf_counter()
+            n_object = config.add_aws_object(template, builder.name)
+            if n_object and timer is not None:
+                timer.record(builder.name, n_object, time.perf_counter() - start)
+            aws_object = config.get_aws_object(builder.name)
+            if isinstance(aws_object, dict):
+                aws_objects = list(aws_object.values())
+            else:
+                aws_objects = [aws_object, ]
+            resources.append([builder.name, aws_objects])
+        if key is None:
+            return None
+        try:
+            for item in resources:
+                item[1] = [
+                    # to_dict returns new plain dicts and lists
+                    [aws_object.title, aws_object.to_dict()]
+                    for aws_object in item[1]
+                ]
+        except Exception:  # invalid aws object, failed later by to_json
+            return None
+        return FragmentRecord(
+            identifier=config.identifier, key=key, resources=resources)
+
+    def create_aws_resource(self, config, template: Template,
+                            timer: BuilderTimer = None) -> bool:
+        """
+        Splice the cached aws objects of the config into the template, or
+        build them if the key changed.
+
+        :return: True if the cached fragment is reused.
+        """
+        if config.builder_registry is None:
+            return False
+        identifier = config.identifier
+        key = self.config_key(config)
+        record = self.records.get(identifier)
+        if key is not None and record is not None and record.key == key:
+            for _, items in record.resources:
+                for title, data in items:
+                    template.add_resource(
+                        CachedResource(title, data), ignore_duplicate=True)
+            self._new_records[identifier] = record
+            return True
+        record = self._build_record(config, key, template, timer=timer)
+        if record is not None:
+            self._new_records[identifier] = record
+        return False
+
+    def create_template(self, configs: typing.Iterable, template: Template,
+                        timer: BuilderTimer = None, verbose: bool = True):
+        """
+        Incremental version of the template phase, update the records and
+        dump the cache file when finished. Records of the configs not seen
+        in this build are dropped.
+
+        :param configs: configs in the serial order, the return of
+            :meth:`~lbdrabbit.lbd_func_config.index.HandlerIndex.iter_configs`
+        """
+        diff = FragmentDiff()
+        self._new_records = OrderedDict()
+        self._file_fingerprints = dict()
+        self._encoded_values = dict()
+        for config in configs:
+            if verbose:
+                print("create aws resource for {}".format(config.identifier))
+            if self.create_aws_resource(config, template, timer=timer):
+                diff.reused.append(config.identifier)
+            else:
+                diff.rebuilt.append(config.identifier)
+        self.records = self._new_records
+        self.last_diff = diff
+        self._encoded_values = dict()
+        self.dump()
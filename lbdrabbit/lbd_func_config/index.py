@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+In memory handler index.
+
+Walking the handler tree rebuilds the ``picage.Package`` tree and runs
+``import_module`` for every node. The build pipeline has three phases
+(inherit, derive, template), so we walk the tree only once, keep the result
+in a :class:`HandlerIndex`, and let every phase run over the index.
+
+**中文文档**
+
+将 ``walk_lbd_handler`` 的遍历结果保存在内存中, 包括所有的模块, 母模块, 以及
+handler 函数. 继承, 推导, 生成模板 三个步骤都基于这个索引完成, 而无需重复遍历.
+"""
+
+import typing
+import attr
+from .iterator import ModuleFilter, walk_lbd_handler
+from .static_iterator import walk_lbd_handler_static
+from .index_cache import walk_lbd_handler_incremental
+from .parallel_iterator import walk_lbd_handler_parallel
+
+
+@attr.s
+class ModuleNode(object):
+    """
+    A handler module (or package) in the index.
+
+    :param py_module: the module object
+    :param py_parent_module: the parent package object, None for the root
+    :param py_handler_funcs: lambda handler functions defined in this module
+    """
+    py_module = attr.ib()
+    py_parent_module = attr.ib(default=None)
+    py_handler_funcs = attr.ib(factory=list)  # type: typing.List[typing.Callable]
+
+    @property
+    def name(self) -> str:
+        return self.py_module.__name__
+
+
+@attr.s
+class HandlerIndex(object):
+    """
+    The result of walking a handler tree once.
+
+    :param module_name: root module name
+    :param nodes: module nodes, parent always comes before its children
+    """
+    module_name = attr.ib()  # type: str
+    nodes = attr.ib(factory=list)  # type: typing.List[ModuleNode]
+
+    @classmethod
+    def from_walker(cls, module_name: str, walker: typing.Iterable) -> 'HandlerIndex':
+        """
+        :param walker: an iterable of
+            ``(py_current_module, py_parent_module, py_handler_func)``, the
+            return of :func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler`
+        """
+        index = cls(module_name=module_name)
+        for py_current_module, py_parent_module, py_handler_func in walker:
+            if py_handler_func is None:
+                index.nodes.append(ModuleNode(
+                    py_module=py_current_module,
+                    py_parent_module=py_parent_module,
+                ))
+            else:
+                index.nodes[-1].py_handler_funcs.append(py_handler_func)
+        return index
+
+    @classmethod
+    def build(cls,
+              module_name: str,
+              valid_func_name_list: typing.List[str],
+              config_field: str,
+              config_class: type,
+              static: bool = False,
+              cache_path: str = None,
+              parallel: bool = False,
+              max_workers: int = None,
+              module_filter: ModuleFilter = None) -> 'HandlerIndex':
+        """
+        Walk the handler tree once and build the index.
+
+        :param static: if True, use
+            :func:`~lbdrabbit.lbd_func_config.static_iterator.walk_lbd_handler_static`
+        :param cache_path: if given, use the on disk handler index at this
+            path, only changed, added and deleted modules are rediscovered.
+            See :mod:`~lbdrabbit.lbd_func_config.index_cache`.
+        :param parallel: if True, import the top level sub packages in a
+            process pool, use
+            :func:`~lbdrabbit.lbd_func_config.parallel_iterator.walk_lbd_handler_parallel`.
+            Can't be used with ``static`` or ``cache_path``.
+        :param max_workers: number of worker processes in parallel mode
+        :param module_filter: only collect handlers in the selected modules,
+            see :class:`~lbdrabbit.lbd_func_config.iterator.ModuleFilter`
+
+        :raises ValueError: if ``parallel`` is used with ``static`` or
+            ``cache_path``.
+        """
+        if parallel and (static or (cache_path is not None)):
+            raise ValueError(
+                "parallel can't be used with static or cache_path!"
+            )
+        if cache_path is not None:
+            walker = walk_lbd_handler_incremental(
+                module_name, valid_func_name_list, config_field, config_class,
+                static=static, cache_path=cache_path, module_filter=module_filter,
+            )
+        elif static:
+            walker = walk_lbd_handler_static(
+                module_name, valid_func_name_list, config_field, config_class,
+                module_filter=module_filter,
+            )
+        elif parallel:
+            walker = walk_lbd_handler_parallel(
+                module_name, valid_func_name_list, config_field,
+                max_workers=max_workers, module_filter=module_filter,
+            )
+        else:
+            walker = walk_lbd_handler(
+                module_name, valid_func_name_list, module_filter=module_filter)
+        return cls.from_walker(module_name, walker)
+
+    def walk(self):
+        """
+        Yield the same ``(py_current_module, py_parent_module, py_handler_func)``
+        tuple as :func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler`,
+        without touching the file system and ``import_module``.
+        """
+        for node in self.nodes:
+            yield node.py_module, node.py_parent_module, None
+            for py_handler_func in node.py_handler_funcs:
+                yield node.py_module, node.py_parent_module, py_handler_func
+
+    def iter_configs(self, config_field: str):
+        """
+        Yield module level config and function level config, parent always
+        comes before its children.
+        """
+        for node in self.nodes:
+            yield getattr(node.py_module, config_field)
+            for py_handler_func in node.py_handler_funcs:
+                yield getattr(py_handler_func, config_field)
+
+    @property
+    def n_module(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def n_handler(self) -> int:
+        return sum([len(node.py_handler_funcs) for node in self.nodes])
+
+
+_handler_index_cache = dict()  # type: typing.Dict[tuple, HandlerIndex]
+
+
+def get_handler_index(module_name: str,
+                      valid_func_name_list: typing.List[str],
+                      config_field: str,
+                      config_class: type,
+                      static: bool = False,
+                      cache_path: str = None,
+                      parallel: bool = False,
+                      max_workers: int = None,
+                      module_filter: ModuleFilter = None,
+                      refresh: bool = False) -> HandlerIndex:
+    """
+    Get the handler index from the in process cache, build it if not exists.
+    Reuse the index across repeated builds in the same process, calls with
+    different discovery options have their own index.
+
+    :param cache_path: see :meth:`HandlerIndex.build`
+    :param parallel: see :meth:`HandlerIndex.build`
+    :param max_workers: see :meth:`HandlerIndex.build`
+    :param module_filter: see :meth:`HandlerIndex.build`
+    :param refresh: if True, always walk the handler tree again
+    """
+    key = (
+        module_name, tuple(valid_func_name_list), config_field, config_class,
+        static, cache_path, parallel, max_workers, module_filter,
+    )
+    if refresh or (key not in _handler_index_cache):
+        _handler_index_cache[key] = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+            cache_path=cache_path,
+            parallel=parallel,
+            max_workers=max_workers,
+            module_filter=module_filter,
+        )
+    return _handler_index_cache[key]
+
+
+def clear_handler_index_cache():
+    _handler_index_cache.clear()
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persistent on disk handler index, for incremental handler discovery.
+
+The cache file (default ``.lbdrabbit/index.json``) records every module
+visited by the handler walker: file size, mtime, content fingerprint,
+handler function names, parent module and the statically parsed
+:class:`~lbdrabbit.lbd_func_config.static_iterator.ModuleSpec`.
+
+On the next build:
+
+- a module with the same size and mtime is unchanged, no hashing, no parsing.
+- a module with different size or mtime is hashed, if the fingerprint is
+  the same, it is unchanged.
+- only changed, added modules are parsed again. A changed module that was
+  already imported in the current process is reloaded.
+- modules below a changed package are rebuilt from the cached spec (or
+  reloaded) so they don't keep stale inherited config values.
+- records of deleted modules are dropped.
+
+Modules whose config can't be evaluated statically (and every module in
+non static mode) still have to be imported, a live config object can't be
+persisted.
+
+**中文文档**
+
+将 handler 模块树的遍历结果持久化到磁盘上. 下次构建时, 只有被修改, 新增, 删除的
+模块会被重新解析或重新 import.
+"""
+
+import os
+import sys
+import json
+import typing
+import attr
+from collections import OrderedDict
+from importlib import import_module, reload
+from picage import Package
+
+from ..pkg.fingerprint import fingerprint
+from .iterator import ModuleFilter, walk_module_tree
+from .static_iterator import (
+    ModuleSpec, parse_module_spec, make_stand_in_module,
+    get_module_file, _stand_in_modules,
+)
+
+DEFAULT_INDEX_CACHE_PATH = os.path.join(".lbdrabbit", "index.json")
+
+INDEX_CACHE_VERSION = 1
+
+
+@attr.s
+class ModuleRecord(object):
+    """
+    Cached discovery result of one handler module.
+
+    :param spec: statically parsed module spec, None in non static mode
+    """
+    name = attr.ib()  # type: str
+    parent = attr.ib()  # type: str
+    file = attr.ib()  # type: str
+    is_package = attr.ib()  # type: bool
+    size = attr.ib()  # type: int
+    mtime = attr.ib()  # type: float
+    fingerprint = attr.ib()  # type: str
+    handler_names = attr.ib(factory=list)  # type: typing.List[str]
+    spec = attr.ib(default=None)  # type: ModuleSpec
+
+    def to_dict(self) -> dict:
+        dct = attr.asdict(self, recurse=False)
+        if self.spec is not None:
+            dct["spec"] = self.spec.to_dict()
+        return dct
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> 'ModuleRecord':
+        dct = dict(dct)
+        if dct["spec"] is not None:
+            dct["spec"] = ModuleSpec.from_dict(dct["spec"])
+        return cls(**dct)
+
+
+@attr.s
+class IndexDiff(object):
+    """
+    What changed since the last build.
+    """
+    added = attr.ib(factory=list)  # type: typing.List[str]
+    changed = attr.ib(factory=list)  # type: typing.List[str]
+    deleted = attr.ib(factory=list)  # type: typing.List[str]
+    unchanged = attr.ib(factory=list)  # type: typing.List[str]
+
+    @property
+    def has_change(self) -> bool:
+        return bool(self.added or self.changed or self.deleted)
+
+
+class HandlerIndexCache(object):
+    """
+    Load, update and dump the on disk handler index.
+
+    :param path: path of the cache file
+    :param module_name: root handler module name
+    :param valid_func_name_list:
+    :param config_field:
+    :param config_class:
+    :param static: if True, use static discovery for changed modules
+    :param module_filter: only walk the selected modules, records of the
+        skipped modules are kept as they are.
+    """
+
+    def __init__(self,
+                 path: str,
+                 module_name: str,
+                 valid_func_name_list: typing.List[str],
+                 config_field: str,
+                 config_class: type,
+                 static: bool = False,
+                 module_filter: ModuleFilter = None):
+        self.path = path
+        self.module_name = module_name
+        self.valid_func_name_list = valid_func_name_list
+        self.config_field = config_field
+        self.config_class = config_class
+        self.static = static
+        self.module_filter = module_filter
+        self.records = OrderedDict()  # type: typing.Dict[str, ModuleRecord]
+        self.last_diff = None  # type: IndexDiff
+        self.load()
+
+    @property
+    def settings(self) -> dict:
+        """
+        If any of these changed, all cached records are invalid.
+        """
+        return {
+            "version": INDEX_CACHE_VERSION,
+            "module_name": self.module_name,
+            "valid_func_name_list": list(self.valid_func_name_list),
+            "config_field": self.config_field,
+            "config_class": "{}.{}".format(
+                self.config_class.__module__, self.config_class.__name__),
+            "static": self.static,
+        }
+
+    def load(self):
+        self.records = OrderedDict()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(f.read().decode("utf-8"))
+        except (IOError, ValueError):
+            return
+        if data.get("settings") != self.settings:
+            return
+        for dct in data["modules"]:
+            record = ModuleRecord.from_dict(dct)
+            self.records[record.name] = record
+
+    def dump(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        data = {
+            "settings": self.settings,
+            "modules": [record.to_dict() for record in self.records.values()],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(data, indent=2).encode("utf-8"))
+        os.replace(tmp_path, self.path)
+
+    def _load_module(self,
+                     record: ModuleRecord,
+                     is_dirty: bool,
+                     is_stale: bool):
+        """
+        :param is_dirty: the source code changed, or it is a new module
+        :param is_stale: an ancestor package changed, the inherited config
+            values has to be discarded.
+        """
+        module_name = record.name
+        if self.static and not record.spec.need_import:
+            if (not (is_dirty or is_stale)) and module_name in _stand_in_modules:
+                return _stand_in_modules[module_name]
+            py_module = make_stand_in_module(
+                module_name, record.file, record.spec,
+                self.config_field, self.config_class,
+            )
+            _stand_in_modules[module_name] = py_module
+            return py_module
+
+        if module_name in sys.modules:
+            py_module = sys.modules[module_name]
+            if (is_dirty or is_stale) \
+                    and not getattr(py_module, "__lbdrabbit_stand_in__", False):
+                py_module = reload(py_module)
+            return py_module
+        return import_module(module_name)
+
+    def walk(self):
+        """
+        Incremental version of
+        :func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler`. Yield
+        the same ``(py_current_module, py_parent_module, py_handler_func)``
+        tuples, update the records and dump the cache file when finished.
+        """
+        diff = IndexDiff()
+        new_records = OrderedDict()
+        py_module_mapper = dict()
+        dirty_or_stale = set()
+
+        for (
+                current_module,
+                parent_module,
+                selected,
+        ) in walk_module_tree(self.module_name, self.module_filter):
+            module_name = current_module.fullname
+            module_file = get_module_file(current_module)
+            is_package = isinstance(current_module, Package)
+            parent_name = None if parent_module is None else parent_module.fullname
+            stat = os.stat(module_file)
+
+            record = self.records.get(module_name)
+            is_dirty = True
+            if record is not None and record.file == module_file:
+                if record.size == stat.st_size and record.mtime == stat.st_mtime:
+                    is_dirty = False
+
+            source = None
+            if is_dirty:
+                with open(module_file, "rb") as f:
+                    source = f.read()
+                fp = fingerprint.of_bytes(source)
+                if record is not None and record.file == module_file \
+                        and record.fingerprint == fp:
+                    # touched but not modified
+                    is_dirty = False
+                    record.size = stat.st_size
+                    record.mtime = stat.st_mtime
+                else:
+                    record = ModuleRecord(
+                        name=module_name,
+                        parent=parent_name,
+                        file=module_file,
+                        is_package=is_package,
+                        size=stat.st_size,
+                        mtime=stat.st_mtime,
+                        fingerprint=fp,
+                    )
+                    if module_name in self.records:
+                        diff.changed.append(module_name)
+                    else:
+                        diff.added.append(module_name)
+            if not is_dirty:
+                diff.unchanged.append(module_name)
+            record.parent = parent_name
+
+            if self.static and (record.spec is None or is_dirty):
+                if source is None:
+                    with open(module_file, "rb") as f:
+                        source = f.read()
+                record.spec = parse_module_spec(
+                    source=source.decode("utf-8"),
+                    module_name=module_name,
+                    is_package=is_package,
+                    valid_func_name_list=self.valid_func_name_list,
+                    config_field=self.config_field,
+                    config_class=self.config_class,
+                    filename=module_file,
+                )
+
+            is_stale = parent_name in dirty_or_stale
+            if is_dirty or is_stale:
+                dirty_or_stale.add(module_name)
+
+            py_current_module = self._load_module(record, is_dirty, is_stale)
+            py_module_mapper[module_name] = py_current_module
+            if parent_name is None:
+                py_parent_module = None
+            else:
+                py_parent_module = py_module_mapper[parent_name]
+
+            yield py_current_module, py_parent_module, None
+
+            new_records[module_name] = record
+            if not selected:
+                continue
+            handler_names = list()
+            for func_name in self.valid_func_name_list:
+                if func_name in py_current_module.__dict__:
+                    handler_names.append(func_name)
+                    py_handler_func = getattr(py_current_module, func_name)
+                    yield py_current_module, py_parent_module, py_handler_func
+            record.handler_names = handler_names
+
+        for module_name, record in self.records.items():
+            if module_name not in new_records:
+                if self.module_filter is not None and os.path.exists(record.file):
+                    # skipped by the filter, not deleted
+                    new_records[module_name] = record
+                    continue
+                diff.deleted.append(module_name)
+                _stand_in_modules.pop(module_name, None)
+
+        self.records = new_records
+        self.last_diff = diff
+        self.dump()
+
+
+def walk_lbd_handler_incremental(module_name: str,
+                                 valid_func_name_list: typing.List[str],
+                                 config_field: str,
+                                 config_class: type,
+                                 static: bool = False,
+                                 cache_path: str = DEFAULT_INDEX_CACHE_PATH,
+                                 module_filter: ModuleFilter = None):
+    """
+    A shortcut of :meth:`HandlerIndexCache.walk`.
+    """
+    cache = HandlerIndexCache(
+        path=cache_path,
+        module_name=module_name,
+        valid_func_name_list=valid_func_name_list,
+        config_field=config_field,
+        config_class=config_class,
+        static=static,
+        module_filter=module_filter,
+    )
+    for things in cache.walk():
+        yield things
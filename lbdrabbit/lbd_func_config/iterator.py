@@ -1,11 +1,147 @@
 # -*- coding: utf-8 -*-
 
+import re
 import typing
+import fnmatch
+import attr
 from importlib import import_module
 from picage import Package
 
+# re.Pattern is not available before python 3.7
+_pattern_type = type(re.compile(""))
 
-def walk_lbd_handler(module_name, valid_func_name_list):
+
+def _to_tuple(value) -> tuple:
+    if value is None:
+        return tuple()
+    if isinstance(value, (str, _pattern_type)):
+        return (value,)
+    return tuple(value)
+
+
+def _match(module_name: str, pattern: typing.Union[str, typing.Pattern]) -> bool:
+    if isinstance(pattern, str):
+        return fnmatch.fnmatchcase(module_name, pattern)
+    return pattern.fullmatch(module_name) is not None
+
+
+@attr.s(frozen=True)
+class ModuleFilter(object):
+    """
+    Select handler modules by full module name.
+
+    :param include: glob pattern string (``fnmatch``) or compiled regex
+        (``re.compile``, must match the full name), or a list of them. If
+        given, only handlers in the matched modules, and their sub modules,
+        are collected.
+    :param exclude: same as ``include``. A matched module, and its entire
+        sub tree, is skipped.
+    :param subtree: only collect handlers in this module and its sub
+        modules, for example ``my_project.handlers.rest``.
+
+    Skipped modules are never imported. The ancestor packages of a selected
+    module are still visited (without their handlers), so the inherited
+    config values can be resolved.
+
+    **中文文档**
+
+    根据模块全名筛选 handler 模块. 被跳过的模块不会被 import. 被选中模块的母包仍会
+    被遍历 (但不包括母包中的 handler 函数), 以保证能正确的继承配置.
+    """
+    include = attr.ib(default=None, converter=_to_tuple)  # type: typing.Tuple[typing.Union[str, typing.Pattern]]
+    exclude = attr.ib(default=None, converter=_to_tuple)  # type: typing.Tuple[typing.Union[str, typing.Pattern]]
+    subtree = attr.ib(default=None)  # type: str
+
+    def is_excluded(self, module_name: str) -> bool:
+        for pattern in self.exclude:
+            if _match(module_name, pattern):
+                return True
+        return False
+
+    def is_selected(self, module_name: str) -> bool:
+        if self.subtree is not None:
+            if not (module_name == self.subtree
+                    or module_name.startswith(self.subtree + ".")):
+                return False
+        if self.include:
+            # a module is included if itself or any parent package matches
+            parts = module_name.split(".")
+            for i in range(len(parts), 0, -1):
+                name = ".".join(parts[:i])
+                for pattern in self.include:
+                    if _match(name, pattern):
+                        return True
+            return False
+        return True
+
+
+def walk_module_tree(module_name: str,
+                     module_filter: ModuleFilter = None):
+    """
+    Walk through the package in the same order as ``picage.Package.walk``,
+    yield ``(current_module, parent_module, selected)``, ``current_module``
+    and ``parent_module`` are ``picage`` objects, ``selected`` tells whether
+    the handlers in this module should be collected.
+
+    Nothing is imported here.
+    """
+    pkg = Package(module_name)
+    if module_filter is None:
+        for (
+                current_module,
+                parent_module,
+                sub_packages,
+                sub_modules,
+        ) in pkg.walk(pkg_only=False):
+            yield current_module, parent_module, True
+        return
+
+    has_selected_cache = dict()  # type: typing.Dict[str, bool]
+
+    def has_selected(current_module) -> bool:
+        """
+        Is this module, or any of its sub module selected.
+        """
+        name = current_module.fullname
+        if name not in has_selected_cache:
+            flag = False
+            if module_filter.is_excluded(name):
+                flag = False
+            elif module_filter.is_selected(name):
+                flag = True
+            elif isinstance(current_module, Package):
+                for sub in list(current_module.sub_packages.values()) \
+                        + list(current_module.sub_modules.values()):
+                    if has_selected(sub):
+                        flag = True
+                        break
+            has_selected_cache[name] = flag
+        return has_selected_cache[name]
+
+    def walk(current_module, parent_module):
+        if not has_selected(current_module):
+            return
+        yield (
+            current_module,
+            parent_module,
+            module_filter.is_selected(current_module.fullname),
+        )
+        if isinstance(current_module, Package):
+            for sub in list(current_module.sub_packages.values()) \
+                    + list(current_module.sub_modules.values()):
+                for things in walk(sub, current_module):
+                    yield things
+
+    for things in walk(pkg, None):
+        yield things
+
+
+def walk_lbd_handler(module_name,
+                     valid_func_name_list,
+                     include=None,
+                     exclude=None,
+                     subtree=None,
+                     module_filter=None):
     """
     :type module_name: str
     :param module_name:
@@ -14,17 +150,32 @@ def walk_lbd_handler(module_name, valid_func_name_list):
     :param valid_func_name_list: list of valid function name works as
         lambda handler
 
+    :type include: typing.Union[str, typing.Pattern, typing.List[typing.Union[str, typing.Pattern]]]
+    :param include: see :class:`ModuleFilter`
+
+    :type exclude: typing.Union[str, typing.Pattern, typing.List[typing.Union[str, typing.Pattern]]]
+    :param exclude: see :class:`ModuleFilter`
+
+    :type subtree: str
+    :param subtree: see :class:`ModuleFilter`
+
+    :type module_filter: ModuleFilter
+    :param module_filter: use this filter instead of ``include``,
+        ``exclude`` and ``subtree``
+
     **中文文档**
 
     遍历一个模块, 以及它所有的子包和子模块, 以及里面用于 lambda_handler 的函数.
     """
-    pkg = Package(module_name)
+    if module_filter is None \
+            and (include is not None or exclude is not None or subtree is not None):
+        module_filter = ModuleFilter(include=include, exclude=exclude, subtree=subtree)
+
     for (
             current_module,
             parent_module,
-            sub_packages,
-            sub_modules,
-    ) in pkg.walk(pkg_only=False):
+            selected,
+    ) in walk_module_tree(module_name, module_filter):
         py_current_module = import_module(current_module.fullname)
         if parent_module is None:
             py_parent_module = None
@@ -33,6 +184,8 @@ def walk_lbd_handler(module_name, valid_func_name_list):
 
         yield py_current_module, py_parent_module, None
 
+        if not selected:
+            continue
         for func_name in valid_func_name_list:
             if func_name in py_current_module.__dict__:
                 py_handler_func = getattr(py_current_module, func_name)
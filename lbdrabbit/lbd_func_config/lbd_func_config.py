@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import json
 import typing
 import attr
 import string
@@ -7,17 +8,161 @@ from importlib import import_module
 from picage import Package
 from constant2 import Constant
 from troposphere_mate import Template, Parameter, Tags, Ref, GetAtt, Sub, ImportValue
-from troposphere_mate import awslambda, apigateway, iam, events, s3
+from troposphere_mate import awslambda, apigateway, iam, events, s3, applicationautoscaling
 from troposphere_mate import slugify, camelcase, helper_fn_sub
 from troposphere_mate import AWS_ACCOUNT_ID
 
-from .base import BaseConfig, REQUIRED, NOTHING, walk_lbd_handler
+from .base import (
+    BaseConfig, REQUIRED, NOTHING, walk_lbd_handler, config_inherit_handler,
+    invalidate_on_setattr,
+)
+from .builder import ResourceBuilder, BuilderRegistry, BuilderTimer
+from .fragment_cache import FragmentCache
+from .shard import ShardedTemplate, shard_template
+from .event_rule import (
+    EventRuleGroup, assign_event_rule_groups, get_event_target_id, MAX_TARGETS_PER_RULE,
+)
+from .awslambda_ext import Alias, ProvisionedConcurrencyConfiguration
+from .monolith import MonolithRouter, ROUTER_REQUEST_TEMPLATE
+from .index import HandlerIndex
+from ..keep_warm import get_keep_warm_input
 from ..pkg.fingerprint import fingerprint
 
 DEFAULT_LBD_FUNC_CONFIG_FIELD = "__lbd_func_config__"
 
 
-@attr.s
+# config fields locating the handler in the module tree
+_LOCATION_INPUTS = ("_root_module_name", "_py_")
+
+#: resource builders of :class:`LbdFuncConfig`, in creation order
+LBD_FUNC_BUILDER_REGISTRY = BuilderRegistry([
+    ResourceBuilder(
+        name="lbd_func",
+        build="_build_lbd_func_aws_object",
+        yes_field="lbd_func_yes",
+        check="_lbd_func_aws_object_is_valid",
+        inputs=("lbd_func_", "param_env_name", "_monolith_") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="lbd_version",
+        build="_build_lbd_version_aws_object",
+        yes_field="lbd_alias_yes",
+        depends_on=("lbd_func",),
+        references=("lbd_func",),
+        inputs=("lbd_func_", "param_env_name") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="lbd_alias",
+        build="_build_lbd_alias_aws_object",
+        depends_on=("lbd_version",),
+        references=("lbd_version", "lbd_func"),
+        inputs=("lbd_alias_",) + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_resource",
+        build="_build_apigw_resource_aws_object",
+        yes_field="apigw_resource_yes",
+        check="_apigw_resource_aws_object_is_valid",
+        inputs=("apigw_restapi",) + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_method",
+        build="_build_apigw_method_aws_object",
+        yes_field="apigw_method_yes",
+        check="_apigw_method_aws_object_is_valid",
+        references=("apigw_resource", "lbd_func", "lbd_alias"),
+        inputs=("apigw_method_", "apigw_restapi") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_method_lbd_permission",
+        build="_build_apigw_method_lbd_permission_aws_object",
+        depends_on=("apigw_method", "lbd_func"),
+        references=("apigw_method", "lbd_func", "lbd_alias"),
+        inputs=("apigw_method_", "apigw_restapi") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_method_options_for_cors",
+        build="_build_apigw_method_options_for_cors_aws_object",
+        yes_field="apigw_method_enable_cors_yes",
+        check="_apigw_method_aws_object_is_valid",
+        references=("apigw_resource",),
+        inputs=("apigw_method_", "apigw_authorizer_token_type_header_field",
+                "apigw_restapi") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_authorizer",
+        build="_build_apigw_authorizer_aws_object",
+        yes_field="apigw_authorizer_yes",
+        check="_apigw_authorizer_aws_object_is_valid",
+        references=("lbd_func", "lbd_alias"),
+        inputs=("apigw_authorizer_", "apigw_restapi") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="apigw_authorizer_lbd_permission",
+        build="_build_apigw_authorizer_lbd_permission_aws_object",
+        depends_on=("apigw_authorizer", "lbd_func"),
+        references=("apigw_authorizer", "lbd_func", "lbd_alias"),
+        inputs=("apigw_restapi",),
+    ),
+    ResourceBuilder(
+        name="scheduled_job_event_rule",
+        build="_build_scheduled_job_event_rule_aws_objects",
+        yes_field="scheduled_job_yes",
+        check="_scheduled_job_event_rule_aws_objects_is_valid",
+        depends_on=("lbd_func",),
+        references=("lbd_func", "lbd_alias"),
+        inputs=("scheduled_job_", "_scheduled_job_", "lbd_func_name") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="scheduled_job_event_lbd_permission",
+        build="_build_scheduled_job_event_lbd_permission_aws_objects",
+        depends_on=("scheduled_job_event_rule", "lbd_func"),
+        references=("scheduled_job_event_rule", "lbd_func", "lbd_alias"),
+        inputs=("scheduled_job_", "_scheduled_job_", "lbd_func_name") + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="keep_warm_event_rule",
+        build="_build_keep_warm_event_rule_aws_objects",
+        yes_field="keep_warm_yes",
+        check="_keep_warm_event_rule_aws_objects_is_valid",
+        depends_on=("lbd_func",),
+        references=("lbd_func", "lbd_alias"),
+        inputs=("keep_warm_",) + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="keep_warm_event_lbd_permission",
+        build="_build_keep_warm_event_lbd_permission_aws_objects",
+        depends_on=("keep_warm_event_rule", "lbd_func"),
+        references=("keep_warm_event_rule", "lbd_func", "lbd_alias"),
+        inputs=("keep_warm_",) + _LOCATION_INPUTS,
+    ),
+    ResourceBuilder(
+        name="s3_event_bucket",
+        build="_build_s3_event_bucket_aws_object",
+        yes_field="s3_event_bucket_yes",
+        check="_s3_event_bucket_aws_object_is_valid",
+        references=("lbd_func", "lbd_alias"),
+        inputs=("s3_event_", "param_env_name"),
+    ),
+    ResourceBuilder(
+        name="s3_event_bucket_lbd_permission",
+        build="_build_s3_event_bucket_lbd_permission_aws_object",
+        depends_on=("s3_event_bucket", "lbd_func"),
+        references=("s3_event_bucket", "lbd_func", "lbd_alias"),
+        inputs=("s3_event_bucket_",),
+    ),
+    ResourceBuilder(
+        name="lbd_alias_scalable_target",
+        build="_build_lbd_alias_scalable_target_aws_object",
+        check="_lbd_alias_scalable_target_aws_object_is_valid",
+        depends_on=("lbd_alias",),
+        references=("lbd_alias", "lbd_func"),
+        inputs=("lbd_alias_",) + _LOCATION_INPUTS,
+    ),
+])
+
+
+@attr.s(slots=True, on_setattr=invalidate_on_setattr)
 class LbdFuncConfig(BaseConfig):
     """
     Lambda Function Level Config.
@@ -25,6 +170,40 @@ class LbdFuncConfig(BaseConfig):
     Every child function under a resource inherits :class:`ResourceConfig``.
 
 
+    :param lbd_alias_yes: if True, publish a ``awslambda.Version`` and point
+        a ``awslambda.Alias`` to it. Api gateway methods, authorizers, event
+        rules and s3 notifications invoke the alias instead of ``$LATEST``.
+    :param lbd_alias_name: name of the alias, default ``"live"``.
+    :param lbd_alias_provisioned_concurrency: provisioned concurrent
+        executions of the alias.
+    :param lbd_alias_scaling_scheduled_actions: list of
+        ``applicationautoscaling.ScheduledAction``, scale the provisioned
+        concurrency of the alias by time of day.
+    :param lbd_alias_scaling_min_capacity: ``MinCapacity`` of the scalable
+        target, default is ``lbd_alias_provisioned_concurrency``.
+    :param lbd_alias_scaling_max_capacity: ``MaxCapacity`` of the scalable
+        target, default is ``lbd_alias_provisioned_concurrency``.
+    :param lbd_alias_scaling_role_arn: ``RoleARN`` of the scalable target,
+        default is the application auto scaling service linked role.
+    :param apigw_method_lbd_permission_scope: ``"method"`` (default), one
+        ``awslambda.Permission`` per api gateway method, the SourceArn allows
+        only this method. ``"function"``, one ``awslambda.Permission`` per
+        lambda function, the SourceArn allows any method of the RestApi, the
+        permission is not replaced when the resource path or the http method
+        changes. The monolith router function always uses ``"function"``.
+        See :class:`LbdFuncConfig.ApigwMethodLbdPermissionScope`.
+    :param scheduled_job_event_rule_shared_yes: if True, the functions on the
+        same ``scheduled_job_expression`` share ``events.Rule``, at most 5
+        targets per rule, instead of one rule per function. See
+        :mod:`~lbdrabbit.lbd_func_config.event_rule`.
+    :param keep_warm_yes: if True, an ``events.Rule`` pings the lambda
+        function on ``keep_warm_expression`` to keep its containers warm. The
+        handler has to be decorated with :func:`lbdrabbit.keep_warm.keep_warm`.
+    :param keep_warm_expression: schedule expression of the pings, default
+        ``"rate(5 minutes)"``.
+    :param keep_warm_concurrency: number of pings sent at the same time,
+        which is the number of containers kept warm, default 1. A rule has
+        at most 5 targets, one more rule is created per 5 pings.
     :param apigw_authorizer_yes: indicate if this lambda function is used
         as a custom authorizer.
 
@@ -47,11 +226,18 @@ class LbdFuncConfig(BaseConfig):
     ``troposphere_mate.awslambda.Function`` 对象. 而对应的 AWS Resource 名称
     则是 lbd_func, 这里我们用 <aws_resource_name> 来表示.
 
-    1. ``_<aws_resource_name>_aws_object_cache = attr.ib(default=NOTHING)`` 用于缓存
+    1. ``def _build_<aws_resource_name>_aws_object(self)`` 函数, 用于生成 AWS Object,
+    并在 :data:`LBD_FUNC_BUILDER_REGISTRY` 中注册为一个
+    :class:`~lbdrabbit.lbd_func_config.builder.ResourceBuilder`, 声明其使用的配置项
+    以及依赖的资源. ``<aws_resource_name>_aws_object`` property 由
+    :meth:`~lbdrabbit.lbd_func_config.base.BaseConfig.get_aws_object` 统一创建并缓存.
     2. ``def <aws_resource_name>_aws_object_pre_check(self)`` 函数, 用于检查是否满足创建
     ``<aws_resource_name>_aws_object`` 的条件. 如果不满足, 则抛出对应异常, 并给出详细信息.
     3. ``def <aws_resource_name>_aws_object_ready(self)`` 函数, 返回一个布尔值, 表示是否满足
-    创建 ``<aws_resource_name>_aws_object`` 的条件. 不抛出任何异常.
+    创建 ``<aws_resource_name>_aws_object`` 的条件. 不抛出任何异常. 结果来自
+    :attr:`LbdFuncConfig.readiness`, 它根据 :data:`LBD_FUNC_BUILDER_REGISTRY` 对所有资源只计算一次,
+    并缓存到配置被修改为止. 条件检查使用 ``_<aws_resource_name>_aws_object_is_valid``,
+    只返回布尔值, 不构造异常.
     4. ``<aws_resource_name>_yes = attr.ib(default=NOTHING)``, 用于手动开启和关闭
     该资源的生成. 例如我们手动关闭了, 就算之前的条件检查函数判定满足, 我们依然不会创建之.
     如果我们手动开启了, 如果条件检查不满足, 那么我们还是不会创建之.
@@ -75,14 +261,20 @@ class LbdFuncConfig(BaseConfig):
     lbd_func_dead_letter_config = attr.ib(default=NOTHING)  # type: awslambda.DeadLetterConfig
     lbd_func_tracing_config = attr.ib(default=NOTHING)  # type: awslambda.TracingConfig
 
-    _lbd_func_aws_object_cache = attr.ib(default=NOTHING)  # type: awslambda.Function
-
     lbd_func_metadata = attr.ib(default=NOTHING)  # type: dict
     lbd_func_tags = attr.ib(default=NOTHING)  # type: Tags
 
+    lbd_alias_yes = attr.ib(default=NOTHING)  # type: bool
+    lbd_alias_name = attr.ib(default=NOTHING)  # type: str
+    lbd_alias_provisioned_concurrency = attr.ib(default=NOTHING)  # type: int
+    lbd_alias_scaling_scheduled_actions = attr.ib(
+        default=NOTHING)  # type: typing.List[applicationautoscaling.ScheduledAction]
+    lbd_alias_scaling_min_capacity = attr.ib(default=NOTHING)  # type: int
+    lbd_alias_scaling_max_capacity = attr.ib(default=NOTHING)  # type: int
+    lbd_alias_scaling_role_arn = attr.ib(default=NOTHING)  # type: typing.Union[str, Ref, GetAtt, Sub]
+
     apigw_resource_yes = attr.ib(default=NOTHING)  # type: bool
     apigw_restapi = attr.ib(default=NOTHING)  # type: apigateway.RestApi
-    _apigw_resource_aws_object_cache = attr.ib(default=NOTHING)  # type: apigateway.Resource
 
     # apigateway.Method related
     class ApiMethodIntType(Constant):
@@ -98,8 +290,6 @@ class LbdFuncConfig(BaseConfig):
 
     apigw_method_yes = attr.ib(default=NOTHING)  # type: bool
     apigw_method_int_type = attr.ib(default=NOTHING)  # type: str
-    _apigw_method_aws_object_cache = attr.ib(default=NOTHING)  # type: apigateway.Method
-    _apigw_method_lbd_permission_aws_object_cache = attr.ib(default=NOTHING)  # type: awslambda.Permission
 
     apigw_method_int_passthrough_behavior = attr.ib(default=NOTHING)  # type: str
     apigw_method_int_timeout_in_milli = attr.ib(default=NOTHING)  # type: int
@@ -110,49 +300,32 @@ class LbdFuncConfig(BaseConfig):
     apigw_method_enable_cors_yes = attr.ib(default=NOTHING)  # type: str
     apigw_method_enable_cors_access_control_allow_origin = attr.ib(default=NOTHING)  # type: str
     apigw_method_enable_cors_access_control_allow_headers = attr.ib(default=NOTHING)  # type: str
-    _apigw_method_options_for_cors_aws_object_cache = attr.ib(default=NOTHING)  # type: apigateway.Method
+
+    class ApigwMethodLbdPermissionScope(Constant):
+        method = "method"
+        function = "function"
+
+    apigw_method_lbd_permission_scope = attr.ib(default=NOTHING)  # type: str
 
     apigw_authorizer_yes = attr.ib(default=NOTHING)  # type: bool
     apigw_authorizer_name = attr.ib(default=NOTHING)  # type: bool
     apigw_authorizer_token_type_header_field = attr.ib(default=NOTHING)  # type: bool
 
-    _apigw_authorizer_aws_object_cache = attr.ib(default=NOTHING)  # type: apigateway.Authorizer
-    _apigw_authorizer_lbd_permission_aws_object_cache = attr.ib(default=NOTHING)  # type: awslambda.Permission
-
     scheduled_job_yes = attr.ib(default=NOTHING)  # type: bool
     scheduled_job_expression = attr.ib(default=NOTHING)  # type: typing.Union[str, typing.List[str]]
-    _scheduled_job_event_rule_aws_objects_cache = attr.ib(default=NOTHING)  # type: typing.Dict[str, events.Rule]
-    _scheduled_job_event_lbd_permission_aws_objects_cache = attr.ib(
-        default=NOTHING)  # type: typing.Dict[str, awslambda.Permission]
+    scheduled_job_event_rule_shared_yes = attr.ib(default=NOTHING)  # type: bool
 
-    boto3_ses = attr.ib(default=NOTHING)
+    keep_warm_yes = attr.ib(default=NOTHING)  # type: bool
+    keep_warm_expression = attr.ib(default=NOTHING)  # type: str
+    keep_warm_concurrency = attr.ib(default=NOTHING)  # type: int
 
-    # Implementation related private functions
-    def _ready_checker_shortener(self, res_name):
-        """
-        Implementation use helper function for ``<resource_name>_aws_object_ready``
-        method.
+    boto3_ses = attr.ib(default=NOTHING)
 
-        :type res_name: str
-        :param res_name: resource name. For example: awslambda.Function is
-            lbd_func
-
-        :rtype: bool
-        """
-        try:
-            if getattr(self, "{}_yes".format(res_name)) is not True:
-                return False
-        except:
-            pass
-        try:
-            getattr(self, "{}_aws_object_pre_check".format(res_name))()
-            return True
-        except:
-            return False
+    builder_registry = LBD_FUNC_BUILDER_REGISTRY
 
     # S3 Event Trigger
 
-    @attr.s
+    @attr.s(slots=True)
     class S3EventLambdaConfig(object):
         event = attr.ib(default=NOTHING)
         filter = attr.ib(default=NOTHING)
@@ -226,7 +399,7 @@ class LbdFuncConfig(BaseConfig):
                 s3_notification_configuration.LambdaConfigurations = [
                     s3.LambdaConfigurations(
                         Event=s3_event_lbd_config.event,
-                        Function=GetAtt(self.lbd_func_aws_object, "Arn"),
+                        Function=self.lbd_func_invoke_arn,
                         Filter=s3_event_lbd_config.filter,
                     )
                     for s3_event_lbd_config in self.s3_event_lbd_config_list
@@ -251,63 +424,80 @@ class LbdFuncConfig(BaseConfig):
                         .format(self.identifier)
                 )
 
+    def _s3_event_bucket_aws_object_is_valid(self) -> bool:
+        if self.s3_event_lbd_config_list is NOTHING:
+            return False
+        if isinstance(self.s3_event_lbd_config_list, list):
+            return len(self.s3_event_lbd_config_list) != 0
+        return True
+
     def s3_event_bucket_aws_object_ready(self) -> bool:
-        return self._ready_checker_shortener("s3_event_bucket")
+        return self.readiness["s3_event_bucket"]
 
-    _s3_event_bucket_aws_object_cache = attr.ib(default=NOTHING)  # type: s3.Bucket
+    def _build_s3_event_bucket_aws_object(self) -> s3.Bucket:
+        s3_bucket = s3.Bucket(
+            self.s3_event_bucket_logic_id,
+            BucketName=self.s3_event_bucket_name_for_cf,
+        )
+        s3_bucket.NotificationConfiguration = self.s3_notification_configuration_aws_property
+        return s3_bucket
 
     @property
     def s3_event_bucket_aws_object(self) -> s3.Bucket:
-        if self._s3_event_bucket_aws_object_cache is NOTHING:
-            s3_bucket = s3.Bucket(
-                self.s3_event_bucket_logic_id,
-                BucketName=self.s3_event_bucket_name_for_cf,
-            )
-            s3_bucket.NotificationConfiguration = self.s3_notification_configuration_aws_property
-            self._s3_event_bucket_aws_object_cache = s3_bucket
-        return self._s3_event_bucket_aws_object_cache
-
-    _s3_event_bucket_lbd_permission_aws_object_cache = attr.ib(default=NOTHING) # type: awslambda.Permission
+        return self.get_aws_object("s3_event_bucket")
 
     def s3_event_bucket_lbd_permission_aws_object_pre_check(self):
         self.s3_event_bucket_aws_object_pre_check()
+        self.lbd_func_aws_object_pre_check()
 
     def s3_event_bucket_lbd_permission_aws_object_ready(self):
-        return self._ready_checker_shortener("s3_event_bucket_lbd_permission")
+        return self.readiness["s3_event_bucket_lbd_permission"]
+
+    def _build_s3_event_bucket_lbd_permission_aws_object(self) -> awslambda.Permission:
+        s3_event_bucket_lbd_permission_logic_id = "LbdPermission{}".format(self.s3_event_bucket_logic_id)
+        s3_event_bucket_lbd_permission = awslambda.Permission(
+            title=s3_event_bucket_lbd_permission_logic_id,
+            Action="lambda:InvokeFunction",
+            FunctionName=self.lbd_func_invoke_arn,
+            Principal="s3.amazonaws.com",
+            SourceArn=GetAtt(self.s3_event_bucket_aws_object, "Arn"),
+            DependsOn=[
+                self.s3_event_bucket_aws_object,
+                self.lbd_func_aws_object,
+            ]
+        )
+        return s3_event_bucket_lbd_permission
 
     @property
     def s3_event_bucket_lbd_permission_aws_object(self) -> awslambda.Permission:
-        if self._s3_event_bucket_lbd_permission_aws_object_cache is NOTHING:
-            s3_event_bucket_lbd_permission_logic_id = "LbdPermission{}".format(self.s3_event_bucket_logic_id)
-            s3_event_bucket_lbd_permission = awslambda.Permission(
-                title=s3_event_bucket_lbd_permission_logic_id,
-                Action="lambda:InvokeFunction",
-                FunctionName=GetAtt(self.lbd_func_aws_object, "Arn"),
-                Principal="s3.amazonaws.com",
-                SourceArn=GetAtt(self.s3_event_bucket_aws_object, "Arn"),
-                DependsOn=[
-                    self.s3_event_bucket_aws_object,
-                    self.lbd_func_aws_object,
-                ]
-            )
-            self._s3_event_bucket_lbd_permission_aws_object_cache = s3_event_bucket_lbd_permission
-        return self._s3_event_bucket_lbd_permission_aws_object_cache
+        return self.get_aws_object("s3_event_bucket_lbd_permission")
 
     _root_module_name = attr.ib(default=NOTHING)
     _py_module = attr.ib(default=NOTHING)
     _py_function = attr.ib(default=NOTHING)
     _py_parent_module = attr.ib(default=NOTHING)
+    # the router function in monolith mode, see MonolithRouter.apply
+    _monolith_router_lbd_func = attr.ib(default=NOTHING)  # type: awslambda.Function
+    # expression -> shared event rule, assigned in the derive phase
+    _scheduled_job_event_rule_groups = attr.ib(default=NOTHING)  # type: typing.Dict[str, EventRuleGroup]
 
     _default = dict(
         lbd_func_yes=True,
-        memory_size=128,
-        timeout=3,
+        lbd_func_memory_size=128,
+        lbd_func_timeout=3,
+        lbd_alias_yes=False,
+        lbd_alias_name="live",
         apigw_resource_yes=False,
         apigw_method_yes=False,
         apigw_method_int_passthrough_behavior="WHEN_NO_MATCH",
         apigw_method_int_timeout_in_milli=29000,
+        apigw_method_lbd_permission_scope=ApigwMethodLbdPermissionScope.method,
         apigw_authorizer_yes=False,
         apigw_authorizer_token_type_header_field="auth",
+        scheduled_job_event_rule_shared_yes=False,
+        keep_warm_yes=False,
+        keep_warm_expression="rate(5 minutes)",
+        keep_warm_concurrency=1,
     )
 
     @property
@@ -361,6 +551,8 @@ class LbdFuncConfig(BaseConfig):
 
     @property
     def lbd_func_logic_id(self) -> str:
+        if self._monolith_router_lbd_func is not NOTHING:
+            return self._monolith_router_lbd_func.title
         return "LbdFunc{}".format(
             camelcase(self.rel_module_name.replace(".", "-")) + camelcase(self._py_function.__name__)
         )
@@ -402,42 +594,190 @@ class LbdFuncConfig(BaseConfig):
         else:
             raise TypeError("{}.{} is not a valid function".format(self._py_module.__name__, self._py_function))
 
+    def _lbd_func_aws_object_is_valid(self) -> bool:
+        return callable(self._py_function) \
+               and hasattr(self._py_function, "__name__") \
+               and self.lbd_func_code is not NOTHING \
+               and self.lbd_func_runtime is not NOTHING
+
     def lbd_func_aws_object_ready(self):
-        return self._ready_checker_shortener("lbd_func")
+        return self.readiness["lbd_func"]
+
+    def _build_lbd_func_aws_object(self) -> awslambda.Function:
+        if self._monolith_router_lbd_func is not NOTHING:
+            return self._monolith_router_lbd_func
+        return self._new_lbd_func_aws_object(
+            logic_id=self.lbd_func_logic_id,
+            lbd_func_name=self.lbd_func_name,
+            handler="{}.{}".format(self._py_module.__name__, self._py_function.__name__),
+        )
+
+    def _new_lbd_func_aws_object(self,
+                                 logic_id: str,
+                                 lbd_func_name: str,
+                                 handler: str) -> awslambda.Function:
+        """
+        A lambda function using the ``lbd_func_*`` settings of this config,
+        also used to create the router function of a module config, see
+        :class:`~lbdrabbit.lbd_func_config.monolith.MonolithRouter`.
+        """
+        lbd_func = awslambda.Function(
+            logic_id,
+            FunctionName=helper_fn_sub("{}-%s" % lbd_func_name, self.param_env_name),
+            Handler=handler,
+            Code=self.lbd_func_code,
+            Role=self.lbd_func_iam_role_arn,
+            Runtime=self.lbd_func_runtime,
+        )
+        if self.lbd_func_memory_size is not NOTHING:
+            lbd_func.MemorySize = self.lbd_func_memory_size
+        if self.lbd_func_timeout is not NOTHING:
+            lbd_func.Timeout = self.lbd_func_timeout
+        if self.lbd_func_layers is not NOTHING:
+            lbd_func.Layers = self.lbd_func_layers
+        if self.lbd_func_reserved_concurrency is not NOTHING:
+            lbd_func.ReservedConcurrentExecutions = self.lbd_func_reserved_concurrency
+        if self.lbd_func_environment_vars is not NOTHING:
+            lbd_func.Environment = self.lbd_func_environment_vars
+        if self.lbd_func_kms_key_arn is not NOTHING:
+            lbd_func.KmsKeyArn = self.lbd_func_kms_key_arn
+        if self.lbd_func_vpc_config is not NOTHING:
+            lbd_func.VpcConfig = self.lbd_func_vpc_config
+        if self.lbd_func_dead_letter_config is not NOTHING:
+            lbd_func.DeadLetterConfig = self.lbd_func_dead_letter_config
+        if self.lbd_func_tracing_config is not NOTHING:
+            lbd_func.TracingConfig = self.lbd_func_tracing_config
+
+        return lbd_func
 
     @property
     def lbd_func_aws_object(self) -> awslambda.Function:
-        if self._lbd_func_aws_object_cache is NOTHING:
-            lbd_func = awslambda.Function(
-                self.lbd_func_logic_id,
-                FunctionName=helper_fn_sub("{}-%s" % self.lbd_func_name, self.param_env_name),
-                Handler="{}.{}".format(self._py_module.__name__, self._py_function.__name__),
-                Code=self.lbd_func_code,
-                Role=self.lbd_func_iam_role_arn,
-                Runtime=self.lbd_func_runtime,
+        return self.get_aws_object("lbd_func")
+
+    @property
+    def lbd_version_logic_id(self) -> str:
+        """
+        Lambda Version Logic Id has the fingerprint of the function
+        properties (code and config), a new version is published only when
+        one of them changed.
+        """
+        return "{}Version{}".format(
+            self.lbd_func_logic_id,
+            fingerprint.of_text(json.dumps(self.lbd_func_aws_object.to_dict(), sort_keys=True)),
+        )
+
+    def lbd_version_aws_object_ready(self):
+        return self.readiness["lbd_version"]
+
+    def _build_lbd_version_aws_object(self) -> awslambda.Version:
+        # the previous version is kept, same as the SAM AutoPublishAlias,
+        # so rolling back the stack can point the alias back to it
+        return awslambda.Version(
+            title=self.lbd_version_logic_id,
+            FunctionName=Ref(self.lbd_func_aws_object),
+            DeletionPolicy="Retain",
+            DependsOn=[
+                self.lbd_func_aws_object,
+            ]
+        )
+
+    @property
+    def lbd_version_aws_object(self) -> awslambda.Version:
+        return self.get_aws_object("lbd_version")
+
+    @property
+    def lbd_alias_logic_id(self) -> str:
+        return "{}Alias".format(self.lbd_func_logic_id)
+
+    def lbd_alias_aws_object_ready(self):
+        return self.readiness["lbd_alias"]
+
+    def _build_lbd_alias_aws_object(self) -> Alias:
+        lbd_alias = Alias(
+            title=self.lbd_alias_logic_id,
+            FunctionName=Ref(self.lbd_func_aws_object),
+            FunctionVersion=GetAtt(self.lbd_version_aws_object, "Version"),
+            Name=self.lbd_alias_name,
+            DependsOn=[
+                self.lbd_version_aws_object,
+            ]
+        )
+        if self.lbd_alias_provisioned_concurrency is not NOTHING:
+            lbd_alias.ProvisionedConcurrencyConfig = ProvisionedConcurrencyConfiguration(
+                ProvisionedConcurrentExecutions=self.lbd_alias_provisioned_concurrency,
             )
-            if self.lbd_func_memory_size is not NOTHING:
-                lbd_func.MemorySize = self.lbd_func_memory_size
-            if self.lbd_func_timeout is not NOTHING:
-                lbd_func.Timeout = self.lbd_func_timeout
-            if self.lbd_func_layers is not NOTHING:
-                lbd_func.Layers = self.lbd_func_layers
-            if self.lbd_func_reserved_concurrency is not NOTHING:
-                lbd_func.ReservedConcurrentExecutions = self.lbd_func_reserved_concurrency
-            if self.lbd_func_environment_vars is not NOTHING:
-                lbd_func.Environment = self.lbd_func_environment_vars
-            if self.lbd_func_kms_key_arn is not NOTHING:
-                lbd_func.KmsKeyArn = self.lbd_func_kms_key_arn
-            if self.lbd_func_vpc_config is not NOTHING:
-                lbd_func.VpcConfig = self.lbd_func_vpc_config
-            if self.lbd_func_dead_letter_config is not NOTHING:
-                lbd_func.DeadLetterConfig = self.lbd_func_dead_letter_config
-            if self.lbd_func_tracing_config is not NOTHING:
-                lbd_func.TracingConfig = self.lbd_func_tracing_config
-
-            self._lbd_func_aws_object_cache = lbd_func
-
-        return self._lbd_func_aws_object_cache
+        return lbd_alias
+
+    @property
+    def lbd_alias_aws_object(self) -> Alias:
+        return self.get_aws_object("lbd_alias")
+
+    @property
+    def lbd_func_invoke_arn(self) -> typing.Union[Ref, GetAtt]:
+        """
+        The ARN invoked by api gateway, event rules and s3 notifications,
+        the alias if it is created, otherwise the unqualified function.
+        """
+        if self.readiness["lbd_alias"]:
+            return Ref(self.lbd_alias_aws_object)
+        return GetAtt(self.lbd_func_aws_object, "Arn")
+
+    def lbd_alias_scalable_target_aws_object_pre_check(self):
+        if not isinstance(self.lbd_alias_scaling_scheduled_actions, list):
+            raise TypeError(
+                "{}.lbd_alias_scaling_scheduled_actions has to be a list!".format(self.identifier))
+        if len(self.lbd_alias_scaling_scheduled_actions) == 0:
+            raise ValueError(
+                "{}.lbd_alias_scaling_scheduled_actions is empty!".format(self.identifier))
+
+    def _lbd_alias_scalable_target_aws_object_is_valid(self) -> bool:
+        return isinstance(self.lbd_alias_scaling_scheduled_actions, list) \
+               and len(self.lbd_alias_scaling_scheduled_actions) != 0
+
+    def lbd_alias_scalable_target_aws_object_ready(self):
+        return self.readiness["lbd_alias_scalable_target"]
+
+    def _build_lbd_alias_scalable_target_aws_object(self) -> applicationautoscaling.ScalableTarget:
+        min_capacity = self.lbd_alias_scaling_min_capacity
+        if min_capacity is NOTHING:
+            min_capacity = self.lbd_alias_provisioned_concurrency
+        if min_capacity is NOTHING:
+            raise ValueError(
+                "{}.lbd_alias_scaling_min_capacity is not defined yet!".format(self.identifier))
+        max_capacity = self.lbd_alias_scaling_max_capacity
+        if max_capacity is NOTHING:
+            max_capacity = max(min_capacity, self.lbd_alias_provisioned_concurrency) \
+                if self.lbd_alias_provisioned_concurrency is not NOTHING else min_capacity
+        role_arn = self.lbd_alias_scaling_role_arn
+        if role_arn is NOTHING:
+            role_arn = Sub(
+                "arn:aws:iam::${AWS::AccountId}:role/aws-service-role/"
+                "lambda.application-autoscaling.amazonaws.com/"
+                "AWSServiceRoleForApplicationAutoScaling_LambdaConcurrency"
+            )
+        return applicationautoscaling.ScalableTarget(
+            title="{}ScalableTarget".format(self.lbd_alias_logic_id),
+            ServiceNamespace="lambda",
+            ScalableDimension="lambda:function:ProvisionedConcurrency",
+            ResourceId=Sub(
+                "function:${FunctionName}:${AliasName}",
+                {
+                    "FunctionName": Ref(self.lbd_func_aws_object),
+                    "AliasName": self.lbd_alias_name,
+                }
+            ),
+            MinCapacity=min_capacity,
+            MaxCapacity=max_capacity,
+            RoleARN=role_arn,
+            ScheduledActions=self.lbd_alias_scaling_scheduled_actions,
+            DependsOn=[
+                self.lbd_alias_aws_object,
+            ]
+        )
+
+    @property
+    def lbd_alias_scalable_target_aws_object(self) -> applicationautoscaling.ScalableTarget:
+        return self.get_aws_object("lbd_alias_scalable_target")
 
     @property
     def apigw_resource_logic_id(self) -> str:
@@ -500,21 +840,30 @@ class LbdFuncConfig(BaseConfig):
             raise ValueError("to create a apigateway.Resource, "
                              "LbdFuncConfig.apigw_restapi has to be specified")
 
+    def _apigw_resource_aws_object_is_valid(self) -> bool:
+        if not (hasattr(self._py_module, "__name__")
+                and isinstance(self._root_module_name, str)):
+            return False
+        return bool(self.rel_module_name) \
+               and self._py_function is NOTHING \
+               and self.apigw_restapi is not NOTHING
+
     def apigw_resource_aws_object_ready(self):
-        return self._ready_checker_shortener("apigw_resource")
+        return self.readiness["apigw_resource"]
+
+    def _build_apigw_resource_aws_object(self) -> apigateway.Resource:
+        apigw_resource = apigateway.Resource(
+            self.apigw_resource_logic_id,
+            RestApiId=Ref(self.apigw_restapi),
+            ParentId=self.apigw_resource_parent_id,
+            PathPart=self.apigw_resource_path_part,
+            DependsOn=[self.apigw_restapi],
+        )
+        return apigw_resource
 
     @property
     def apigw_resource_aws_object(self) -> apigateway.Resource:
-        if self._apigw_resource_aws_object_cache is NOTHING:
-            apigw_resource = apigateway.Resource(
-                self.apigw_resource_logic_id,
-                RestApiId=Ref(self.apigw_restapi),
-                ParentId=self.apigw_resource_parent_id,
-                PathPart=self.apigw_resource_path_part,
-                DependsOn=[self.apigw_restapi],
-            )
-            self._apigw_resource_aws_object_cache = apigw_resource
-        return self._apigw_resource_aws_object_cache
+        return self.get_aws_object("apigw_resource")
 
     @property
     def apigw_method_logic_id(self) -> str:
@@ -604,146 +953,165 @@ class LbdFuncConfig(BaseConfig):
             raise ValueError("to create a apigateway.Resource, "
                              "LbdFuncConfig.apigw_restapi has to be specified")
 
+    def _apigw_method_aws_object_is_valid(self) -> bool:
+        return self._py_function is not NOTHING \
+               and self.apigw_restapi is not NOTHING
+
     def apigw_method_aws_object_ready(self):
-        return self._ready_checker_shortener("apigw_method")
+        return self.readiness["apigw_method"]
 
-    @property
-    def apigw_method_aws_object(self) -> apigateway.Method:
-        if self._apigw_method_aws_object_cache is NOTHING:
-            depends_on = [
-                self.apigw_resource_aws_object,
-                self.lbd_func_aws_object,
-            ]
+    def _build_apigw_method_aws_object(self) -> apigateway.Method:
+        depends_on = [
+            self.apigw_resource_aws_object,
+            self.lbd_func_aws_object,
+        ]
 
-            # Integration Request
+        # Integration Request
+        if self._monolith_router_lbd_func is NOTHING:
             request_template = {"application/json": "$input.json('$')"}
+        else:
+            request_template = {"application/json": ROUTER_REQUEST_TEMPLATE}
 
-            # Integration Response
-            if self.apigw_method_int_type == self.ApiMethodIntType.html:
-                integration_response_200 = apigateway.IntegrationResponse(
-                    StatusCode="200",
-                    ResponseParameters={
-                        "method.response.header.Access-Control-Allow-Origin": "'*'",
-                        "method.response.header.Content-Type": "'text/html'"
-                    },
-                    ResponseTemplates={"text/html": "$input.path('$')"},
-                )
-                method_response_200 = apigateway.MethodResponse(
-                    StatusCode="200",
-                    ResponseParameters={
-                        "method.response.header.Access-Control-Allow-Origin": False,
-                        "method.response.header.Content-Type": False,
-                    },
-                    ResponseModels={"application/json": "Empty"},
-                )
-            elif self.apigw_method_int_type == self.ApiMethodIntType.rpc:
-                integration_response_200 = apigateway.IntegrationResponse(
-                    StatusCode="200",
-                    ContentHandling="CONVERT_TO_TEXT",
-                    ResponseParameters={},
-                    ResponseTemplates={"application/json": ""}
-                )
-                method_response_200 = apigateway.MethodResponse(
-                    StatusCode="200",
-                    ResponseParameters={},
-                    ResponseModels={"application/json": "Empty"},
-                )
-            elif self.apigw_method_int_type == self.ApiMethodIntType.rest:
-                integration_response_200 = apigateway.IntegrationResponse(
-                    StatusCode="200",
-                    ContentHandling="CONVERT_TO_TEXT",
-                    ResponseParameters={},
-                    ResponseTemplates={"application/json": ""}
-                )
-                method_response_200 = apigateway.MethodResponse(
-                    StatusCode="200",
-                    ResponseParameters={},
-                    ResponseModels={"application/json": "Empty"},
-                )
-            else:
-                raise TypeError
+        # Integration Response
+        if self.apigw_method_int_type == self.ApiMethodIntType.html:
+            integration_response_200 = apigateway.IntegrationResponse(
+                StatusCode="200",
+                ResponseParameters={
+                    "method.response.header.Access-Control-Allow-Origin": "'*'",
+                    "method.response.header.Content-Type": "'text/html'"
+                },
+                ResponseTemplates={"text/html": "$input.path('$')"},
+            )
+            method_response_200 = apigateway.MethodResponse(
+                StatusCode="200",
+                ResponseParameters={
+                    "method.response.header.Access-Control-Allow-Origin": False,
+                    "method.response.header.Content-Type": False,
+                },
+                ResponseModels={"application/json": "Empty"},
+            )
+        elif self.apigw_method_int_type == self.ApiMethodIntType.rpc:
+            integration_response_200 = apigateway.IntegrationResponse(
+                StatusCode="200",
+                ContentHandling="CONVERT_TO_TEXT",
+                ResponseParameters={},
+                ResponseTemplates={"application/json": ""}
+            )
+            method_response_200 = apigateway.MethodResponse(
+                StatusCode="200",
+                ResponseParameters={},
+                ResponseModels={"application/json": "Empty"},
+            )
+        elif self.apigw_method_int_type == self.ApiMethodIntType.rest:
+            integration_response_200 = apigateway.IntegrationResponse(
+                StatusCode="200",
+                ContentHandling="CONVERT_TO_TEXT",
+                ResponseParameters={},
+                ResponseTemplates={"application/json": ""}
+            )
+            method_response_200 = apigateway.MethodResponse(
+                StatusCode="200",
+                ResponseParameters={},
+                ResponseModels={"application/json": "Empty"},
+            )
+        else:
+            raise TypeError
 
-            integration_responses = [
-                integration_response_200,
-            ]
+        integration_responses = [
+            integration_response_200,
+        ]
 
-            integration = apigateway.Integration(
-                Type="AWS",
-                IntegrationHttpMethod="POST",
-                Uri=Sub(
-                    "arn:aws:apigateway:${Region}:lambda:path/2015-03-31/functions/${LambdaArn}/invocations",
-                    {
-                        "Region": {"Ref": "AWS::Region"},
-                        "LambdaArn": GetAtt(self.lbd_func_aws_object, "Arn"),
-                    }
-                ),
-                RequestTemplates=request_template,
-                IntegrationResponses=integration_responses,
-            )
+        integration = apigateway.Integration(
+            Type="AWS",
+            IntegrationHttpMethod="POST",
+            Uri=Sub(
+                "arn:aws:apigateway:${Region}:lambda:path/2015-03-31/functions/${LambdaArn}/invocations",
+                {
+                    "Region": {"Ref": "AWS::Region"},
+                    "LambdaArn": self.lbd_func_invoke_arn,
+                }
+            ),
+            RequestTemplates=request_template,
+            IntegrationResponses=integration_responses,
+        )
 
-            if self.apigw_method_int_passthrough_behavior is not NOTHING:
-                integration.PassthroughBehavior = self.apigw_method_int_passthrough_behavior
-            if self.apigw_method_int_timeout_in_milli is not NOTHING:
-                integration.TimeoutInMillis = self.apigw_method_int_timeout_in_milli
+        if self.apigw_method_int_passthrough_behavior is not NOTHING:
+            integration.PassthroughBehavior = self.apigw_method_int_passthrough_behavior
+        if self.apigw_method_int_timeout_in_milli is not NOTHING:
+            integration.TimeoutInMillis = self.apigw_method_int_timeout_in_milli
 
-            # Method Response
-            method_responses = [
-                method_response_200,
-            ]
+        # Method Response
+        method_responses = [
+            method_response_200,
+        ]
 
-            if self.apigw_method_enable_cors_yes is True:
-                for integration_response in integration.IntegrationResponses:
-                    integration_response.ResponseParameters[
-                        "method.response.header.Access-Control-Allow-Origin"] = "'*'"
-
-                for method_response in method_responses:
-                    method_response.ResponseParameters["method.response.header.Access-Control-Allow-Origin"] = False
-
-            self.check_apigw_method_authorization_type()
-            self.check_apigw_method_int_type()
-
-            apigw_method = apigateway.Method(
-                title=self.apigw_method_logic_id,
-                RestApiId=Ref(self.apigw_restapi),
-                ResourceId=Ref(self.apigw_resource_aws_object),
-                AuthorizationType=self.apigw_method_authorization_type,
-                HttpMethod=self.apigw_method_http_method,
-                MethodResponses=method_responses,
-                Integration=integration,
-            )
+        if self.apigw_method_enable_cors_yes is True:
+            for integration_response in integration.IntegrationResponses:
+                integration_response.ResponseParameters[
+                    "method.response.header.Access-Control-Allow-Origin"] = "'*'"
 
-            if self.apigw_method_use_authorizer_yes:
-                apigw_method.AuthorizerId = Ref(self.apigw_method_authorizer)
-                depends_on.append(self.apigw_method_authorizer)
+            for method_response in method_responses:
+                method_response.ResponseParameters["method.response.header.Access-Control-Allow-Origin"] = False
 
-            apigw_method.DependsOn = depends_on
+        self.check_apigw_method_authorization_type()
+        self.check_apigw_method_int_type()
 
-            self._apigw_method_aws_object_cache = apigw_method
+        apigw_method = apigateway.Method(
+            title=self.apigw_method_logic_id,
+            RestApiId=Ref(self.apigw_restapi),
+            ResourceId=Ref(self.apigw_resource_aws_object),
+            AuthorizationType=self.apigw_method_authorization_type,
+            HttpMethod=self.apigw_method_http_method,
+            MethodResponses=method_responses,
+            Integration=integration,
+        )
+
+        if self.apigw_method_use_authorizer_yes:
+            apigw_method.AuthorizerId = Ref(self.apigw_method_authorizer)
+            depends_on.append(self.apigw_method_authorizer)
 
-        return self._apigw_method_aws_object_cache
+        apigw_method.DependsOn = depends_on
+
+        return apigw_method
+
+    @property
+    def apigw_method_aws_object(self) -> apigateway.Method:
+        return self.get_aws_object("apigw_method")
+
+    def check_apigw_method_lbd_permission_scope(self):
+        # not set means the default method scope
+        if self.apigw_method_lbd_permission_scope is not NOTHING \
+                and self.apigw_method_lbd_permission_scope \
+                not in self.ApigwMethodLbdPermissionScope.Values():
+            raise ValueError(
+                "{}.apigw_method_lbd_permission_scope can only be one of {}". \
+                    format(self.identifier, self.ApigwMethodLbdPermissionScope.Values())
+            )
 
     def apigw_method_lbd_permission_aws_object_pre_check(self):
         self.apigw_method_aws_object_pre_check()
         self.lbd_func_aws_object_pre_check()
+        self.check_apigw_method_lbd_permission_scope()
 
     def apigw_method_lbd_permission_aws_object_ready(self):
-        return self.apigw_method_aws_object_ready() and self.lbd_func_aws_object_ready()
-
-    @property
-    def apigw_method_lbd_permission_aws_object(self) -> awslambda.Permission:
-        if self._apigw_method_lbd_permission_aws_object_cache is NOTHING:
-            apigw_method_lbd_permission_logic_id = "LbdPermission{}".format(self.apigw_method_logic_id)
-            apigw_method_lbd_permission = awslambda.Permission(
-                title=apigw_method_lbd_permission_logic_id,
+        return self.readiness["apigw_method_lbd_permission"]
+
+    def _build_apigw_method_lbd_permission_aws_object(self) -> awslambda.Permission:
+        # the monolith router function is invoked by every routed method, it
+        # has to use one permission, the resource policy size of a function
+        # is limited
+        self.check_apigw_method_lbd_permission_scope()
+        if self.apigw_method_lbd_permission_scope \
+                == self.ApigwMethodLbdPermissionScope.function \
+                or self._monolith_router_lbd_func is not NOTHING:
+            # one permission per lambda function, for any method of the rest api
+            return awslambda.Permission(
+                title="LbdPermissionApigw{}".format(self.lbd_func_logic_id),
                 Action="lambda:InvokeFunction",
-                FunctionName=GetAtt(self.lbd_func_aws_object, "Arn"),
+                FunctionName=self.lbd_func_invoke_arn,
                 Principal="apigateway.amazonaws.com",
                 SourceArn=Sub(
-                    "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*/%s/%s" % \
-                    (
-                        self.apigw_method_http_method,
-                        self.apigw_resource_full_path
-                    ),
+                    "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*",
                     {
                         "Region": {"Ref": "AWS::Region"},
                         "AccountId": {"Ref": "AWS::AccountId"},
@@ -751,12 +1119,38 @@ class LbdFuncConfig(BaseConfig):
                     }
                 ),
                 DependsOn=[
-                    self.apigw_method_aws_object,
                     self.lbd_func_aws_object,
                 ]
             )
-            self._apigw_method_lbd_permission_aws_object_cache = apigw_method_lbd_permission
-        return self._apigw_method_lbd_permission_aws_object_cache
+
+        apigw_method_lbd_permission_logic_id = "LbdPermission{}".format(self.apigw_method_logic_id)
+        apigw_method_lbd_permission = awslambda.Permission(
+            title=apigw_method_lbd_permission_logic_id,
+            Action="lambda:InvokeFunction",
+            FunctionName=self.lbd_func_invoke_arn,
+            Principal="apigateway.amazonaws.com",
+            SourceArn=Sub(
+                "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*/%s/%s" % \
+                (
+                    self.apigw_method_http_method,
+                    self.apigw_resource_full_path
+                ),
+                {
+                    "Region": {"Ref": "AWS::Region"},
+                    "AccountId": {"Ref": "AWS::AccountId"},
+                    "RestApiId": Ref(self.apigw_restapi),
+                }
+            ),
+            DependsOn=[
+                self.apigw_method_aws_object,
+                self.lbd_func_aws_object,
+            ]
+        )
+        return apigw_method_lbd_permission
+
+    @property
+    def apigw_method_lbd_permission_aws_object(self) -> awslambda.Permission:
+        return self.get_aws_object("apigw_method_lbd_permission")
 
     def apigw_method_options_for_cors_aws_object_pre_check(self):
         if self._py_function is NOTHING:
@@ -768,24 +1162,9 @@ class LbdFuncConfig(BaseConfig):
                              "LbdFuncConfig.apigw_restapi has to be specified")
 
     def apigw_method_options_for_cors_aws_object_ready(self):
-        if self.apigw_method_enable_cors_yes is not True:
-            return False
-        try:
-            self.apigw_method_options_for_cors_aws_object_pre_check()
-            return True
-        except:
-            return False
-
-    @property
-    def apigw_method_options_for_cors_aws_object(self) -> apigateway.Method:
-        """
-
-        **中文文档**
+        return self.readiness["apigw_method_options_for_cors"]
 
-        为了开启 Cors, 对于 Api Resource 是需要一个 Options Method 专门用于获取
-        服务器的设置. 这事因为浏览器在检查到跨站请求时, 会使用 Options 方法获取服务器的
-        跨站访问设置, 如果不满则, 浏览爱则会返回错误信息.
-        """
+    def _build_apigw_method_options_for_cors_aws_object(self) -> apigateway.Method:
         # For cors, options method doesn't need a lambda function
         depends_on = [
             self.apigw_resource_aws_object,
@@ -856,6 +1235,18 @@ class LbdFuncConfig(BaseConfig):
 
         return apigw_method
 
+    @property
+    def apigw_method_options_for_cors_aws_object(self) -> apigateway.Method:
+        """
+
+        **中文文档**
+
+        为了开启 Cors, 对于 Api Resource 是需要一个 Options Method 专门用于获取
+        服务器的设置. 这事因为浏览器在检查到跨站请求时, 会使用 Options 方法获取服务器的
+        跨站访问设置, 如果不满则, 浏览爱则会返回错误信息.
+        """
+        return self.get_aws_object("apigw_method_options_for_cors")
+
     # apigateway.Authorizer related
     @classmethod
     def get_authorizer_id(cls, rel_module_name):
@@ -887,45 +1278,50 @@ class LbdFuncConfig(BaseConfig):
             raise ValueError("to create a apigateway.Resource, "
                              "LbdFuncConfig.apigw_restapi has to be specified")
 
+    def _apigw_authorizer_aws_object_is_valid(self) -> bool:
+        return self._py_function is not NOTHING \
+               and self.apigw_restapi is not NOTHING
+
     def apigw_authorizer_aws_object_ready(self):
-        return self._ready_checker_shortener("apigw_authorizer")
+        return self.readiness["apigw_authorizer"]
 
-    @property
-    def apigw_authorizer_aws_object(self) -> apigateway.Authorizer:
-        if self._apigw_authorizer_aws_object_cache is NOTHING:
-            if self.apigw_authorizer_name is NOTHING:
-                apigw_authorizer_name = self.apigw_authorizer_logic_id
-            else:
-                apigw_authorizer_name = self.apigw_authorizer_name
+    def _build_apigw_authorizer_aws_object(self) -> apigateway.Authorizer:
+        if self.apigw_authorizer_name is NOTHING:
+            apigw_authorizer_name = self.apigw_authorizer_logic_id
+        else:
+            apigw_authorizer_name = self.apigw_authorizer_name
 
-            if len(set(apigw_authorizer_name).difference(set(string.ascii_letters + string.digits))):
-                raise ValueError(
-                    "{}.apigw_authorizer_name can only have letter and digits".format(
-                        self.identifier
-                    )
+        if len(set(apigw_authorizer_name).difference(set(string.ascii_letters + string.digits))):
+            raise ValueError(
+                "{}.apigw_authorizer_name can only have letter and digits".format(
+                    self.identifier
                 )
-            apigw_authorizer = apigateway.Authorizer(
-                title=self.apigw_authorizer_logic_id,
-                Name=apigw_authorizer_name,
-                RestApiId=Ref(self.apigw_restapi),
-                AuthType="custom",
-                Type="TOKEN",
-                IdentitySource="method.request.header.{}".format(self.apigw_authorizer_token_type_header_field),
-                AuthorizerResultTtlInSeconds=300,
-                AuthorizerUri=Sub(
-                    "arn:aws:apigateway:${Region}:lambda:path/2015-03-31/functions/${AuthorizerFunctionArn}/invocations",
-                    {
-                        "Region": {"Ref": "AWS::Region"},
-                        "AuthorizerFunctionArn": GetAtt(self.lbd_func_aws_object, "Arn"),
-                    }
-                ),
-                DependsOn=[
-                    self.lbd_func_aws_object,
-                    self.apigw_restapi,
-                ]
             )
-            self._apigw_authorizer_aws_object_cache = apigw_authorizer
-        return self._apigw_authorizer_aws_object_cache
+        apigw_authorizer = apigateway.Authorizer(
+            title=self.apigw_authorizer_logic_id,
+            Name=apigw_authorizer_name,
+            RestApiId=Ref(self.apigw_restapi),
+            AuthType="custom",
+            Type="TOKEN",
+            IdentitySource="method.request.header.{}".format(self.apigw_authorizer_token_type_header_field),
+            AuthorizerResultTtlInSeconds=300,
+            AuthorizerUri=Sub(
+                "arn:aws:apigateway:${Region}:lambda:path/2015-03-31/functions/${AuthorizerFunctionArn}/invocations",
+                {
+                    "Region": {"Ref": "AWS::Region"},
+                    "AuthorizerFunctionArn": self.lbd_func_invoke_arn,
+                }
+            ),
+            DependsOn=[
+                self.lbd_func_aws_object,
+                self.apigw_restapi,
+            ]
+        )
+        return apigw_authorizer
+
+    @property
+    def apigw_authorizer_aws_object(self) -> apigateway.Authorizer:
+        return self.get_aws_object("apigw_authorizer")
 
     def apigw_authorizer_lbd_permission_aws_object_pre_check(self):
         """
@@ -937,33 +1333,34 @@ class LbdFuncConfig(BaseConfig):
         self.apigw_authorizer_aws_object_pre_check()
 
     def apigw_authorizer_lbd_permission_aws_object_ready(self):
-        return self.apigw_authorizer_aws_object_ready() and self.lbd_func_aws_object_ready()
+        return self.readiness["apigw_authorizer_lbd_permission"]
+
+    def _build_apigw_authorizer_lbd_permission_aws_object(self) -> awslambda.Permission:
+        apigw_authorizer_lbd_permission_logic_id = "LbdPermission{}".format(self.apigw_authorizer_logic_id)
+        apigw_authorizer_lbd_permission = awslambda.Permission(
+            title=apigw_authorizer_lbd_permission_logic_id,
+            Action="lambda:InvokeFunction",
+            FunctionName=self.lbd_func_invoke_arn,
+            Principal="apigateway.amazonaws.com",
+            SourceArn=Sub(
+                "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/authorizers/${AuthorizerId}",
+                {
+                    "Region": {"Ref": "AWS::Region"},
+                    "AccountId": {"Ref": "AWS::AccountId"},
+                    "RestApiId": Ref(self.apigw_restapi),
+                    "AuthorizerId": Ref(self.apigw_authorizer_aws_object),
+                }
+            ),
+            DependsOn=[
+                self.apigw_authorizer_aws_object,
+                self.lbd_func_aws_object,
+            ]
+        )
+        return apigw_authorizer_lbd_permission
 
     @property
     def apigw_authorizer_lbd_permission_aws_object(self) -> awslambda.Permission:
-        if self._apigw_authorizer_lbd_permission_aws_object_cache is NOTHING:
-            apigw_authorizer_lbd_permission_logic_id = "LbdPermission{}".format(self.apigw_authorizer_logic_id)
-            apigw_authorizer_lbd_permission = awslambda.Permission(
-                title=apigw_authorizer_lbd_permission_logic_id,
-                Action="lambda:InvokeFunction",
-                FunctionName=GetAtt(self.lbd_func_aws_object, "Arn"),
-                Principal="apigateway.amazonaws.com",
-                SourceArn=Sub(
-                    "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/authorizers/${AuthorizerId}",
-                    {
-                        "Region": {"Ref": "AWS::Region"},
-                        "AccountId": {"Ref": "AWS::AccountId"},
-                        "RestApiId": Ref(self.apigw_restapi),
-                        "AuthorizerId": Ref(self.apigw_authorizer_aws_object),
-                    }
-                ),
-                DependsOn=[
-                    self.apigw_authorizer_aws_object,
-                    self.lbd_func_aws_object,
-                ]
-            )
-            self._apigw_authorizer_lbd_permission_aws_object_cache = apigw_authorizer_lbd_permission
-        return self._apigw_authorizer_lbd_permission_aws_object_cache
+        return self.get_aws_object("apigw_authorizer_lbd_permission")
 
     # --- Cloudwatch Event ---
     @property
@@ -996,8 +1393,63 @@ class LbdFuncConfig(BaseConfig):
         if self.scheduled_job_expression is NOTHING:
             raise ValueError("scheduled_job_expression is not defined yet!")
 
+    def _scheduled_job_event_rule_aws_objects_is_valid(self) -> bool:
+        return self.scheduled_job_expression is not NOTHING
+
     def scheduled_job_event_rule_aws_objects_ready(self):
-        return self._ready_checker_shortener("scheduled_job_event_rule")
+        return self.readiness["scheduled_job_event_rule"]
+
+    def _build_scheduled_job_event_rule_aws_objects(self) -> typing.Dict[str, events.Rule]:
+        dct = dict()
+        groups = self._scheduled_job_event_rule_groups
+        for expression in self.scheduled_job_expression_list:
+            if (groups is not NOTHING) and (expression in groups):
+                dct[expression] = self._build_shared_scheduled_job_event_rule(
+                    expression, groups[expression])
+                continue
+            event_rule_logic_id = "EventRule{}".format(
+                fingerprint.of_text(expression + self.lbd_func_name)
+            )
+            event_rule = events.Rule(
+                title=event_rule_logic_id,
+                State="ENABLED",
+                ScheduleExpression=expression,
+                Targets=[
+                    events.Target(
+                        Id=get_event_target_id(self.lbd_func_logic_id),
+                        Arn=self.lbd_func_invoke_arn,
+                    )
+                ],
+                DependsOn=[
+                    self.lbd_func_aws_object,
+                ]
+            )
+            dct[expression] = event_rule
+        return dct
+
+    def _build_shared_scheduled_job_event_rule(self,
+                                               expression: str,
+                                               group: EventRuleGroup) -> events.Rule:
+        """
+        Every function of the group builds the same rule, it only refers
+        the functions by logical id, so the duplicates are equal.
+        """
+        return events.Rule(
+            title=group.logic_id,
+            State="ENABLED",
+            ScheduleExpression=expression,
+            Targets=[
+                events.Target(
+                    Id=target.id,
+                    Arn=target.arn,
+                )
+                for target in group.targets
+            ],
+            DependsOn=[
+                target.invoked_logic_id
+                for target in group.targets
+            ],
+        )
 
     @property
     def scheduled_job_event_rule_aws_objects(self) -> typing.Dict[str, events.Rule]:
@@ -1005,127 +1457,177 @@ class LbdFuncConfig(BaseConfig):
         Returns a key value pair of scheduled job expression and
         ``troposphere_mate.events.Rule`` object. Since
         """
-        if self._scheduled_job_event_rule_aws_objects_cache is NOTHING:
-            dct = dict()
-            for expression in self.scheduled_job_expression_list:
-                event_rule_logic_id = "EventRule{}".format(
-                    fingerprint.of_text(expression + self.lbd_func_name)
-                )
-                event_rule = events.Rule(
-                    title=event_rule_logic_id,
-                    State="ENABLED",
-                    ScheduleExpression=expression,
-                    Targets=[
-                        events.Target(
-                            Id="EventRuleStartCrawlerGitHubDataTrigger",
-                            Arn=GetAtt(self.lbd_func_aws_object, "Arn"),
-                        )
-                    ],
-                    DependsOn=[
-                        self.lbd_func_aws_object,
-                    ]
-                )
-                dct[expression] = event_rule
-            self._scheduled_job_event_rule_aws_objects_cache = dct
-        return self._scheduled_job_event_rule_aws_objects_cache
+        return self.get_aws_object("scheduled_job_event_rule")
 
     def scheduled_job_event_lbd_permission_aws_objects_pre_check(self):
         self.scheduled_job_event_rule_aws_objects_pre_check()
         self.lbd_func_aws_object_pre_check()
 
     def scheduled_job_event_lbd_permission_aws_objects_ready(self):
-        return self.scheduled_job_event_rule_aws_objects_ready() and self.lbd_func_aws_object_ready()
+        return self.readiness["scheduled_job_event_lbd_permission"]
+
+    def _build_scheduled_job_event_lbd_permission_aws_objects(self) -> typing.Dict[str, awslambda.Permission]:
+        dct = dict()
+        for expression in self.scheduled_job_expression_list:
+            event_rule_lambda_permission_logic_id = "LbdPermissionEventRule{}".format(
+                fingerprint.of_text(expression + self.lbd_func_name)
+            )
+            event_rule = self.scheduled_job_event_rule_aws_objects[expression]
+            event_rule_lambda_permission = awslambda.Permission(
+                title=event_rule_lambda_permission_logic_id,
+                Action="lambda:InvokeFunction",
+                FunctionName=self.lbd_func_invoke_arn,
+                Principal="events.amazonaws.com",
+                SourceArn=GetAtt(event_rule, "Arn"),
+                DependsOn=[
+                    event_rule,
+                    self.lbd_func_aws_object,
+                ]
+            )
+            dct[expression] = event_rule_lambda_permission
+        return dct
 
     @property
     def scheduled_job_event_lbd_permission_aws_objects(self) -> typing.Dict[str, awslambda.Permission]:
-        if self._scheduled_job_event_lbd_permission_aws_objects_cache is NOTHING:
-            dct = dict()
-            for expression in self.scheduled_job_expression_list:
-                event_rule_lambda_permission_logic_id = "LbdPermissionEventRule{}".format(
-                    fingerprint.of_text(expression + self.lbd_func_name)
-                )
-                event_rule = self.scheduled_job_event_rule_aws_objects[expression]
-                event_rule_lambda_permission = awslambda.Permission(
-                    title=event_rule_lambda_permission_logic_id,
-                    Action="lambda:InvokeFunction",
-                    FunctionName=GetAtt(self.lbd_func_aws_object, "Arn"),
-                    Principal="events.amazonaws.com",
-                    SourceArn=GetAtt(event_rule, "Arn"),
-                    DependsOn=[
-                        event_rule,
-                        self.lbd_func_aws_object,
-                    ]
-                )
-                dct[expression] = event_rule_lambda_permission
-            self._scheduled_job_event_lbd_permission_aws_objects_cache = dct
-        return self._scheduled_job_event_lbd_permission_aws_objects_cache
-
-    def create_aws_resource(self, template):
-        self.create_lbd_func(template)
-        self.create_apigw_resource(template)
-        self.create_apigw_method(template)
-        self.create_apigw_method_options_for_cors(template)
-        self.create_apigw_authorizer(template)
-        self.create_scheduled_job_event(template)
-        self.create_s3_event_bucket(template)
+        return self.get_aws_object("scheduled_job_event_lbd_permission")
+
+    # --- Keep Warm ---
+    def keep_warm_event_rule_aws_objects_pre_check(self):
+        self.lbd_func_aws_object_pre_check()
+        if not isinstance(self.keep_warm_expression, str):
+            raise TypeError(
+                "{}.keep_warm_expression has to be a string!".format(self.identifier))
+        if not (isinstance(self.keep_warm_concurrency, int)
+                and self.keep_warm_concurrency >= 1):
+            raise ValueError(
+                "{}.keep_warm_concurrency has to be a positive integer!".format(self.identifier))
+
+    def _keep_warm_event_rule_aws_objects_is_valid(self) -> bool:
+        return isinstance(self.keep_warm_expression, str) \
+               and isinstance(self.keep_warm_concurrency, int) \
+               and self.keep_warm_concurrency >= 1
+
+    def keep_warm_event_rule_aws_objects_ready(self):
+        return self.readiness["keep_warm_event_rule"]
+
+    def _build_keep_warm_event_rule_aws_objects(self) -> typing.Dict[int, events.Rule]:
+        """
+        One target per ping, at most 5 targets per rule, the rules are keyed
+        by their number, starting from 1.
+        """
+        dct = dict()
+        concurrency = self.keep_warm_concurrency
+        for start in range(0, concurrency, MAX_TARGETS_PER_RULE):
+            nth = start // MAX_TARGETS_PER_RULE + 1
+            event_rule = events.Rule(
+                title="{}KeepWarm{}".format(self.lbd_func_logic_id, nth),
+                State="ENABLED",
+                ScheduleExpression=self.keep_warm_expression,
+                Targets=[
+                    events.Target(
+                        Id="KeepWarm{}".format(index),
+                        Arn=self.lbd_func_invoke_arn,
+                        Input=get_keep_warm_input(index, concurrency),
+                    )
+                    for index in range(
+                        start + 1, min(start + MAX_TARGETS_PER_RULE, concurrency) + 1)
+                ],
+                DependsOn=[
+                    self.lbd_func_aws_object,
+                ]
+            )
+            dct[nth] = event_rule
+        return dct
+
+    @property
+    def keep_warm_event_rule_aws_objects(self) -> typing.Dict[int, events.Rule]:
+        return self.get_aws_object("keep_warm_event_rule")
+
+    def keep_warm_event_lbd_permission_aws_objects_ready(self):
+        return self.readiness["keep_warm_event_lbd_permission"]
+
+    def _build_keep_warm_event_lbd_permission_aws_objects(self) -> typing.Dict[int, awslambda.Permission]:
+        dct = dict()
+        for nth, event_rule in self.keep_warm_event_rule_aws_objects.items():
+            dct[nth] = awslambda.Permission(
+                title="LbdPermission{}".format(event_rule.title),
+                Action="lambda:InvokeFunction",
+                FunctionName=self.lbd_func_invoke_arn,
+                Principal="events.amazonaws.com",
+                SourceArn=GetAtt(event_rule, "Arn"),
+                DependsOn=[
+                    event_rule,
+                    self.lbd_func_aws_object,
+                ]
+            )
+        return dct
+
+    @property
+    def keep_warm_event_lbd_permission_aws_objects(self) -> typing.Dict[int, awslambda.Permission]:
+        return self.get_aws_object("keep_warm_event_lbd_permission")
 
     def create_lbd_func(self, template: Template):
-        if self.lbd_func_aws_object_ready():
-            template.add_resource(self.lbd_func_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "lbd_func")
+
+    def create_lbd_alias(self, template: Template):
+        self.add_aws_object(template, "lbd_version")
+        self.add_aws_object(template, "lbd_alias")
+        self.add_aws_object(template, "lbd_alias_scalable_target")
 
     def create_apigw_resource(self, template: Template):
-        if self.apigw_resource_aws_object_ready():
-            template.add_resource(self.apigw_resource_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "apigw_resource")
 
     def create_apigw_method(self, template: Template):
-        if self.apigw_method_aws_object_ready():
-            template.add_resource(self.apigw_method_aws_object, ignore_duplicate=True)
-        if self.apigw_method_lbd_permission_aws_object_ready():
-            template.add_resource(self.apigw_method_lbd_permission_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "apigw_method")
+        self.add_aws_object(template, "apigw_method_lbd_permission")
 
     def create_apigw_method_options_for_cors(self, template: Template):
-        if self.apigw_method_options_for_cors_aws_object_ready():
-            template.add_resource(self.apigw_method_options_for_cors_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "apigw_method_options_for_cors")
 
     def create_apigw_authorizer(self, template: Template):
-        if self.apigw_authorizer_aws_object_ready():
-            template.add_resource(self.apigw_authorizer_aws_object, ignore_duplicate=True)
-        if self.apigw_authorizer_lbd_permission_aws_object_ready():
-            template.add_resource(self.apigw_authorizer_lbd_permission_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "apigw_authorizer")
+        self.add_aws_object(template, "apigw_authorizer_lbd_permission")
 
     def create_scheduled_job_event(self, template: Template):
-        if self.scheduled_job_event_rule_aws_objects_ready():
-            for _, value in self.scheduled_job_event_rule_aws_objects.items():
-                template.add_resource(value, ignore_duplicate=True)
-        if self.scheduled_job_event_lbd_permission_aws_objects_ready():
-            for _, value in self.scheduled_job_event_lbd_permission_aws_objects.items():
-                template.add_resource(value, ignore_duplicate=True)
+        self.add_aws_object(template, "scheduled_job_event_rule")
+        self.add_aws_object(template, "scheduled_job_event_lbd_permission")
+
+    def create_keep_warm_event(self, template: Template):
+        self.add_aws_object(template, "keep_warm_event_rule")
+        self.add_aws_object(template, "keep_warm_event_lbd_permission")
 
     def create_s3_event_bucket(self, template: Template):
-        if self.s3_event_bucket_aws_object_ready():
-            template.add_resource(self.s3_event_bucket_aws_object, ignore_duplicate=True)
-        if self.s3_event_bucket_lbd_permission_aws_object_ready():
-            template.add_resource(self.s3_event_bucket_lbd_permission_aws_object, ignore_duplicate=True)
+        self.add_aws_object(template, "s3_event_bucket")
+        self.add_aws_object(template, "s3_event_bucket_lbd_permission")
 
 
 def lbd_func_config_value_handler(module_name: str,
                                   config_field: str,
                                   config_class: typing.Type[LbdFuncConfig],
                                   valid_func_name_list: typing.List[str],
-                                  default_lbd_handler_name: str):
+                                  default_lbd_handler_name: str,
+                                  static: bool = False,
+                                  handler_index: HandlerIndex = None):
     root_module_name = module_name
-    for py_current_module, py_parent_module, py_handler_func in walk_lbd_handler(
-            module_name, valid_func_name_list):
-        # print(py_current_module.__name__)
+    if handler_index is None:
+        handler_index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+        )
+
+    for node in handler_index.nodes:
+        py_current_module = node.py_module
+        py_parent_module = node.py_parent_module
 
         current_module_config = getattr(py_current_module, config_field)  # type: LbdFuncConfig
         current_module_config._root_module_name = root_module_name
         current_module_config._py_module = py_current_module
         current_module_config._py_parent_module = py_parent_module
 
-        # print(py_current_module.__name__, py_parent_module.__name__, py_handler_func.__name__)
-
-        if py_handler_func is not None:
+        for py_handler_func in node.py_handler_funcs:
             py_handler_func_config = getattr(py_handler_func, config_field)  # type: LbdFuncConfig
             py_handler_func_config._root_module_name = root_module_name
             py_handler_func_config._py_module = py_current_module
@@ -1136,19 +1638,111 @@ def lbd_func_config_value_handler(module_name: str,
                     slugify(py_handler_func_config.rel_module_name.replace(".", "-")) + "-" + slugify(
                         py_handler_func.__name__)
 
+    assign_event_rule_groups(handler_index, config_field)
+
 
 def template_creation_handler(module_name: str,
                               config_field: str,
                               config_class: typing.Type[LbdFuncConfig],
                               valid_func_name_list: typing.List[str],
-                              template: Template):
-    for py_current_module, py_parent_module, py_handler_func in walk_lbd_handler(
-            module_name, valid_func_name_list):
-        current_module_config = getattr(py_current_module, config_field)  # type: LbdFuncConfig
-        print("create aws resource for {}".format(current_module_config.identifier))
-        current_module_config.create_aws_resource(template)
+                              template: Template,
+                              static: bool = False,
+                              handler_index: HandlerIndex = None,
+                              builder_timer: BuilderTimer = None,
+                              fragment_cache_path: str = None,
+                              shard: bool = False,
+                              monolith_router: MonolithRouter = None) -> typing.Union[ShardedTemplate, None]:
+    """
+    :param builder_timer: if given, record the time spent in each resource
+        builder, see :class:`~lbdrabbit.lbd_func_config.builder.BuilderTimer`.
+    :param fragment_cache_path: if given, use the on disk fragment cache at
+        this path, only the configs whose module source or resolved config
+        values changed are built again, see
+        :mod:`~lbdrabbit.lbd_func_config.fragment_cache`.
+    :param shard: if True, split the template into nested stacks by handler
+        sub package when it exceeds the CloudFormation limits, and return
+        the :class:`~lbdrabbit.lbd_func_config.shard.ShardedTemplate`. The
+        ``template`` still has all aws objects.
+    :param monolith_router: if given, the routed api gateway handlers
+        share the router function, see
+        :class:`~lbdrabbit.lbd_func_config.monolith.MonolithRouter`.
+    """
+    if handler_index is None:
+        handler_index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+        )
+    if monolith_router is not None:
+        monolith_router.apply()
+
+    if fragment_cache_path is not None:
+        fragment_cache = FragmentCache(
+            path=fragment_cache_path,
+            module_name=module_name,
+            config_class=config_class,
+        )
+        fragment_cache.create_template(
+            handler_index.iter_configs(config_field), template,
+            timer=builder_timer,
+        )
+    else:
+        for config in handler_index.iter_configs(config_field):  # type: LbdFuncConfig
+            print("create aws resource for {}".format(config.identifier))
+            config.create_aws_resource(template, timer=builder_timer)
+
+    if shard:
+        return shard_template(template.to_dict(), handler_index, config_field)
+
+
+def build_template(module_name: str,
+                   config_field: str,
+                   config_class: typing.Type[LbdFuncConfig],
+                   valid_func_name_list: typing.List[str],
+                   default_lbd_handler_name: str,
+                   template: Template,
+                   static: bool = False,
+                   handler_index: HandlerIndex = None,
+                   lazy: bool = False,
+                   builder_timer: BuilderTimer = None,
+                   fragment_cache_path: str = None) -> HandlerIndex:
+    """
+    Run the inherit, derive and template phases over a single handler index.
 
-        if py_handler_func is not None:
-            py_handler_func_config = getattr(py_handler_func, config_field)  # type: LbdFuncConfig
-            print("create aws resource for {}".format(py_handler_func_config.identifier))
-            py_handler_func_config.create_aws_resource(template)
+    :param handler_index: reuse an existing handler index, for example the
+        return of :func:`~lbdrabbit.lbd_func_config.index.get_handler_index`.
+        If not given, walk the handler tree once and build one.
+    :param lazy: see :func:`~lbdrabbit.lbd_func_config.base.config_inherit_handler`
+    :param builder_timer: see :func:`template_creation_handler`
+    :param fragment_cache_path: see :func:`template_creation_handler`
+
+    :return: the handler index been used, can be reused by the next build.
+
+    **中文文档**
+
+    只遍历一次 handler 模块树, 然后依次完成 继承, 推导, 生成模板 三个步骤.
+    """
+    if handler_index is None:
+        handler_index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+        )
+    kwargs = dict(
+        module_name=module_name,
+        config_field=config_field,
+        config_class=config_class,
+        valid_func_name_list=valid_func_name_list,
+        handler_index=handler_index,
+    )
+    config_inherit_handler(lazy=lazy, **kwargs)
+    lbd_func_config_value_handler(
+        default_lbd_handler_name=default_lbd_handler_name, **kwargs)
+    template_creation_handler(
+        template=template, builder_timer=builder_timer,
+        fragment_cache_path=fragment_cache_path, **kwargs)
+    return handler_index
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+
+"""
+Monolith router mode.
+
+Instead of one ``awslambda.Function`` per api gateway handler, all the api
+gateway methods invoke a single router function. The router handler is a
+generated, standalone python module (it doesn't import ``lbdrabbit``), with
+a route trie precomputed from the handler index. It dispatches the event by
+resource path and http method to the original handler function, handler
+modules are imported on first use and stay warm in the container. The
+router answers the keep warm pings (see :mod:`lbdrabbit.keep_warm`) itself.
+
+A handler is routed if it is only invoked by api gateway methods. Custom
+authorizers, scheduled jobs and s3 event handlers receive different events,
+they keep their own function. A handler overriding the lambda settings of
+the root module config (memory size, timeout, environment variables, ...),
+the alias or the keep warm settings also keeps its own function, the router would silently ignore them.
+
+The integration request template passes the resource path, the http method
+and the original body to the router, the handler still receives the body
+as the event. The router function uses the lambda settings of the root
+module config, and one ``awslambda.Permission`` for the whole RestApi.
+
+Example::
+
+    >>> router = MonolithRouter.build(
+    ...     handler_index, config_field, "my_project.router")
+    >>> router.write()  # writes my_project/router.py
+    >>> template_creation_handler(..., monolith_router=router)
+
+**中文文档**
+
+单体路由模式. 所有由 api gateway 调用的 handler 共用一个 Lambda 函数, 由生成的
+路由模块根据预先计算的路径前缀树分发请求到原来的 handler 函数. 共用的热容器
+大幅减少冷启动, 模板也会小很多. 鉴权函数, 定时任务, s3 事件处理函数仍然使用
+独立的 Lambda 函数.
+"""
+
+import os
+import pprint
+import typing
+import attr
+from collections import OrderedDict
+from importlib import import_module
+from troposphere_mate import awslambda
+
+from .base import NOTHING
+from ..keep_warm import KEEP_WARM_EVENT_KEY
+from .index import HandlerIndex
+
+#: logical id of the router lambda function
+ROUTER_LBD_FUNC_LOGIC_ID = "LbdFuncRouter"
+
+DEFAULT_ROUTER_LBD_FUNC_NAME = "router"
+
+#: integration request template of a routed api gateway method
+ROUTER_REQUEST_TEMPLATE = (
+    '{'
+    '"resource_path": "$context.resourcePath", '
+    '"http_method": "$context.httpMethod", '
+    '"body": $input.json(\'$\')'
+    '}'
+)
+
+ROUTER_MODULE_TEMPLATE = '''# -*- coding: utf-8 -*-
+
+"""
+Lambda router generated by lbdrabbit, don't edit.
+"""
+
+import time
+from importlib import import_module
+
+ROUTE_TRIE = {route_trie}
+
+KEEP_WARM_EVENT_KEY = {keep_warm_event_key!r}
+
+_handlers = dict()
+
+
+def find_route(resource_path, http_method):
+    node = ROUTE_TRIE
+    try:
+        for part in resource_path.split("/"):
+            if part:
+                node = node["children"][part]
+        return node["methods"][http_method]
+    except KeyError:
+        raise ValueError("no route for {{}} {{}}".format(http_method, resource_path))
+
+
+def get_handler(target):
+    try:
+        return _handlers[target]
+    except KeyError:
+        module_name, func_name = target.split(":")
+        func = getattr(import_module(module_name), func_name)
+        _handlers[target] = func
+        return func
+
+
+def handler(event, context):
+    if KEEP_WARM_EVENT_KEY in event:
+        ping = event[KEEP_WARM_EVENT_KEY]
+        if ping.get("delay_ms"):
+            time.sleep(ping["delay_ms"] / 1000.0)
+        return {{KEEP_WARM_EVENT_KEY: ping}}
+    target = find_route(event["resource_path"], event["http_method"])
+    return get_handler(target)(event["body"], context)
+'''
+
+
+#: ``lbd_func_*`` fields not used by the router function
+#: the router function, its alias and keep warm rule are built from the
+#: root config, a routed handler has to have the same settings.
+ROUTER_LBD_FUNC_FIELD_PREFIXES = (
+    "lbd_func_",
+    "lbd_alias_",
+    "keep_warm_",
+)
+
+ROUTER_IGNORED_LBD_FUNC_FIELDS = (
+    "lbd_func_yes",
+    "lbd_func_name",
+    "lbd_func_description",
+)
+
+
+def _same_value(value, other_value) -> bool:
+    if value is other_value:
+        return True
+    try:
+        if value == other_value:
+            return True
+    except Exception:  # pragma: no cover
+        return False
+    # troposphere objects don't compare by value
+    if hasattr(value, "to_dict") and hasattr(other_value, "to_dict"):
+        try:
+            return value.to_dict() == other_value.to_dict()
+        except Exception:
+            return False
+    return False
+
+
+def get_lbd_func_fields(config_class: type) -> typing.List[str]:
+    """
+    ``lbd_func_*``, ``lbd_alias_*`` and ``keep_warm_*`` fields the router
+    function takes from the root config.
+    """
+    return [
+        field.name
+        for field in attr.fields(config_class)
+        if field.name.startswith(ROUTER_LBD_FUNC_FIELD_PREFIXES)
+           and field.name not in ROUTER_IGNORED_LBD_FUNC_FIELDS
+    ]
+
+
+def is_routable(config, root_config=None) -> bool:
+    """
+    A handler is routed if it is only invoked by api gateway methods, and it
+    has the same ``lbd_func_*``, ``lbd_alias_*`` and ``keep_warm_*``
+    settings as the root config, if given.
+    """
+    if not config.is_function():
+        return False
+    readiness = config.readiness
+    if not (readiness["lbd_func"]
+            and readiness["apigw_method"]
+            and not readiness["apigw_authorizer"]
+            and not readiness["scheduled_job_event_rule"]
+            and not readiness["s3_event_bucket"]):
+        return False
+    if root_config is not None:
+        for field_name in get_lbd_func_fields(config.__class__):
+            if not _same_value(getattr(config, field_name),
+                               getattr(root_config, field_name)):
+                return False
+    return True
+
+
+def build_route_trie(routes: typing.Dict[typing.Tuple[str, str], str]) -> dict:
+    """
+    :param routes: (resource path, http method) -> ``"module:function"``
+
+    :return: ``{"children": {path part: node}, "methods": {http method: target}}``
+    """
+    trie = {"children": dict(), "methods": dict()}
+    for (resource_path, http_method), target in routes.items():
+        node = trie
+        for part in resource_path.split("/"):
+            if part:
+                node = node["children"].setdefault(
+                    part, {"children": dict(), "methods": dict()})
+        node["methods"][http_method] = target
+    return trie
+
+
+@attr.s
+class MonolithRouter(object):
+    """
+    :param module_name: full name of the generated router module.
+    :param lbd_func_aws_object: the router lambda function
+    :param routes: (resource path, http method) -> ``"module:function"``
+    :param configs: configs of the routed handlers
+    """
+    module_name = attr.ib()  # type: str
+    lbd_func_aws_object = attr.ib()  # type: awslambda.Function
+    routes = attr.ib()  # type: typing.Dict[typing.Tuple[str, str], str]
+    configs = attr.ib(repr=False)  # type: list
+
+    @classmethod
+    def build(cls,
+              handler_index: HandlerIndex,
+              config_field: str,
+              module_name: str,
+              lbd_func_name: str = DEFAULT_ROUTER_LBD_FUNC_NAME) -> 'MonolithRouter':
+        """
+        Collect the routes from the handler index, run it after the derive
+        phase. The handlers whose lambda, alias or keep warm settings differ
+        from the root config are not routed, see :func:`is_routable`.
+
+        :raises ValueError: if two handlers have the same path and method.
+        """
+        root_config = getattr(handler_index.nodes[0].py_module, config_field)
+        routes = OrderedDict()
+        configs = list()
+        for config in handler_index.iter_configs(config_field):
+            if not is_routable(config, root_config):
+                continue
+            key = ("/" + config.apigw_resource_full_path, config.apigw_method_http_method)
+            target = "{}:{}".format(config._py_module.__name__, config._py_function.__name__)
+            if key in routes:
+                raise ValueError("{} {} is routed to both {} and {}".format(
+                    key[1], key[0], routes[key], target))
+            routes[key] = target
+            configs.append(config)
+        lbd_func = root_config._new_lbd_func_aws_object(
+            logic_id=ROUTER_LBD_FUNC_LOGIC_ID,
+            lbd_func_name=lbd_func_name,
+            handler="{}.handler".format(module_name),
+        )
+        return cls(
+            module_name=module_name,
+            lbd_func_aws_object=lbd_func,
+            routes=routes,
+            configs=configs,
+        )
+
+    @property
+    def trie(self) -> dict:
+        return build_route_trie(self.routes)
+
+    def apply(self):
+        """
+        Point the routed configs to the router function.
+        """
+        for config in self.configs:
+            config._monolith_router_lbd_func = self.lbd_func_aws_object
+
+    def reset(self):
+        """
+        Undo :meth:`apply`, each routed config builds its own function again.
+        """
+        for config in self.configs:
+            config._monolith_router_lbd_func = NOTHING
+
+    def render(self) -> str:
+        """
+        Source code of the router module.
+        """
+        return ROUTER_MODULE_TEMPLATE.format(
+            route_trie=pprint.pformat(self.trie),
+            keep_warm_event_key=KEEP_WARM_EVENT_KEY,
+        )
+
+    def get_path(self) -> str:
+        """
+        Where the router module should be, next to its parent package.
+        """
+        if "." in self.module_name:
+            parent_name, basename = self.module_name.rsplit(".", 1)
+            dir_path = os.path.dirname(import_module(parent_name).__file__)
+        else:
+            basename = self.module_name
+            dir_path = os.getcwd()
+        return os.path.join(dir_path, basename + ".py")
+
+    def write(self, path: str = None) -> str:
+        """
+        Write the router module, only if the source changed.
+
+        :return: path of the router module
+        """
+        if path is None:
+            path = self.get_path()
+        content = self.render()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                if f.read().decode("utf-8") == content:
+                    return path
+        with open(path, "wb") as f:
+            f.write(content.encode("utf-8"))
+        return path
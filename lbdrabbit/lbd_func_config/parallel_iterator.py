@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parallel handler discovery, import handler modules in a process pool.
+
+When static discovery is not possible, importing thousands of handler
+modules one by one is CPU bound. :func:`walk_lbd_handler_parallel` imports
+the root package in the main process, and each top level sub package (or
+sub module) in a worker process. A worker sends back a picklable
+description of every module it visited, the handler function names and the
+config field values:
+
+- a module level object outside of the worker's sub tree (for example
+  ``cf.rest_api``, a shared boto3 session) is sent as a reference
+  ``(module name, attribute name)``, the main process resolves the reference
+  and reuses the very same object.
+- literal, list, dict and Sentinel values are sent as is.
+- other troposphere ``AWSObject`` / ``Parameter`` / ``Output`` and
+  ``AWSProperty`` are rebuilt from its properties, a
+  ``AWSHelperFn`` (``Ref``, ``GetAtt``, ``Sub``, ...) from its attributes.
+- an ``attrs`` object (the config object itself, ``S3EventLambdaConfig``)
+  is rebuilt from its public fields.
+
+The main process merges the descriptions into stand in modules, like
+:mod:`~lbdrabbit.lbd_func_config.static_iterator` does.
+
+**中文文档**
+
+使用多进程并行 import handler 模块. 每个顶层子包在一个子进程中 import, 子进程
+只返回可以 pickle 的 handler 函数名以及 config 的值的描述, 主进程再根据描述
+重建模块树. 共享的 troposphere 对象按照 (模块名, 变量名) 引用, 保证主进程中
+使用的是同一个对象.
+"""
+
+import sys
+import types
+import typing
+import attr
+from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor
+from picage import Package
+from troposphere import BaseAWSObject, AWSProperty, AWSHelperFn
+from troposphere_mate.core.sentiel import Sentinel
+
+from .iterator import ModuleFilter, walk_module_tree, walk_lbd_handler
+from .static_iterator import _make_stand_in_function
+
+
+_literal_types = (str, bytes, int, float, bool, type(None), Sentinel)
+
+
+def _class_path(klass: type) -> typing.Tuple[str, str]:
+    return klass.__module__, klass.__qualname__
+
+
+def _load_class(class_path: typing.Tuple[str, str]) -> type:
+    module_name, qualname = class_path
+    obj = import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class ValueEncoder(object):
+    """
+    Encode config values in a worker process into picklable descriptions.
+
+    :param sub_tree_name: name of the sub tree imported by this worker,
+        module level objects defined in the sub tree can't be referenced.
+    """
+
+    def __init__(self, sub_tree_name: str):
+        self.sub_tree_name = sub_tree_name
+        self._locations = None  # type: typing.Dict[int, typing.Tuple[str, str]]
+
+    def _in_sub_tree(self, module_name: str) -> bool:
+        return module_name == self.sub_tree_name \
+               or module_name.startswith(self.sub_tree_name + ".")
+
+    def locate(self, obj) -> typing.Union[typing.Tuple[str, str], None]:
+        """
+        Find the ``(module name, attribute name)`` of a module level
+        object, outside of the worker's sub tree.
+        """
+        if self._locations is None:
+            self._locations = dict()
+            for module_name, module in list(sys.modules.items()):
+                if module is None or self._in_sub_tree(module_name):
+                    continue
+                for key, value in list(getattr(module, "__dict__", {}).items()):
+                    if not isinstance(value, _literal_types):
+                        self._locations.setdefault(id(value), (module_name, key))
+        return self._locations.get(id(obj))
+
+    def encode(self, value):
+        if not isinstance(value, _literal_types):
+            # shared module level object, for example ``cf.rest_api``
+            location = self.locate(value)
+            if location is not None:
+                return ("ref", location)
+        if isinstance(value, AWSProperty):
+            return ("prop", _class_path(value.__class__),
+                    self.encode(value.properties))
+        if isinstance(value, BaseAWSObject):
+            kwargs = dict(value.properties)
+            for key in value.attributes:
+                if key in value.resource:
+                    kwargs[key] = value.resource[key]
+            return ("obj", _class_path(value.__class__),
+                    value.title, self.encode(kwargs))
+        if isinstance(value, AWSHelperFn):
+            return ("fn", _class_path(value.__class__),
+                    self.encode(dict(value.__dict__)))
+        if attr.has(value.__class__):
+            return ("attrs", _class_path(value.__class__), {
+                field.name: self.encode(getattr(value, field.name))
+                for field in attr.fields(value.__class__)
+                # private fields of a config object are derived by the
+                # build phases, they are not part of the declaration
+                if not field.name.startswith("_")
+            })
+        if isinstance(value, list):
+            return ("list", [self.encode(v) for v in value])
+        if isinstance(value, tuple):
+            return ("tuple", [self.encode(v) for v in value])
+        if isinstance(value, dict):
+            return ("dict", [(k, self.encode(v)) for k, v in value.items()])
+        return ("raw", value)
+
+
+def decode_value(value_desc):
+    """
+    Rebuild a config value in the main process, reverse of
+    :meth:`ValueEncoder.encode`.
+    """
+    kind = value_desc[0]
+    if kind == "raw":
+        return value_desc[1]
+    if kind == "list":
+        return [decode_value(v) for v in value_desc[1]]
+    if kind == "tuple":
+        return tuple([decode_value(v) for v in value_desc[1]])
+    if kind == "dict":
+        return {k: decode_value(v) for k, v in value_desc[1]}
+    if kind == "ref":
+        module_name, key = value_desc[1]
+        return getattr(import_module(module_name), key)
+    if kind == "prop":
+        return _load_class(value_desc[1])(**decode_value(value_desc[2]))
+    if kind == "obj":
+        return _load_class(value_desc[1])(value_desc[2], **decode_value(value_desc[3]))
+    if kind == "fn":
+        klass = _load_class(value_desc[1])
+        obj = klass.__new__(klass)
+        obj.__dict__.update(decode_value(value_desc[2]))
+        return obj
+    if kind == "attrs":
+        klass = _load_class(value_desc[1])
+        return klass(**{
+            name.lstrip("_"): decode_value(v)
+            for name, v in value_desc[2].items()
+        })
+    raise ValueError("unknown value description {!r}".format(kind))
+
+
+@attr.s
+class ModuleDesc(object):
+    """
+    Picklable description of a handler module, created in a worker process.
+
+    :param config: description of the module level config, None if not defined
+    :param handlers: list of ``(func_name, config description or None)``
+    """
+    name = attr.ib()  # type: str
+    parent = attr.ib()  # type: str
+    file = attr.ib()  # type: str
+    config = attr.ib(default=None)
+    handlers = attr.ib(factory=list)  # type: typing.List[typing.Tuple[str, typing.Any]]
+
+
+def _walk_single_module(module_name: str,
+                        valid_func_name_list: typing.List[str],
+                        selected: bool):
+    py_current_module = import_module(module_name)
+    yield py_current_module, None, None
+    if not selected:
+        return
+    for func_name in valid_func_name_list:
+        if func_name in py_current_module.__dict__:
+            yield py_current_module, None, getattr(py_current_module, func_name)
+
+
+def describe_sub_tree(module_name: str,
+                      is_package: bool,
+                      valid_func_name_list: typing.List[str],
+                      config_field: str,
+                      module_filter: ModuleFilter = None) -> typing.List[ModuleDesc]:
+    """
+    Runs in a worker process, import every module in the sub tree.
+    """
+    if is_package:
+        walker = walk_lbd_handler(
+            module_name, valid_func_name_list, module_filter=module_filter)
+    else:
+        walker = _walk_single_module(
+            module_name, valid_func_name_list,
+            selected=(module_filter is None) or module_filter.is_selected(module_name),
+        )
+
+    encoder = ValueEncoder(module_name)
+    module_desc_list = list()
+    for py_current_module, py_parent_module, py_handler_func in walker:
+        if py_handler_func is None:
+            if py_parent_module is None:  # root of the sub tree
+                parent_name = module_name.rsplit(".", 1)[0]
+            else:
+                parent_name = py_parent_module.__name__
+            module_desc = ModuleDesc(
+                name=py_current_module.__name__,
+                parent=parent_name,
+                file=py_current_module.__file__,
+            )
+            if config_field in py_current_module.__dict__:
+                module_desc.config = encoder.encode(
+                    py_current_module.__dict__[config_field])
+            module_desc_list.append(module_desc)
+        else:
+            config = getattr(py_handler_func, config_field, None)
+            module_desc_list[-1].handlers.append((
+                py_handler_func.__name__,
+                None if config is None else encoder.encode(config),
+            ))
+    return module_desc_list
+
+
+def make_module_from_desc(module_desc: ModuleDesc,
+                          config_field: str) -> types.ModuleType:
+    py_module = types.ModuleType(module_desc.name)
+    py_module.__file__ = module_desc.file
+    py_module.__lbdrabbit_stand_in__ = True
+    if module_desc.config is not None:
+        setattr(py_module, config_field, decode_value(module_desc.config))
+    for func_name, config in module_desc.handlers:
+        py_handler_func = _make_stand_in_function(module_desc.name, func_name)
+        if config is not None:
+            setattr(py_handler_func, config_field, decode_value(config))
+        setattr(py_module, func_name, py_handler_func)
+    return py_module
+
+
+def walk_lbd_handler_parallel(module_name: str,
+                              valid_func_name_list: typing.List[str],
+                              config_field: str,
+                              max_workers: int = None,
+                              module_filter: ModuleFilter = None):
+    """
+    Parallel version of
+    :func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler`, yield the
+    same ``(py_current_module, py_parent_module, py_handler_func)`` tuples
+    in the same order.
+
+    The root package is imported in the main process, one task per top
+    level sub package or sub module is submitted to the process pool.
+
+    :param max_workers: number of worker processes, default is the number
+        of CPU.
+    :param module_filter: see
+        :class:`~lbdrabbit.lbd_func_config.iterator.ModuleFilter`
+    """
+    module_tree = list(walk_module_tree(module_name, module_filter))
+    if len(module_tree) == 0:
+        return
+    root_module, _, root_selected = module_tree[0]
+    sub_trees = [
+        (current_module.fullname, isinstance(current_module, Package))
+        for current_module, parent_module, _ in module_tree[1:]
+        if parent_module is root_module
+    ]
+    if len(sub_trees) <= 1:
+        for things in walk_lbd_handler(
+                module_name, valid_func_name_list, module_filter=module_filter):
+            yield things
+        return
+
+    py_root_module = import_module(module_name)
+    yield py_root_module, None, None
+    if root_selected:
+        for func_name in valid_func_name_list:
+            if func_name in py_root_module.__dict__:
+                yield py_root_module, None, getattr(py_root_module, func_name)
+
+    py_module_mapper = {module_name: py_root_module}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                describe_sub_tree,
+                sub_tree_name, is_package, valid_func_name_list, config_field,
+                module_filter,
+            )
+            for sub_tree_name, is_package in sub_trees
+        ]
+        for future in futures:
+            for module_desc in future.result():
+                py_current_module = make_module_from_desc(module_desc, config_field)
+                py_module_mapper[module_desc.name] = py_current_module
+                py_parent_module = py_module_mapper[module_desc.parent]
+                yield py_current_module, py_parent_module, None
+                for func_name, _ in module_desc.handlers:
+                    yield py_current_module, py_parent_module, \
+                          getattr(py_current_module, func_name)
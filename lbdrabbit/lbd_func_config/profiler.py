@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import cost profiler for the handler discovery phase.
+
+The handler tree is walked in a fresh ``python -X importtime`` sub process,
+so modules already imported by the current process don't hide their cost.
+For every handler module (and ``__init__.py``) the report includes:
+
+- wall time of ``import_module`` while walking the tree.
+- the time spent on its transitive imports, reported by ``-X importtime``.
+- the heavy transitive imports, sorted by cumulative import time.
+
+The time of the ``config_inherit_handler`` phase is also reported.
+
+Python API::
+
+    >>> from lbdrabbit.lbd_func_config.profiler import profile_handler_discovery
+    >>> profile = profile_handler_discovery("my_project.handlers")
+    >>> profile.to_dict()
+    >>> print(profile.render_table())
+
+Command line::
+
+    $ lbdrabbit profile-import my_project.handlers
+
+**中文文档**
+
+分析 handler 发现阶段每个 handler 模块的 import 耗时, 以及导致耗时的传递依赖,
+用于定位是哪个 handler 包导致了模板生成变慢.
+"""
+
+import os
+import sys
+import json
+import time
+import typing
+import tempfile
+import subprocess
+import attr
+from importlib import import_module
+
+from ..const import VALID_LBD_HANDLER_FUNC_NAME_LIST
+from .iterator import walk_lbd_handler
+from .index import HandlerIndex
+from .base import config_inherit_handler
+from .lbd_func_config import LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD
+
+IMPORT_TIME_PREFIX = "import time:"
+MARKER_PREFIX = "lbdrabbit profiler:"
+START_MARKER = MARKER_PREFIX + " start"
+
+
+@attr.s
+class ImportTimeRecord(object):
+    """
+    A line of ``python -X importtime`` output, time unit is micro second.
+    """
+    name = attr.ib()  # type: str
+    self_us = attr.ib()  # type: int
+    cumulative_us = attr.ib()  # type: int
+    children = attr.ib(factory=list)  # type: typing.List[ImportTimeRecord]
+
+    def iter_descendants(self):
+        for child in self.children:
+            yield child
+            for descendant in child.iter_descendants():
+                yield descendant
+
+
+def parse_importtime(text: str) -> typing.List[ImportTimeRecord]:
+    """
+    Parse ``python -X importtime`` output into trees. A module is printed
+    after all the modules it imports, nesting level is the indent of the
+    module name.
+
+    :return: the top level import records, in import order.
+    """
+    pending = dict()  # type: typing.Dict[int, typing.List[ImportTimeRecord]]
+    for line in text.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        chunks = line[len(IMPORT_TIME_PREFIX):].split("|")
+        if len(chunks) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(chunks[0]), int(chunks[1])
+        except ValueError:  # the header line
+            continue
+        raw_name = chunks[2][1:]  # there is a white space after "|"
+        name = raw_name.lstrip()
+        level = (len(raw_name) - len(name)) // 2
+        record = ImportTimeRecord(
+            name=name,
+            self_us=self_us,
+            cumulative_us=cumulative_us,
+            children=pending.pop(level + 1, []),
+        )
+        pending.setdefault(level, []).append(record)
+    return pending.get(0, [])
+
+
+@attr.s
+class ModuleImportCost(object):
+    """
+    Import cost of a handler module, time unit is second.
+
+    :param wall_time: wall time of importing the module.
+    :param self_time: wall time not spent on importing other modules.
+    :param cumulative_time: time spent on importing other modules, reported
+        by ``-X importtime``.
+    :param heavy_imports: list of ``(module name, cumulative import time)``
+        of the transitive imports, the most expensive first.
+    """
+    name = attr.ib()  # type: str
+    n_handler = attr.ib()  # type: int
+    wall_time = attr.ib()  # type: float
+    self_time = attr.ib(default=0.0)  # type: float
+    cumulative_time = attr.ib(default=0.0)  # type: float
+    heavy_imports = attr.ib(factory=list)  # type: typing.List[typing.Tuple[str, float]]
+
+
+@attr.s
+class DiscoveryProfile(object):
+    """
+    Import cost report of the handler discovery phase, time unit is second.
+
+    :param modules: handler modules, the most expensive first.
+    """
+    module_name = attr.ib()  # type: str
+    walk_time = attr.ib()  # type: float
+    inherit_time = attr.ib()  # type: float
+    modules = attr.ib(factory=list)  # type: typing.List[ModuleImportCost]
+
+    def to_dict(self) -> dict:
+        return attr.asdict(self)
+
+    def render_table(self) -> str:
+        lines = [
+            "handler discovery of {!r}: walk {:.3f}s, inherit config {:.3f}s".format(
+                self.module_name, self.walk_time, self.inherit_time),
+            "{:>10} {:>10} {:>10}  {}".format("wall(s)", "cumul(s)", "self(s)", "module"),
+        ]
+        for module in self.modules:
+            lines.append("{:>10.4f} {:>10.4f} {:>10.4f}  {}".format(
+                module.wall_time, module.cumulative_time, module.self_time, module.name))
+            for name, cumulative_time in module.heavy_imports:
+                lines.append("{:>10} {:>10.4f} {:>10}    <- {}".format(
+                    "", cumulative_time, "", name))
+        return "\n".join(lines)
+
+
+def _write_marker(text: str):
+    sys.stderr.write(text + "\n")
+    sys.stderr.flush()
+
+
+def _split_segments(text: str) -> typing.Dict[str, str]:
+    """
+    Split the ``-X importtime`` output by the markers written after each
+    handler module is imported.
+
+    ``importlib.import_module`` doesn't go through the instrumented import
+    path, so the handler module itself is not in the output, only the
+    modules it imports are. Every line between two markers belongs to the
+    handler module named by the second marker.
+
+    :return: handler module name -> ``-X importtime`` output
+    """
+    segments = dict()
+    lines = None
+    for line in text.splitlines():
+        if line == START_MARKER:
+            lines = list()
+        elif lines is None:
+            continue
+        elif line.startswith(MARKER_PREFIX):
+            segments[line[len(MARKER_PREFIX):].strip()] = "\n".join(lines)
+            lines = list()
+        else:
+            lines.append(line)
+    return segments
+
+
+def _load_class(class_path: str) -> type:
+    module_name, qualname = class_path.split(":")
+    obj = import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _measure(module_name: str,
+             valid_func_name_list: typing.List[str],
+             config_field: str,
+             config_class: type) -> dict:
+    """
+    Walk the handler tree and measure the wall time, runs in the profiled
+    sub process.
+    """
+    walk_times = list()
+    walker = walk_lbd_handler(module_name, valid_func_name_list)
+    _write_marker(START_MARKER)
+
+    def timed_walker():
+        start = time.perf_counter()
+        for py_current_module, py_parent_module, py_handler_func in walker:
+            if py_handler_func is None:
+                walk_times.append([
+                    py_current_module.__name__, time.perf_counter() - start, 0])
+                _write_marker("{} {}".format(MARKER_PREFIX, py_current_module.__name__))
+            else:
+                walk_times[-1][2] += 1
+            yield py_current_module, py_parent_module, py_handler_func
+            start = time.perf_counter()
+
+    start = time.perf_counter()
+    index = HandlerIndex.from_walker(module_name, timed_walker())
+    walk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config_inherit_handler(
+        module_name=module_name,
+        config_field=config_field,
+        config_class=config_class,
+        valid_func_name_list=valid_func_name_list,
+        handler_index=index,
+    )
+    inherit_time = time.perf_counter() - start
+    return {
+        "walk_time": walk_time,
+        "inherit_time": inherit_time,
+        "modules": walk_times,
+    }
+
+
+def profile_handler_discovery(module_name: str,
+                              valid_func_name_list: typing.List[str] = None,
+                              config_field: str = None,
+                              config_class: type = None,
+                              top_n: int = 5,
+                              python: str = sys.executable) -> DiscoveryProfile:
+    """
+    Profile the import cost of every handler module in a fresh sub process.
+
+    :param top_n: number of heavy transitive imports reported per module.
+    :param python: the python interpreter to run the sub process.
+    """
+    if valid_func_name_list is None:
+        valid_func_name_list = VALID_LBD_HANDLER_FUNC_NAME_LIST
+    if config_field is None:
+        config_field = DEFAULT_LBD_FUNC_CONFIG_FIELD
+    if config_class is None:
+        config_class = LbdFuncConfig
+
+    fd, output_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        args = [
+            module_name,
+            json.dumps(list(valid_func_name_list)),
+            config_field,
+            "{}:{}".format(config_class.__module__, config_class.__qualname__),
+            output_path,
+        ]
+        process = subprocess.run(
+            [python, "-X", "importtime", "-m", __name__] + args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError("failed to profile {!r}:\n{}".format(
+                module_name,
+                "\n".join([
+                    line for line in process.stderr.splitlines()
+                    if not line.startswith(IMPORT_TIME_PREFIX)
+                ]),
+            ))
+        with open(output_path, "rb") as f:
+            measurement = json.loads(f.read().decode("utf-8"))
+    finally:
+        os.remove(output_path)
+
+    segments = _split_segments(process.stderr)
+    modules = list()
+    for name, wall_time, n_handler in measurement["modules"]:
+        roots = parse_importtime(segments.get(name, ""))
+        descendants = list(roots)
+        for root in roots:
+            descendants.extend(root.iter_descendants())
+        heavy_imports = sorted(
+            descendants, key=lambda r: r.cumulative_us, reverse=True)[:top_n]
+        cumulative_time = sum([root.cumulative_us for root in roots]) / 1000000.0
+        modules.append(ModuleImportCost(
+            name=name,
+            n_handler=n_handler,
+            wall_time=wall_time,
+            self_time=max(wall_time - cumulative_time, 0.0),
+            cumulative_time=cumulative_time,
+            heavy_imports=[
+                (r.name, r.cumulative_us / 1000000.0) for r in heavy_imports
+            ],
+        ))
+    modules.sort(key=lambda m: (m.cumulative_time, m.wall_time), reverse=True)
+
+    return DiscoveryProfile(
+        module_name=module_name,
+        walk_time=measurement["walk_time"],
+        inherit_time=measurement["inherit_time"],
+        modules=modules,
+    )
+
+
+if __name__ == "__main__":
+    _module_name, _valid_func_name_list, _config_field, _config_class, _output_path = sys.argv[1:]
+    _measurement = _measure(
+        module_name=_module_name,
+        valid_func_name_list=json.loads(_valid_func_name_list),
+        config_field=_config_field,
+        config_class=_load_class(_config_class),
+    )
+    with open(_output_path, "wb") as _f:
+        _f.write(json.dumps(_measurement).encode("utf-8"))
@@ -0,0 +1,645 @@
+# -*- coding: utf-8 -*-
+
+"""
+Nested stack sharding.
+
+CloudFormation allows at most 500 resources, 200 parameters, 200 outputs
+and 1 MB per template. If the
+generated template exceeds the limits, :func:`shard_template` moves the aws
+objects created by the handler configs into nested stacks, one per top level
+handler sub package. A sub package that still exceeds the limits, including the parameters and
+outputs wiring it to the other templates, is split again by its own sub
+packages. The aws objects created by the root module
+config, and the aws objects not created by a handler config (for example the
+``RestApi``, the iam role), stay in the master template.
+
+References across templates are wired through parameters and outputs:
+
+- a ``Ref`` / ``Fn::Sub`` variable to an aws object or a parameter outside
+  of a shard becomes a shard parameter with the same name, so the reference
+  itself is unchanged.
+- a ``Fn::GetAtt`` outside of a shard becomes a shard parameter named
+  ``<LogicalId><Attribute>``.
+- an aws object referenced from another template is exported by a shard
+  output, the master passes ``Fn::GetAtt <NestedStack>.Outputs.<Name>``.
+- a ``DependsOn`` outside of a shard becomes a ``DependsOn`` of the nested
+  stack.
+
+Shards only depend on each other if they reference each other, so
+CloudFormation deploys independent nested stacks in parallel.
+
+**中文文档**
+
+当生成的模板超过 CloudFormation 的限制 (500 个资源, 1 MB) 时, 按照 handler
+子包将资源拆分到嵌套的 Stack 中. 跨 Stack 的引用通过参数和输出连接. 没有相互
+引用的子 Stack 可以被并行部署.
+"""
+
+import re
+import json
+import typing
+import attr
+from collections import OrderedDict
+from troposphere_mate import camelcase
+
+from .index import HandlerIndex
+
+#: CloudFormation limits
+MAX_RESOURCES = 500
+MAX_PARAMETERS = 200
+MAX_OUTPUTS = 200
+MAX_TEMPLATE_SIZE = 1024 * 1024
+
+NESTED_STACK_TYPE = "AWS::CloudFormation::Stack"
+
+_sub_variable_pattern = re.compile(r"\$\{([^!}][^}]*)\}")
+
+
+def dumps(template_data: dict) -> str:
+    """
+    Same format as ``Template.to_json()``.
+    """
+    return json.dumps(template_data, indent=4, sort_keys=True, separators=(",", ": "))
+
+
+@attr.s
+class ShardedTemplate(object):
+    """
+    :param master: the master template, nested stack ``TemplateURL`` are
+        set by :meth:`set_template_urls`.
+    :param shards: shard name (relative handler module name, for example
+        ``rest.users``) -> shard template.
+    :param stack_logical_ids: shard name -> logical id of the nested stack
+        in the master template.
+    """
+    master = attr.ib()  # type: dict
+    shards = attr.ib(factory=OrderedDict)  # type: typing.Dict[str, dict]
+    stack_logical_ids = attr.ib(factory=OrderedDict)  # type: typing.Dict[str, str]
+
+    @property
+    def is_sharded(self) -> bool:
+        return len(self.shards) > 0
+
+    def set_template_urls(self, template_urls: typing.Dict[str, str]):
+        """
+        :param template_urls: shard name -> s3 url of the uploaded shard.
+        """
+        for name, url in template_urls.items():
+            logical_id = self.stack_logical_ids[name]
+            self.master["Resources"][logical_id]["Properties"]["TemplateURL"] = url
+
+
+def _get_att(value) -> typing.Union[typing.Tuple[str, str], None]:
+    target = value["Fn::GetAtt"]
+    if isinstance(target, str):
+        target = target.split(".", 1)
+    if isinstance(target, list) and len(target) == 2 \
+            and isinstance(target[0], str) and isinstance(target[1], str):
+        return target[0], target[1]
+    return None
+
+
+def _sub_names(value) -> typing.Tuple[str, typing.Set[str]]:
+    """
+    :return: the Sub string, and the names of the local variables.
+    """
+    body = value["Fn::Sub"]
+    if isinstance(body, list):
+        return body[0], set(body[1]) if len(body) > 1 else set()
+    return body, set()
+
+
+def _is_external(name: str) -> bool:
+    return not name.startswith("AWS::")
+
+
+class _Rewriter(object):
+    """
+    Rewrite the references to the names outside of one template.
+
+    :param is_local: True if the name is defined in this template.
+    :param ref: name -> replacement of ``{"Ref": name}``
+    :param get_att: (name, attribute) -> replacement of ``Fn::GetAtt``
+    :param sub: ``Fn::Sub`` variable -> (new variable, value of the new
+        variable or None)
+    """
+
+    def __init__(self, is_local: typing.Callable[[str], bool],
+                 ref: typing.Callable[[str], typing.Any],
+                 get_att: typing.Callable[[str, str], typing.Any],
+                 sub: typing.Callable[[str], typing.Tuple[str, typing.Any]]):
+        self.is_local = is_local
+        self.ref = ref
+        self.get_att = get_att
+        self.sub = sub
+
+    def rewrite(self, value):
+        if isinstance(value, list):
+            return [self.rewrite(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        if len(value) == 1:
+            if "Ref" in value and isinstance(value["Ref"], str):
+                name = value["Ref"]
+                if _is_external(name) and not self.is_local(name):
+                    return self.ref(name)
+                return value
+            if "Fn::GetAtt" in value:
+                target = _get_att(value)
+                if target is not None and not self.is_local(target[0]):
+                    return self.get_att(*target)
+                return value
+            if "Fn::Sub" in value:
+                return self._rewrite_sub(value)
+        return {key: self.rewrite(v) for key, v in value.items()}
+
+    def _rewrite_sub(self, value):
+        body, local_names = _sub_names(value)
+        variables = OrderedDict()
+        if isinstance(value["Fn::Sub"], list) and len(value["Fn::Sub"]) > 1:
+            for key, v in value["Fn::Sub"][1].items():
+                variables[key] = self.rewrite(v)
+
+        def replace(match):
+            name = match.group(1)
+            if name in local_names:
+                return match.group(0)
+            if not _is_external(name.split(".")[0]) or self.is_local(name.split(".")[0]):
+                return match.group(0)
+            new_name, variable = self.sub(name)
+            if variable is not None:
+                variables[new_name] = variable
+            return "${%s}" % new_name
+
+        if not isinstance(body, str):
+            return value
+        body = _sub_variable_pattern.sub(replace, body)
+        if variables:
+            return {"Fn::Sub": [body, dict(variables)]}
+        return {"Fn::Sub": body}
+
+
+def _depends_on_list(resource: dict) -> typing.List[str]:
+    depends_on = resource.get("DependsOn", list())
+    if isinstance(depends_on, str):
+        depends_on = [depends_on, ]
+    return list(depends_on)
+
+
+def _attr_param_name(logical_id: str, attribute: str) -> str:
+    return "{}{}".format(logical_id, attribute.replace(".", ""))
+
+
+def _common_module_name(module_names: typing.Iterable[str]) -> str:
+    """
+    The closest common ancestor of relative module names, ``""`` is the
+    root module.
+    """
+    common = None
+    for module_name in module_names:
+        parts = module_name.split(".") if module_name else list()
+        if common is None:
+            common = parts
+            continue
+        n = 0
+        for a, b in zip(common, parts):
+            if a != b:
+                break
+            n += 1
+        common = common[:n]
+    return ".".join(common or list())
+
+
+def _referenced_names(value) -> typing.Set[str]:
+    """
+    Names referenced by ``Ref``, ``Fn::GetAtt``, ``Fn::Sub`` and
+    ``DependsOn``.
+    """
+    names = set()
+    if isinstance(value, list):
+        for v in value:
+            names.update(_referenced_names(v))
+    elif isinstance(value, dict):
+        if len(value) == 1 and isinstance(value.get("Ref"), str):
+            names.add(value["Ref"])
+        elif len(value) == 1 and "Fn::GetAtt" in value:
+            target = _get_att(value)
+            if target is not None:
+                names.add(target[0])
+        elif len(value) == 1 and "Fn::Sub" in value:
+            body, local_names = _sub_names(value)
+            if isinstance(body, str):
+                for name in _sub_variable_pattern.findall(body):
+                    if name not in local_names:
+                        names.add(name.split(".")[0])
+            names.update(_referenced_names(value["Fn::Sub"]))
+        else:
+            names.update(_depends_on_list(value))
+            for v in value.values():
+                names.update(_referenced_names(v))
+    return names
+
+
+def _wired_names(value) -> typing.Set[typing.Tuple[str, typing.Union[str, None]]]:
+    """
+    ``(name, attribute)`` referenced by ``Ref`` (attribute is None),
+    ``Fn::GetAtt`` and ``Fn::Sub``, the references becoming a parameter and
+    an output if the name is in another template.
+    """
+    names = set()
+    if isinstance(value, list):
+        for v in value:
+            names.update(_wired_names(v))
+    elif isinstance(value, dict):
+        if len(value) == 1 and isinstance(value.get("Ref"), str):
+            if _is_external(value["Ref"]):
+                names.add((value["Ref"], None))
+        elif len(value) == 1 and "Fn::GetAtt" in value:
+            target = _get_att(value)
+            if target is not None:
+                names.add(target)
+        elif len(value) == 1 and "Fn::Sub" in value:
+            body, local_names = _sub_names(value)
+            if isinstance(body, str):
+                for name in _sub_variable_pattern.findall(body):
+                    if name in local_names or not _is_external(name):
+                        continue
+                    if "." in name:
+                        names.add(tuple(name.split(".", 1)))
+                    else:
+                        names.add((name, None))
+            names.update(_wired_names(value["Fn::Sub"]))
+        else:
+            for key, v in value.items():
+                if key != "DependsOn":
+                    names.update(_wired_names(v))
+    return names
+
+
+def get_resource_owners(handler_index: HandlerIndex,
+                        config_field: str,
+                        template_data: dict = None) -> typing.Dict[str, str]:
+    """
+    Logical id -> relative module name owning the aws object. It is the
+    module of the config which created the aws object. An aws object
+    shared by configs of several modules (for example a shared event rule,
+    or the monolith router function) is owned by their closest common
+    ancestor, ``""`` (the master template) if they are in different top
+    level sub packages.
+
+    :param template_data: if given, an aws object referencing a shared aws
+        object, which itself references aws objects of its sub modules,
+        follows the shared aws object. For example the lambda permissions
+        of a shared event rule stay with the rule, otherwise the rule and
+        the nested stacks of its target functions would depend on each
+        other.
+    """
+    module_names = OrderedDict()
+    for config in handler_index.iter_configs(config_field):
+        if config.builder_registry is None:
+            continue
+        readiness = config.readiness
+        for builder in config.builder_registry.ordered:
+            if not readiness[builder.name]:
+                continue
+            aws_object = config.get_aws_object(builder.name)
+            if isinstance(aws_object, dict):
+                aws_objects = list(aws_object.values())
+            else:
+                aws_objects = [aws_object, ]
+            for aws_object in aws_objects:
+                module_names.setdefault(aws_object.title, set()).add(config.rel_module_name)
+
+    owners = dict()
+    shared = set()
+    for logical_id, names in module_names.items():
+        owners[logical_id] = _common_module_name(names)
+        if len(names) > 1:
+            shared.add(logical_id)
+    if template_data is None or not shared:
+        return owners
+
+    resources = template_data.get("Resources", dict())
+    references = {
+        logical_id: _referenced_names(resource)
+        for logical_id, resource in resources.items()
+    }
+
+    def is_below(name: str, owner: str) -> bool:
+        other = owners.get(name)
+        if other is None or other == owner:
+            return False
+        return owner == "" or other.startswith(owner + ".")
+
+    # shared aws objects referencing the aws objects of their sub modules
+    anchors = [
+        logical_id for logical_id in shared
+        if logical_id in references and any([
+            is_below(name, owners[logical_id]) for name in references[logical_id]
+        ])
+    ]
+    while anchors:
+        anchor = anchors.pop()
+        for logical_id, names in references.items():
+            if anchor not in names or logical_id not in owners:
+                continue
+            owner = _common_module_name([owners[logical_id], owners[anchor]])
+            if owner != owners[logical_id]:
+                owners[logical_id] = owner
+                anchors.append(logical_id)
+    return owners
+
+
+def _exceeds(template_data: dict, max_resources: int, max_size: int) -> bool:
+    return len(template_data.get("Resources", dict())) > max_resources \
+           or len(dumps(template_data)) > max_size
+
+
+def assign_shards(template_data: dict,
+                  owners: typing.Dict[str, str],
+                  max_resources: int = MAX_RESOURCES,
+                  max_size: int = MAX_TEMPLATE_SIZE,
+                  max_parameters: int = MAX_PARAMETERS,
+                  max_outputs: int = MAX_OUTPUTS) -> typing.Dict[str, str]:
+    """
+    Logical id -> shard name, the aws objects not in the result stay in the
+    master template. Group by top level sub package, a group exceeding 90%
+    of the resource or size limits (the rest is reserved for parameters and
+    outputs), or needing more parameters or outputs than allowed to wire
+    the references across templates, is split by the next level.
+
+    :raises ValueError: if the aws objects of a single module exceed the
+        limits.
+    """
+    resources = template_data["Resources"]
+    budget_resources = int(max_resources * 0.9)
+    budget_size = int(max_size * 0.9)
+    sizes = {
+        logical_id: len(dumps(resource))
+        for logical_id, resource in resources.items()
+    }
+    wired_names = {
+        logical_id: _wired_names(resource)
+        for logical_id, resource in resources.items()
+    }
+    # the outputs of the master template may reference a shard too
+    master_wired_names = _wired_names(template_data.get("Outputs", dict()))
+
+    def fits(group: typing.List[str]) -> bool:
+        if len(group) > budget_resources \
+                or sum([sizes[logical_id] for logical_id in group]) > budget_size:
+            return False
+        members = set(group)
+        parameters = set()
+        for logical_id in group:
+            for name in wired_names[logical_id]:
+                if name[0] not in members:
+                    parameters.add(name)
+        if len(parameters) > max_parameters:
+            return False
+        outputs = set([name for name in master_wired_names if name[0] in members])
+        for logical_id, names in wired_names.items():
+            if logical_id in members:
+                continue
+            for name in names:
+                if name[0] in members:
+                    outputs.add(name)
+        return len(outputs) <= max_outputs
+
+    def split(logical_ids: typing.List[str], depth: int) -> typing.Dict[str, str]:
+        groups = OrderedDict()
+        for logical_id in logical_ids:
+            parts = owners[logical_id].split(".")
+            groups.setdefault(".".join(parts[:depth]), list()).append(logical_id)
+        assigned = dict()
+        for name, group in groups.items():
+            if fits(group):
+                for logical_id in group:
+                    assigned[logical_id] = name
+            elif len(name.split(".")) < depth:
+                raise ValueError(
+                    "aws objects of module {!r} exceed the template limits".format(name))
+            else:
+                assigned.update(split(group, depth + 1))
+        return assigned
+
+    return split(
+        [
+            logical_id for logical_id in resources
+            if owners.get(logical_id)  # root module config has no sub package
+        ],
+        depth=1,
+    )
+
+
+def split_template(template_data: dict,
+                   shard_of: typing.Dict[str, str]) -> ShardedTemplate:
+    """
+    Move the aws objects to the shards, wire the references across templates.
+
+    :param shard_of: logical id -> shard name, the return of
+        :func:`assign_shards`.
+    """
+    resources = template_data.get("Resources", dict())
+    master = OrderedDict([
+        (key, value) for key, value in template_data.items() if key != "Resources"
+    ])
+    master_resources = OrderedDict()
+    master["Resources"] = master_resources
+    sharded = ShardedTemplate(master=master)
+
+    shard_names = list()
+    for logical_id in resources:
+        name = shard_of.get(logical_id)
+        if name is not None and name not in shard_names:
+            shard_names.append(name)
+    for name in shard_names:
+        sharded.stack_logical_ids[name] = "NestedStack{}".format(
+            camelcase(name.replace(".", "-").replace("_", "-")))
+        sharded.shards[name] = OrderedDict([
+            ("Parameters", OrderedDict()),
+            ("Resources", OrderedDict()),
+            ("Outputs", OrderedDict()),
+        ])
+    stack_params = {name: OrderedDict() for name in shard_names}
+    stack_depends_on = {name: list() for name in shard_names}
+    master_parameters = template_data.get("Parameters", dict())
+
+    def location(name: str) -> typing.Union[str, None]:
+        return shard_of.get(name) if name in resources else None
+
+    def export(name: str, attribute: str = None):
+        """
+        Output of the shard owning the aws object, as seen by other templates.
+        """
+        shard_name = location(name)
+        if shard_name is None:
+            if attribute is None:
+                return {"Ref": name}
+            return {"Fn::GetAtt": [name, attribute]}
+        output_name = name if attribute is None else _attr_param_name(name, attribute)
+        sharded.shards[shard_name]["Outputs"][output_name] = {
+            "Value": {"Ref": name} if attribute is None
+            else {"Fn::GetAtt": [name, attribute]}
+        }
+        return {"Fn::GetAtt": [
+            sharded.stack_logical_ids[shard_name], "Outputs.{}".format(output_name)]}
+
+    def shard_rewriter(shard_name: str) -> _Rewriter:
+        parameters = sharded.shards[shard_name]["Parameters"]
+        params = stack_params[shard_name]
+
+        def import_value(param_name: str, name: str, attribute: str = None):
+            if param_name not in parameters:
+                if attribute is None and name in master_parameters:
+                    parameters[param_name] = dict(master_parameters[name])
+                    parameters[param_name].pop("Default", None)
+                else:
+                    parameters[param_name] = {"Type": "String"}
+                params[param_name] = export(name, attribute)
+
+        def ref(name):
+            import_value(name, name)
+            return {"Ref": name}
+
+        def get_att(name, attribute):
+            param_name = _attr_param_name(name, attribute)
+            import_value(param_name, name, attribute)
+            return {"Ref": param_name}
+
+        def sub(variable):
+            if "." in variable:
+                name, attribute = variable.split(".", 1)
+                param_name = _attr_param_name(name, attribute)
+                import_value(param_name, name, attribute)
+                return param_name, None
+            import_value(variable, variable)
+            return variable, None
+
+        return _Rewriter(
+            is_local=lambda name: name in resources and location(name) == shard_name,
+            ref=ref, get_att=get_att, sub=sub,
+        )
+
+    def master_sub(variable):
+        if "." in variable:
+            name, attribute = variable.split(".", 1)
+            return _attr_param_name(name, attribute), export(name, attribute)
+        return variable, export(variable)
+
+    master_rewriter = _Rewriter(
+        is_local=lambda name: location(name) is None,
+        ref=lambda name: export(name),
+        get_att=lambda name, attribute: export(name, attribute),
+        sub=master_sub,
+    )
+
+    rewriters = {name: shard_rewriter(name) for name in shard_names}
+    for logical_id, resource in resources.items():
+        shard_name = location(logical_id)
+        rewriter = master_rewriter if shard_name is None else rewriters[shard_name]
+        new_resource = OrderedDict()
+        for key, value in resource.items():
+            if key == "DependsOn":
+                continue
+            new_resource[key] = rewriter.rewrite(value)
+        depends_on = list()
+        for name in _depends_on_list(resource):
+            target = location(name) if name in resources else None
+            if target == shard_name:
+                depends_on.append(name)
+                continue
+            if shard_name is None:  # master depends on a shard
+                target_id = sharded.stack_logical_ids[target]
+                if target_id not in depends_on:
+                    depends_on.append(target_id)
+            else:  # shard depends on master or another shard
+                target_id = name if target is None else sharded.stack_logical_ids[target]
+                if target_id not in stack_depends_on[shard_name]:
+                    stack_depends_on[shard_name].append(target_id)
+        if depends_on:
+            new_resource["DependsOn"] = depends_on
+        if shard_name is None:
+            master_resources[logical_id] = new_resource
+        else:
+            sharded.shards[shard_name]["Resources"][logical_id] = new_resource
+
+    for key in ("Outputs",):
+        if key in master:
+            master[key] = master_rewriter.rewrite(master[key])
+
+    for name in shard_names:
+        # references to other shards imply the dependency
+        stack_resource = OrderedDict([
+            ("Type", NESTED_STACK_TYPE),
+            ("Properties", OrderedDict([
+                ("TemplateURL", name),
+                ("Parameters", stack_params[name]),
+            ])),
+        ])
+        if stack_depends_on[name]:
+            stack_resource["DependsOn"] = stack_depends_on[name]
+        master_resources[sharded.stack_logical_ids[name]] = stack_resource
+        for key in ("Parameters", "Outputs"):
+            if not sharded.shards[name][key]:
+                del sharded.shards[name][key]
+        for key in ("AWSTemplateFormatVersion", "Mappings"):
+            if key in template_data:
+                sharded.shards[name][key] = template_data[key]
+    _check_circular_dependencies(sharded)
+    return sharded
+
+
+def _check_circular_dependencies(sharded: ShardedTemplate):
+    """
+    :raises ValueError: if the resources of the master template, including
+        the nested stacks, depend on each other.
+    """
+    resources = sharded.master["Resources"]
+    graph = {
+        logical_id: _referenced_names(resource).intersection(resources)
+        for logical_id, resource in resources.items()
+    }
+    done = set()
+    while len(done) < len(graph):
+        ready = [
+            logical_id for logical_id, deps in graph.items()
+            if logical_id not in done and deps.issubset(done)
+        ]
+        if not ready:
+            raise ValueError("circular references between nested stacks {}".format(
+                sorted(set(graph).difference(done))))
+        done.update(ready)
+
+
+def shard_template(template_data: dict,
+                   handler_index: HandlerIndex,
+                   config_field: str,
+                   max_resources: int = MAX_RESOURCES,
+                   max_size: int = MAX_TEMPLATE_SIZE,
+                   max_parameters: int = MAX_PARAMETERS,
+                   max_outputs: int = MAX_OUTPUTS,
+                   force: bool = False) -> ShardedTemplate:
+    """
+    Split the template into nested stacks by handler sub package, if it
+    exceeds the limits.
+
+    :param template_data: ``template.to_dict()``
+    :param force: if True, always split.
+
+    :raises ValueError: if the template uses ``Conditions``, a condition
+        may depend on the parameters of the master template, it can't be
+        evaluated in a nested stack.
+    """
+    if not force and not _exceeds(template_data, max_resources, max_size):
+        return ShardedTemplate(master=template_data)
+    if template_data.get("Conditions"):
+        raise ValueError(
+            "can't shard a template with Conditions {}, a condition may "
+            "depend on the parameters of the master template, it can't be "
+            "evaluated in a nested stack".format(sorted(template_data["Conditions"])))
+    owners = get_resource_owners(handler_index, config_field, template_data)
+    shard_of = assign_shards(
+        template_data, owners, max_resources=max_resources, max_size=max_size,
+        max_parameters=max_parameters, max_outputs=max_outputs)
+    return split_template(template_data, shard_of)
@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+
+"""
+Static (``ast`` based) lambda handler discovery.
+
+:func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler` imports every
+package and module to find the handler functions and their config. This
+module parses the source code instead, and only imports a module when its
+config can't be evaluated statically.
+
+**中文文档**
+
+通过解析源代码的 ``ast`` 找到所有的 lambda handler 函数以及字面量形式的
+``LbdFuncConfig(...)`` 定义. 只有当某个模块的设置无法被静态解析时, 才会真正
+import 该模块. 对于能够被静态解析的模块, 我们会创建一个 "替身" 模块对象, 其上
+挂载着替身 handler 函数以及从源代码中还原出的 config 实例.
+"""
+
+import os
+import ast
+import sys
+import types
+import typing
+import attr
+from importlib import import_module
+from picage import Package
+from .iterator import ModuleFilter, walk_module_tree
+
+
+class NotStaticError(Exception):
+    """
+    Raised when a piece of source code can't be evaluated statically.
+    """
+    pass
+
+
+@attr.s
+class ConfigSpec(object):
+    """
+    Statically evaluated config declaration.
+
+    :param init: keyword arguments passed to the config class constructor,
+        ``{field_name: value_spec}``
+    :param attrs: attribute assignment after construction, in source code
+        order, ``[[field_name, value_spec], ...]``
+
+    A value spec is one of:
+
+    - ``["lit", value]``: a json serializable literal value
+    - ``["list", [value_spec, ...]]``
+    - ``["dict", {key: value_spec}]``
+    - ``["ref", ["Attr", ...]]``: attribute of the config class
+    - ``["call", ["Attr", ...], [value_spec, ...], {key: value_spec}]``: call
+        an attribute of the config class
+    """
+    init = attr.ib(factory=dict)  # type: typing.Dict[str, list]
+    attrs = attr.ib(factory=list)  # type: typing.List[list]
+
+    def to_dict(self) -> dict:
+        return {"init": self.init, "attrs": self.attrs}
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> 'ConfigSpec':
+        return cls(init=dct["init"], attrs=[list(kv) for kv in dct["attrs"]])
+
+
+@attr.s
+class ModuleSpec(object):
+    """
+    Everything lbdrabbit needs to know about a handler module, extracted
+    from its source code.
+
+    :param handler_names: name of valid lambda handler functions defined in
+        this module, in source code order
+    :param module_config: module level config, None if not defined
+    :param func_configs: ``{handler_name: ConfigSpec}``
+    :param need_import: if True, the module has to be imported to get the
+        correct handler and config
+    :param reason: why the module has to be imported
+    """
+    handler_names = attr.ib(factory=list)  # type: typing.List[str]
+    module_config = attr.ib(default=None)  # type: ConfigSpec
+    func_configs = attr.ib(factory=dict)  # type: typing.Dict[str, ConfigSpec]
+    need_import = attr.ib(default=False)  # type: bool
+    reason = attr.ib(default=None)  # type: str
+
+    def to_dict(self) -> dict:
+        return {
+            "handler_names": self.handler_names,
+            "module_config": None if self.module_config is None else self.module_config.to_dict(),
+            "func_configs": {
+                name: spec.to_dict()
+                for name, spec in self.func_configs.items()
+            },
+            "need_import": self.need_import,
+            "reason": self.reason,
+        }
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> 'ModuleSpec':
+        if dct["module_config"] is None:
+            module_config = None
+        else:
+            module_config = ConfigSpec.from_dict(dct["module_config"])
+        return cls(
+            handler_names=list(dct["handler_names"]),
+            module_config=module_config,
+            func_configs={
+                name: ConfigSpec.from_dict(spec)
+                for name, spec in dct["func_configs"].items()
+            },
+            need_import=dct["need_import"],
+            reason=dct["reason"],
+        )
+
+
+_literal_types = (str, int, float, bool, type(None))
+
+_NOT_LITERAL = object()
+
+if sys.version_info >= (3, 8):
+    def _literal(node):
+        """
+        Value of a constant node, ``_NOT_LITERAL`` if it is not a constant.
+        """
+        if isinstance(node, ast.Constant):
+            return node.value
+        return _NOT_LITERAL
+else:  # pragma: no cover
+    def _literal(node):
+        """
+        Value of a constant node, ``_NOT_LITERAL`` if it is not a constant.
+        Python < 3.8 parses constants as ``Str``, ``Num`` and ``NameConstant``.
+        """
+        if isinstance(node, ast.Str):
+            return node.s
+        if isinstance(node, ast.Num):
+            return node.n
+        if isinstance(node, ast.NameConstant):
+            return node.value
+        return _NOT_LITERAL
+
+
+def _resolve_import_from(node: ast.ImportFrom, module_name: str, is_package: bool) -> str:
+    if not node.level:
+        return node.module
+    parts = module_name.split(".")
+    if not is_package:
+        parts = parts[:-1]
+    if node.level > 1:
+        parts = parts[:-(node.level - 1)]
+    if node.module:
+        parts.append(node.module)
+    return ".".join(parts)
+
+
+def _find_config_class_aliases(tree: ast.Module,
+                               module_name: str,
+                               is_package: bool,
+                               config_class: type) -> typing.Set[str]:
+    """
+    Find all top level names bound to ``config_class`` by
+    ``from xxx import LbdFuncConfig [as alias]``.
+
+    We only trust the import if the source module is already imported, so
+    we can verify the name is really the ``config_class``, without importing
+    anything.
+    """
+    aliases = set()
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            from_module_name = _resolve_import_from(node, module_name, is_package)
+            from_module = sys.modules.get(from_module_name)
+            if from_module is None:
+                continue
+            for alias in node.names:
+                if getattr(from_module, alias.name, None) is config_class:
+                    aliases.add(alias.asname or alias.name)
+    return aliases
+
+
+def _attribute_chain(node) -> typing.List[str]:
+    """
+    ``a.b.c`` -> ``["a", "b", "c"]``, raise :class:`NotStaticError` if it is
+    not a pure attribute chain.
+    """
+    chain = list()
+    while isinstance(node, ast.Attribute):
+        chain.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        raise NotStaticError
+    chain.append(node.id)
+    return chain[::-1]
+
+
+def _eval_value(node, aliases: typing.Set[str]) -> list:
+    """
+    Convert an expression node into value spec.
+    """
+    value = _literal(node)
+    if value is not _NOT_LITERAL:
+        if isinstance(value, _literal_types):
+            return ["lit", value]
+        raise NotStaticError
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _literal(node.operand)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return ["lit", -value]
+    if isinstance(node, ast.List):
+        items = [_eval_value(elt, aliases) for elt in node.elts]
+        if all(item[0] == "lit" for item in items):
+            return ["lit", [item[1] for item in items]]
+        return ["list", items]
+    if isinstance(node, ast.Dict):
+        dct = dict()
+        for key, value in zip(node.keys, node.values):
+            key = _literal(key)  # None for ``**kwargs``
+            if not isinstance(key, str):
+                raise NotStaticError
+            dct[key] = _eval_value(value, aliases)
+        if all(item[0] == "lit" for item in dct.values()):
+            return ["lit", {key: item[1] for key, item in dct.items()}]
+        return ["dict", dct]
+    if isinstance(node, ast.Attribute):
+        chain = _attribute_chain(node)
+        if chain[0] in aliases:
+            return ["ref", chain[1:]]
+        raise NotStaticError
+    if isinstance(node, ast.Call):
+        chain = _attribute_chain(node.func)
+        if chain[0] in aliases and len(chain) > 1:
+            return _eval_call(node, chain[1:], aliases)
+        raise NotStaticError
+    raise NotStaticError
+
+
+def _eval_call(node: ast.Call, path: typing.List[str], aliases: typing.Set[str]) -> list:
+    args = list()
+    for arg in node.args:
+        if isinstance(arg, ast.Starred):
+            raise NotStaticError
+        args.append(_eval_value(arg, aliases))
+    kwargs = dict()
+    for keyword in node.keywords:
+        if keyword.arg is None:  # **kwargs
+            raise NotStaticError
+        kwargs[keyword.arg] = _eval_value(keyword.value, aliases)
+    return ["call", path, args, kwargs]
+
+
+def _eval_config_constructor(node, aliases: typing.Set[str]) -> ConfigSpec:
+    """
+    ``LbdFuncConfig(a=1, b=2)`` -> ``ConfigSpec(init={"a": ..., "b": ...})``
+    """
+    if not (isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in aliases):
+        raise NotStaticError
+    if node.args:
+        raise NotStaticError
+    spec = ConfigSpec()
+    for keyword in node.keywords:
+        if keyword.arg is None:
+            raise NotStaticError
+        spec.init[keyword.arg] = _eval_value(keyword.value, aliases)
+    return spec
+
+
+def _defines(node, names: typing.Set[str]) -> bool:
+    """
+    Test if a function or class named in ``names`` is defined in a compound
+    statement (``if``, ``try``, ``with``, ...), in the same scope. The
+    bodies of nested functions and classes have their own scope.
+    """
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if child.name in names:
+                return True
+            continue
+        if _defines(child, names):
+            return True
+    return False
+
+
+def _touches(node, config_field: str, valid_func_names: typing.Set[str]) -> bool:
+    """
+    Test if a top level statement may change the config or (re)bind a
+    handler function name.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        if node.name in valid_func_names:
+            return True
+    elif _defines(node, valid_func_names):
+        return True
+    for sub_node in ast.walk(node):
+        if isinstance(sub_node, ast.Name):
+            if sub_node.id == config_field:
+                return True
+            if sub_node.id in valid_func_names \
+                    and not isinstance(sub_node.ctx, ast.Load):
+                return True
+        elif isinstance(sub_node, ast.Attribute):
+            if sub_node.attr == config_field:
+                return True
+        elif isinstance(sub_node, ast.alias):
+            if (sub_node.asname or sub_node.name).split(".")[0] in valid_func_names:
+                return True
+    return False
+
+
+def _is_main_block(node) -> bool:
+    """
+    Test if it is a ``if __name__ == "__main__":`` block.
+    """
+    try:
+        return isinstance(node, ast.If) \
+               and node.test.left.id == "__name__" \
+               and _literal(node.test.comparators[0]) == "__main__"
+    except AttributeError:
+        return False
+
+
+def parse_module_spec(source: str,
+                      module_name: str,
+                      is_package: bool,
+                      valid_func_name_list: typing.List[str],
+                      config_field: str,
+                      config_class: type,
+                      filename: str = "<unknown>") -> ModuleSpec:
+    """
+    Parse the source code of a handler module and extract handler function
+    names and literal config declarations.
+
+    Supported top level statements:
+
+    - ``__lbd_func_config__ = LbdFuncConfig(key=value, ...)``
+    - ``__lbd_func_config__.key = value``
+    - ``def handler(event, context): ...``
+    - ``handler.__lbd_func_config__ = LbdFuncConfig(key=value, ...)``
+    - ``handler.__lbd_func_config__.key = value``
+
+    Where ``value`` is a literal (str, int, float, bool, None, list, dict),
+    or an attribute of ``LbdFuncConfig``, such as
+    ``LbdFuncConfig.ApiMethodIntType.rest``, or a call of an attribute of
+    ``LbdFuncConfig``, such as ``LbdFuncConfig.S3EventLambdaConfig(...)``.
+
+    Any other statement that touches the config field or the handler names
+    marks the module as ``need_import``.
+
+    :rtype: ModuleSpec
+    """
+    spec = ModuleSpec()
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        spec.need_import = True
+        spec.reason = "syntax error: {}".format(e)
+        return spec
+
+    valid_func_names = set(valid_func_name_list)
+    aliases = _find_config_class_aliases(tree, module_name, is_package, config_class)
+
+    def give_up(node, reason):
+        spec.need_import = True
+        spec.reason = "line {}: {}".format(getattr(node, "lineno", "?"), reason)
+
+    for node in tree.body:
+        # --- handler function definition ---
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) \
+                and node.name in valid_func_names:
+            if node.decorator_list:
+                give_up(node, "decorated handler function {!r}".format(node.name))
+                return spec
+            if node.name in spec.handler_names:
+                give_up(node, "handler function {!r} is redefined".format(node.name))
+                return spec
+            spec.handler_names.append(node.name)
+            continue
+
+        # --- config declaration ---
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            try:
+                chain = _attribute_chain(target)
+            except NotStaticError:
+                chain = None
+
+            if chain is not None and config_field in chain:
+                try:
+                    # __lbd_func_config__ = LbdFuncConfig(...)
+                    if chain == [config_field, ]:
+                        spec.module_config = _eval_config_constructor(node.value, aliases)
+                        continue
+
+                    # __lbd_func_config__.key = value
+                    if len(chain) == 2 and chain[0] == config_field \
+                            and spec.module_config is not None:
+                        spec.module_config.attrs.append(
+                            [chain[1], _eval_value(node.value, aliases)]
+                        )
+                        continue
+
+                    # handler.__lbd_func_config__ = LbdFuncConfig(...)
+                    if len(chain) == 2 and chain[1] == config_field \
+                            and chain[0] in spec.handler_names:
+                        spec.func_configs[chain[0]] = \
+                            _eval_config_constructor(node.value, aliases)
+                        continue
+
+                    # handler.__lbd_func_config__.key = value
+                    if len(chain) == 3 and chain[1] == config_field \
+                            and chain[0] in spec.func_configs:
+                        spec.func_configs[chain[0]].attrs.append(
+                            [chain[2], _eval_value(node.value, aliases)]
+                        )
+                        continue
+                except NotStaticError:
+                    pass
+                give_up(node, "can't evaluate {} statically".format(".".join(chain)))
+                return spec
+
+        # --- if __name__ == "__main__": is never executed on import ---
+        if _is_main_block(node):
+            continue
+
+        # --- from xxx import * may bind anything ---
+        if isinstance(node, ast.ImportFrom) \
+                and any(alias.name == "*" for alias in node.names):
+            give_up(node, "wildcard import")
+            return spec
+
+        # --- anything else is fine, as long as it doesn't touch them ---
+        if _touches(node, config_field, valid_func_names):
+            give_up(node, "unsupported statement using handler or config")
+            return spec
+
+    return spec
+
+
+def materialize_value(value_spec: list, config_class: type):
+    """
+    Convert value spec back to Python object.
+    """
+    kind = value_spec[0]
+    if kind == "lit":
+        return value_spec[1]
+    if kind == "list":
+        return [materialize_value(item, config_class) for item in value_spec[1]]
+    if kind == "dict":
+        return {
+            key: materialize_value(item, config_class)
+            for key, item in value_spec[1].items()
+        }
+    if kind in ("ref", "call"):
+        obj = config_class
+        for attr_name in value_spec[1]:
+            obj = getattr(obj, attr_name)
+        if kind == "ref":
+            return obj
+        args = [materialize_value(item, config_class) for item in value_spec[2]]
+        kwargs = {
+            key: materialize_value(item, config_class)
+            for key, item in value_spec[3].items()
+        }
+        return obj(*args, **kwargs)
+    raise ValueError("unknown value spec: {!r}".format(value_spec))
+
+
+def materialize_config(config_spec: ConfigSpec, config_class: type):
+    """
+    Create a config instance from :class:`ConfigSpec`.
+    """
+    config = config_class(**{
+        key: materialize_value(value_spec, config_class)
+        for key, value_spec in config_spec.init.items()
+    })
+    for key, value_spec in config_spec.attrs:
+        setattr(config, key, materialize_value(value_spec, config_class))
+    return config
+
+
+def _make_stand_in_function(module_name: str, func_name: str) -> typing.Callable:
+    def stand_in(event, context):  # pragma: no cover
+        raise NotImplementedError(
+            "{}.{} is a statically discovered stand-in, "
+            "it can't be invoked".format(module_name, func_name)
+        )
+
+    stand_in.__name__ = func_name
+    stand_in.__qualname__ = func_name
+    stand_in.__module__ = module_name
+    return stand_in
+
+
+def make_stand_in_module(module_name: str,
+                         module_file: str,
+                         module_spec: ModuleSpec,
+                         config_field: str,
+                         config_class: type) -> types.ModuleType:
+    """
+    Create a light weight module object that looks like the real module
+    to lbdrabbit, it has the handler functions and the config declared in
+    the source code.
+
+    The stand in module is NOT registered in ``sys.modules``.
+    """
+    py_module = types.ModuleType(module_name)
+    py_module.__file__ = module_file
+    py_module.__lbdrabbit_stand_in__ = True
+    if module_spec.module_config is not None:
+        setattr(
+            py_module, config_field,
+            materialize_config(module_spec.module_config, config_class),
+        )
+    for func_name in module_spec.handler_names:
+        py_handler_func = _make_stand_in_function(module_name, func_name)
+        if func_name in module_spec.func_configs:
+            setattr(
+                py_handler_func, config_field,
+                materialize_config(module_spec.func_configs[func_name], config_class),
+            )
+        setattr(py_module, func_name, py_handler_func)
+    return py_module
+
+
+def get_module_file(current_module) -> str:
+    """
+    :param current_module: ``picage.Package`` or ``picage.Module``
+    """
+    if isinstance(current_module, Package):
+        return os.path.join(current_module.path.abspath, "__init__.py")
+    else:
+        return current_module.path.abspath
+
+
+_stand_in_modules = dict()  # type: typing.Dict[str, types.ModuleType]
+"""
+Stand in modules cache. Works like ``sys.modules``, so the config attached
+to a stand in module survives multiple walks.
+"""
+
+
+def load_module_statically(module_name: str,
+                           module_file: str,
+                           is_package: bool,
+                           valid_func_name_list: typing.List[str],
+                           config_field: str,
+                           config_class: type) -> types.ModuleType:
+    """
+    Get the module object without importing it if possible. Return the
+    real module if it is already imported.
+
+    A stand in module is returned even if the real module has been imported
+    since then, for example by a child module which needs import. The
+    configs of the previous walks are absorbed into the stand in, the real
+    module is only a copy of the declaration.
+    """
+    if module_name in _stand_in_modules:
+        return _stand_in_modules[module_name]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    with open(module_file, "rb") as f:
+        source = f.read().decode("utf-8")
+    module_spec = parse_module_spec(
+        source=source,
+        module_name=module_name,
+        is_package=is_package,
+        valid_func_name_list=valid_func_name_list,
+        config_field=config_field,
+        config_class=config_class,
+        filename=module_file,
+    )
+    if module_spec.need_import:
+        return import_module(module_name)
+
+    py_module = make_stand_in_module(
+        module_name, module_file, module_spec, config_field, config_class,
+    )
+    _stand_in_modules[module_name] = py_module
+    return py_module
+
+
+def walk_lbd_handler_static(module_name: str,
+                            valid_func_name_list: typing.List[str],
+                            config_field: str,
+                            config_class: type,
+                            module_filter: ModuleFilter = None):
+    """
+    The static version of
+    :func:`~lbdrabbit.lbd_func_config.iterator.walk_lbd_handler`. Yields the
+    same ``(py_current_module, py_parent_module, py_handler_func)`` tuples,
+    but the module and handler function may be stand-ins created from the
+    source code.
+
+    **中文文档**
+
+    与 ``walk_lbd_handler`` 的返回值一致. 但对于能够被静态解析的模块, 返回的是替身
+    模块对象以及替身 handler 函数, 不会执行该模块中的任何代码.
+
+    :param module_filter: see
+        :class:`~lbdrabbit.lbd_func_config.iterator.ModuleFilter`
+    """
+    py_module_mapper = dict()
+    for (
+            current_module,
+            parent_module,
+            selected,
+    ) in walk_module_tree(module_name, module_filter):
+        py_current_module = load_module_statically(
+            module_name=current_module.fullname,
+            module_file=get_module_file(current_module),
+            is_package=isinstance(current_module, Package),
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+        )
+        py_module_mapper[current_module.fullname] = py_current_module
+        if parent_module is None:
+            py_parent_module = None
+        else:
+            py_parent_module = py_module_mapper[parent_module.fullname]
+
+        yield py_current_module, py_parent_module, None
+
+        if not selected:
+            continue
+        for func_name in valid_func_name_list:
+            if func_name in py_current_module.__dict__:
+                py_handler_func = getattr(py_current_module, func_name)
+                yield py_current_module, py_parent_module, py_handler_func
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whole tree config validation.
+
+Building the template stops at the first invalid config, and a resource
+which is turned on by its ``<resource_name>_yes`` flag but doesn't meet the
+conditions is silently skipped. :func:`validate_configs` checks every config
+in a :class:`~lbdrabbit.lbd_func_config.index.HandlerIndex` and collects all
+the problems in one :class:`ValidationReport`:
+
+- ``error``: a turned on resource failed its pre check, or failed to build
+  its aws object.
+- ``skipped``: a turned on resource is not created because a resource it
+  depends on is not ready or failed.
+
+Python API::
+
+    >>> from lbdrabbit.lbd_func_config.validation import validate_handler_tree
+    >>> report = validate_handler_tree("my_project.handlers")
+    >>> report.to_dict()
+    >>> print(report.render_table())
+    >>> report.raise_for_error()
+
+Command line::
+
+    $ lbdrabbit validate my_project.handlers
+
+**中文文档**
+
+一次性检查所有 handler 的配置, 收集所有的错误, 以及所有被打开 (``_yes = True``)
+但因为条件不满足而被静默跳过的资源, 生成一个完整的报告. 避免每次构建只能发现
+一个错误.
+"""
+
+import json
+import typing
+import attr
+
+from ..const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from .index import HandlerIndex
+from .base import config_inherit_handler
+from .lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    lbd_func_config_value_handler,
+)
+
+#: resources created from a module level config, others are created from
+#: a function level config
+MODULE_LEVEL_RESOURCES = ("apigw_resource",)
+
+
+class ConfigValidationError(ValueError):
+    """
+    Raised by :meth:`ValidationReport.raise_for_error`, the message lists
+    all errors.
+    """
+
+
+@attr.s
+class ValidationIssue(object):
+    """
+    :param identifier: the config identifier, for example
+        ``my_project.handlers.rest.users.get.__lbd_func_config__``
+    :param resource: resource name, for example ``apigw_method``
+    :param level: ``"error"`` or ``"skipped"``
+    """
+    identifier = attr.ib()  # type: str
+    resource = attr.ib()  # type: str
+    level = attr.ib()  # type: str
+    message = attr.ib()  # type: str
+
+    class Level(object):
+        error = "error"
+        skipped = "skipped"
+
+
+@attr.s
+class ValidationReport(object):
+    """
+    :param n_config: number of validated configs.
+    :param issues: all problems, in handler tree order.
+    """
+    module_name = attr.ib()  # type: str
+    n_config = attr.ib(default=0)  # type: int
+    issues = attr.ib(factory=list)  # type: typing.List[ValidationIssue]
+
+    @property
+    def errors(self) -> typing.List[ValidationIssue]:
+        return [
+            issue for issue in self.issues
+            if issue.level == ValidationIssue.Level.error
+        ]
+
+    @property
+    def skipped(self) -> typing.List[ValidationIssue]:
+        return [
+            issue for issue in self.issues
+            if issue.level == ValidationIssue.Level.skipped
+        ]
+
+    @property
+    def has_error(self) -> bool:
+        return len(self.errors) > 0
+
+    def to_dict(self) -> dict:
+        return attr.asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4)
+
+    def render_table(self) -> str:
+        lines = [
+            "validated {} configs of {!r}: {} errors, {} skipped".format(
+                self.n_config, self.module_name,
+                len(self.errors), len(self.skipped)),
+        ]
+        if self.issues:
+            lines.append("{:<8} {:<36} {}".format("level", "resource", "config"))
+            for issue in self.issues:
+                lines.append("{:<8} {:<36} {}".format(
+                    issue.level, issue.resource, issue.identifier))
+                lines.append("{:<8} {:<36}   {}".format("", "", issue.message))
+        return "\n".join(lines)
+
+    def raise_for_error(self):
+        """
+        :raises ConfigValidationError: if there's any error.
+        """
+        if self.has_error:
+            raise ConfigValidationError("{} invalid config values:\n{}".format(
+                len(self.errors),
+                "\n".join([
+                    "- {} ({}): {}".format(issue.identifier, issue.resource, issue.message)
+                    for issue in self.errors
+                ]),
+            ))
+
+
+def _get_pre_check(config: LbdFuncConfig, resource: str):
+    """
+    Access ``<resource>_aws_object_pre_check``, or
+    ``<resource>_aws_objects_pre_check`` for the resources created as a dict
+    of aws objects.
+    """
+    for template in ("{}_aws_object_pre_check", "{}_aws_objects_pre_check"):
+        name = template.format(resource)
+        if hasattr(config.__class__, name):
+            return getattr(config, name)
+    raise AttributeError("{}_aws_object_pre_check".format(resource))
+
+
+def _describe_exception(e: Exception) -> str:
+    return "{}: {}".format(e.__class__.__name__, e)
+
+
+def _pre_check_message(config: LbdFuncConfig, resource: str) -> str:
+    try:
+        pre_check = _get_pre_check(config, resource)
+    except AttributeError:  # a resource kind registered without pre check
+        return "{} is not valid".format(resource)
+    try:
+        pre_check()
+    except Exception as e:
+        return _describe_exception(e)
+    return "pre check failed"
+
+
+def validate_config(config: LbdFuncConfig,
+                    build: bool = True) -> typing.List[ValidationIssue]:
+    """
+    Validate the resources turned on in a single config, the config values
+    has to be derived by
+    :func:`~lbdrabbit.lbd_func_config.lbd_func_config.lbd_func_config_value_handler`.
+
+    :param build: if True, also build the aws object of every ready
+        resource, the aws objects are cached on the config and reused by the
+        template creation.
+    """
+    issues = list()
+    identifier = config.identifier
+    is_function = config.is_function()
+    readiness = config.readiness
+    requested = dict()  # type: typing.Dict[str, bool]
+    failed = list()  # type: typing.List[str]
+
+    for builder in config.builder_registry.ordered:
+        if is_function is (builder.name in MODULE_LEVEL_RESOURCES):
+            continue
+        if builder.name == "apigw_resource" and not config.rel_module_name:
+            continue  # root module, it is the RestApi
+        if builder.yes_field is None:
+            # without a yes field, the check tells if the resource is wanted,
+            # for example the scalable target of an alias without scaling
+            # actions
+            wanted = builder.check is None or getattr(config, builder.check)()
+        else:
+            wanted = getattr(config, builder.yes_field) is True
+        requested[builder.name] = wanted \
+            and all([requested.get(dep, False) for dep in builder.depends_on])
+        if not requested[builder.name]:
+            continue
+
+        if not readiness[builder.name]:
+            if builder.check is not None and not getattr(config, builder.check)():
+                level = ValidationIssue.Level.error
+                message = _pre_check_message(config, builder.name)
+            else:
+                level = ValidationIssue.Level.skipped
+                message = "depends on {} which is not ready".format(
+                    ", ".join([dep for dep in builder.depends_on if not readiness[dep]]))
+        elif [dep for dep in builder.depends_on if dep in failed]:
+            level = ValidationIssue.Level.skipped
+            message = "depends on {} which failed".format(
+                ", ".join([dep for dep in builder.depends_on if dep in failed]))
+        elif build:
+            try:
+                config.get_aws_object(builder.name)
+                continue
+            except Exception as e:
+                level = ValidationIssue.Level.error
+                message = _describe_exception(e)
+        else:
+            continue
+
+        failed.append(builder.name)
+        issues.append(ValidationIssue(
+            identifier=identifier,
+            resource=builder.name,
+            level=level,
+            message=message,
+        ))
+    return issues
+
+
+def validate_configs(handler_index: HandlerIndex,
+                     config_field: str = DEFAULT_LBD_FUNC_CONFIG_FIELD,
+                     build: bool = True) -> ValidationReport:
+    """
+    Validate every config in the handler index, and collect all problems
+    in one report. Nothing is raised.
+
+    :param build: see :func:`validate_config`
+    """
+    report = ValidationReport(module_name=handler_index.module_name)
+    for config in handler_index.iter_configs(config_field):  # type: LbdFuncConfig
+        report.n_config += 1
+        report.issues.extend(validate_config(config, build=build))
+    return report
+
+
+def validate_handler_tree(module_name: str,
+                          valid_func_name_list: typing.List[str] = None,
+                          config_field: str = None,
+                          config_class: typing.Type[LbdFuncConfig] = None,
+                          default_lbd_handler_name: str = None,
+                          static: bool = False,
+                          handler_index: HandlerIndex = None,
+                          build: bool = True) -> ValidationReport:
+    """
+    Run the inherit and derive phases, then validate every config.
+
+    :param handler_index: reuse an existing handler index instead of walking
+        the handler tree again.
+    """
+    if valid_func_name_list is None:
+        valid_func_name_list = VALID_LBD_HANDLER_FUNC_NAME_LIST
+    if config_field is None:
+        config_field = DEFAULT_LBD_FUNC_CONFIG_FIELD
+    if config_class is None:
+        config_class = LbdFuncConfig
+    if default_lbd_handler_name is None:
+        default_lbd_handler_name = DEFAULT_LBD_HANDLER_FUNC_NAME
+    if handler_index is None:
+        handler_index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=valid_func_name_list,
+            config_field=config_field,
+            config_class=config_class,
+            static=static,
+        )
+    kwargs = dict(
+        module_name=module_name,
+        config_field=config_field,
+        config_class=config_class,
+        valid_func_name_list=valid_func_name_list,
+        handler_index=handler_index,
+    )
+    config_inherit_handler(**kwargs)
+    lbd_func_config_value_handler(
+        default_lbd_handler_name=default_lbd_handler_name, **kwargs)
+    return validate_configs(handler_index, config_field=config_field, build=build)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lazy chained config views.
+
+By default :func:`~lbdrabbit.lbd_func_config.base.config_inherit_handler`
+copies every inherited value onto the child config. In view mode, a child
+config is linked to its parent config instead:
+
+- an unset (Sentinel) public field is removed from the child instance, the
+  first attribute access resolves it through the function -> module ->
+  parent package chain, and memoizes the value on the child.
+- setting a field on a config invalidates the memoized values of that field
+  below it, the next access resolves it again. So you can change a root
+  setting, for example ``lbd_func_runtime``, and regenerate the template
+  without running ``config_inherit_handler`` over the whole tree again.
+- private fields (derived state, for example the aws object caches) are not
+  inherited. When an inherited value is invalidated, the aws object caches
+  of the affected config are reset.
+
+The link is stored on the config itself, in the private ``_view_link``
+field of :class:`~lbdrabbit.lbd_func_config.base.BaseConfig`, it goes away
+with the config.
+
+**中文文档**
+
+惰性的配置继承. 子配置不再复制母配置的值, 而是在第一次访问时沿着 函数 -> 模块 ->
+母包 的链条查找并缓存. 修改母配置的值时, 子配置中继承而来的缓存值会被清除.
+"""
+
+import typing
+import attr
+from troposphere_mate.core.sentiel import Sentinel, NOTHING
+
+
+@attr.s
+class ViewLink(object):
+    """
+    :param parent: the parent config
+    :param children: the child configs linked to this config
+    :param unset: field name -> the original Sentinel value, for the fields
+        resolved through the parent.
+    :param inherited: names of the fields memoized from the parent.
+    """
+    parent = attr.ib()
+    children = attr.ib(factory=list)  # type: typing.List[typing.Any]
+    unset = attr.ib(factory=dict)  # type: typing.Dict[str, typing.Any]
+    inherited = attr.ib(factory=set)  # type: typing.Set[str]
+
+
+def get_view_link(config) -> typing.Union[ViewLink, None]:
+    try:
+        link = object.__getattribute__(config, "_view_link")
+    except AttributeError:  # not initialized yet
+        return None
+    return None if link is NOTHING else link
+
+
+def _set_view_link(config, link: typing.Union[ViewLink, None]):
+    object.__setattr__(config, "_view_link", NOTHING if link is None else link)
+
+
+def is_view(config) -> bool:
+    return get_view_link(config) is not None
+
+
+def link_config(child, parent, field_names: typing.Iterable[str]):
+    """
+    Let ``child`` resolve its unset fields through ``parent``.
+
+    :param field_names: public field names of the child config.
+    """
+    children = list()
+    if is_view(child):
+        unlink_config(child)
+        if is_view(child):
+            children = get_view_link(child).children
+    link = ViewLink(parent=parent, children=children)
+    for key in field_names:
+        value = getattr(child, key)
+        if isinstance(value, Sentinel):
+            link.unset[key] = value
+            object.__delattr__(child, key)
+    _set_view_link(child, link)
+    parent_link = get_view_link(parent)
+    if parent_link is None:
+        parent_link = ViewLink(parent=None)
+        _set_view_link(parent, parent_link)
+    parent_link.children.append(child)
+
+
+def unlink_config(child):
+    """
+    Materialize the resolved values and remove the link.
+    """
+    link = get_view_link(child)
+    if link is None:
+        return
+    for key in list(link.unset):
+        getattr(child, key)  # resolve and memoize
+    if link.parent is not None:
+        parent_link = get_view_link(link.parent)
+        if parent_link is not None:
+            parent_link.children = [
+                c for c in parent_link.children if c is not child]
+    if link.children:
+        _set_view_link(child, ViewLink(parent=None, children=link.children))
+    else:
+        _set_view_link(child, None)
+
+
+def clear_views(configs: typing.Iterable):
+    """
+    Remove the links of the configs, memoized values stay on the configs,
+    unresolved fields get their original Sentinel value back.
+    """
+    configs = list(configs)
+    for config in configs:
+        link = get_view_link(config)
+        if link is None:
+            continue
+        for key, value in link.unset.items():
+            if key not in link.inherited:
+                object.__setattr__(config, key, value)
+    for config in configs:
+        _set_view_link(config, None)
+
+
+def resolve(config, name: str):
+    """
+    Resolve an unset field through the parent chain, memoize the value.
+
+    :raises AttributeError: if ``name`` is not resolved through a parent.
+    """
+    link = get_view_link(config)
+    if link is None or link.parent is None or name not in link.unset:
+        raise AttributeError(name)
+    parent = link.parent
+    value = getattr(parent, name, link.unset[name])
+    object.__setattr__(config, name, value)
+    link.inherited.add(name)
+    return value
+
+
+def _reset_aws_object_cache(config):
+    for field in attr.fields(config.__class__):
+        if field.name.startswith("_") and field.name.endswith("_cache"):
+            object.__setattr__(config, field.name, NOTHING)
+
+
+def invalidate(config, name: str):
+    """
+    Called after ``config.<name>`` is set, discard the memoized values of
+    this field below this config.
+    """
+    link = get_view_link(config)
+    if link is None:
+        return
+    if link.parent is not None and name in link.unset:
+        # explicitly set, not inherited any more
+        del link.unset[name]
+        link.inherited.discard(name)
+    _invalidate_children(link, name)
+
+
+def _invalidate_children(link: ViewLink, name: str):
+    for child in link.children:
+        child_link = get_view_link(child)
+        if child_link is None or name not in child_link.inherited:
+            continue
+        object.__delattr__(child, name)
+        child_link.inherited.discard(name)
+        _reset_aws_object_cache(child)
+        _invalidate_children(child_link, name)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lightweight lambda runtime surface.
+
+The handler modules declare their config at import time, for example
+``__lbd_func_config__ = LbdFuncConfig(lbd_func_timeout=30)``. The config is
+only used to build the CloudFormation template, but the real
+:class:`~lbdrabbit.lbd_func_config.lbd_func_config.LbdFuncConfig` imports
+``troposphere_mate``, ``picage``, ``constant2`` and ``attrs``, which slows
+down every cold start.
+
+It is opt-in. Set the environment variable ``LBDRABBIT_RUNTIME_RECORDER``
+to ``"true"`` on the lambda functions (for example in
+``LbdFuncConfig.lbd_func_environment_vars``), then ``import lbdrabbit``
+doesn't load the template building modules, and
+``from lbdrabbit import LbdFuncConfig`` returns the :class:`LbdFuncConfig`
+recorder of this module. It accepts the same declarations, records the
+values, and doesn't import anything. Without the variable, for example a
+template build running in a lambda function, nothing changes.
+
+**中文文档**
+
+在 Lambda 函数上设置环境变量 ``LBDRABBIT_RUNTIME_RECORDER=true`` 后,
+``from lbdrabbit import LbdFuncConfig`` 返回一个轻量的记录器, 只记录配置的值,
+不 import 任何构建模板时才需要的重量级依赖, 以减少冷启动的时间. 未设置时行为不变.
+"""
+
+import os
+
+
+#: set it to "true" to use the recorder in ``from lbdrabbit import LbdFuncConfig``
+RUNTIME_RECORDER_ENV_VAR = "LBDRABBIT_RUNTIME_RECORDER"
+
+
+def is_runtime_recorder_enabled() -> bool:
+    return os.environ.get(RUNTIME_RECORDER_ENV_VAR, "").lower() == "true"
+
+
+class _Anything(object):
+    """
+    Any attribute and any call returns itself, stands for the nested
+    constants and helpers used in the declarations, for example
+    ``LbdFuncConfig.ApiMethodIntType.html``.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __repr__(self):
+        return "<lbdrabbit.runtime.anything>"
+
+
+anything = _Anything()
+
+
+class _LbdFuncConfigMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return anything
+
+
+class LbdFuncConfig(object, metaclass=_LbdFuncConfigMeta):
+    """
+    No-op recorder of the config declarations.
+    """
+    __slots__ = ("_values",)
+
+    def __init__(self, **kwargs):
+        object.__setattr__(self, "_values", dict(kwargs))
+
+    def __setattr__(self, name, value):
+        self._values[name] = value
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_values":
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            return anything
+
+    def __repr__(self):
+        return "LbdFuncConfig({})".format(
+            ", ".join(["{}={!r}".format(k, v) for k, v in self._values.items()]))
@@ -1,6 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import os
+import json
+import tempfile
+
+from troposphere_mate import Template
+
+from .boto_client import get_client
 from .pkg.fingerprint import fingerprint
+from .template_diff import DeploySnapshot, diff_templates
+from .template_writer import write_template
+
+DEFAULT_DEPLOY_SNAPSHOT_DIR = os.path.join(".lbdrabbit", "deployed")
 
 
 def upload_cf_template(boto_ses,
@@ -10,6 +21,8 @@ def upload_cf_template(boto_ses,
                        format_is_json=True):
     """
     Upload cloudformation template to s3 bucket and returns template url.
+    The s3 client is created once per session and reused, see
+    :mod:`lbdrabbit.boto_client`.
 
     :type boto_ses:
     :type template_content: str
@@ -19,15 +32,13 @@ def upload_cf_template(boto_ses,
 
     :rtype: str
     """
-    s3_client = boto_ses.client("s3")
+    s3_client = get_client("s3", boto_ses=boto_ses)
     fname = fingerprint.of_text(template_content)
-    if prefix.endswith("/"):
-        prefix = prefix[:-1]
     if format_is_json:
         ext = "json"
     else:
         ext = "yml"
-    s3_key = "{}/{}.{}".format(prefix, fname, ext)
+    s3_key = _get_template_s3_key(prefix, fname, ext)
     s3_client.put_object(
         Body=template_content,
         Bucket=bucket_name,
@@ -37,13 +48,88 @@ def upload_cf_template(boto_ses,
     return template_url
 
 
+def _get_template_s3_key(prefix, fname, ext):
+    if prefix.endswith("/"):
+        prefix = prefix[:-1]
+    return "{}/{}.{}".format(prefix, fname, ext)
+
+
+def upload_cf_template_stream(boto_ses,
+                              template,
+                              bucket_name,
+                              prefix,
+                              max_memory_size=8 * 1024 * 1024):
+    """
+    Streaming version of :func:`upload_cf_template`, serialize the template
+    resource by resource into a spooled temporary file, and upload the same
+    buffer. The s3 key is the same as
+    ``upload_cf_template(template_content=template.to_json())``.
+
+    :type boto_ses:
+    :type template: troposphere_mate.Template
+    :type bucket_name: str
+    :type prefix: str
+    :type max_memory_size: int
+    :param max_memory_size: the buffer is rolled over to a temp file on
+        disk if the template is larger than this.
+
+    :rtype: str
+    """
+    s3_client = get_client("s3", boto_ses=boto_ses)
+    with tempfile.SpooledTemporaryFile(max_size=max_memory_size) as f:
+        result = write_template(template, f)
+        f.seek(0)
+        s3_key = _get_template_s3_key(prefix, result.fingerprint, "json")
+        s3_client.put_object(
+            Body=f,
+            Bucket=bucket_name,
+            Key=s3_key,
+        )
+    template_url = "https://s3.amazonaws.com/{}/{}".format(bucket_name, s3_key)
+    return template_url
+
+
+def upload_sharded_cf_template(boto_ses,
+                               sharded_template,
+                               bucket_name,
+                               prefix):
+    """
+    Upload the nested stack templates, then the master template with the
+    nested stack template urls, returns the master template url.
+
+    :type boto_ses:
+    :type sharded_template: lbdrabbit.lbd_func_config.shard.ShardedTemplate
+    :type bucket_name: str
+    :type prefix: str
+
+    :rtype: str
+    """
+    from .lbd_func_config.shard import dumps
+
+    template_urls = dict()
+    for name, shard in sharded_template.shards.items():
+        template_urls[name] = upload_cf_template(
+            boto_ses=boto_ses,
+            template_content=dumps(shard),
+            bucket_name=bucket_name,
+            prefix=prefix,
+        )
+    sharded_template.set_template_urls(template_urls)
+    return upload_cf_template(
+        boto_ses=boto_ses,
+        template_content=dumps(sharded_template.master),
+        bucket_name=bucket_name,
+        prefix=prefix,
+    )
+
+
 def deploy_stack(boto_ses,
                  stack_name,
                  template_url,
                  stack_tags,
                  stack_parameters,
                  execution_role_arn=None):
-    cf_client = boto_ses.client("cloudformation")
+    cf_client = get_client("cloudformation", boto_ses=boto_ses)
     try:
         res = cf_client.describe_stacks(
             StackName=stack_name
@@ -80,6 +166,117 @@ def deploy_stack(boto_ses,
     return res
 
 
+def wait_stack_deployed(boto_ses, stack_name):
+    """
+    Wait until the stack create / update in progress completes.
+
+    :raises botocore.exceptions.WaiterError: if the deploy failed or was
+        rolled back.
+    """
+    cf_client = get_client("cloudformation", boto_ses=boto_ses)
+    res = cf_client.describe_stacks(StackName=stack_name)
+    stack_status = res["Stacks"][0].get("StackStatus", "")
+    if stack_status.startswith("CREATE_"):
+        waiter_name = "stack_create_complete"
+    else:
+        waiter_name = "stack_update_complete"
+    cf_client.get_waiter(waiter_name).wait(StackName=stack_name)
+
+
+def deploy_stack_if_changed(boto_ses,
+                            stack_name,
+                            template_content,
+                            bucket_name,
+                            prefix,
+                            stack_tags,
+                            stack_parameters,
+                            snapshot_path=None,
+                            previous_template_path=None,
+                            execution_role_arn=None):
+    """
+    Compare the template with the last deployed one, upload the template
+    and create / update the stack only if anything changed. The deploy
+    snapshot is written after the stack create / update completes, a failed
+    or rolled back deploy raises and is deployed again next time.
+
+    :type boto_ses:
+    :type stack_name: str
+    :type template_content: typing.Union[str, troposphere_mate.Template]
+    :param template_content: the new template in json, or the template
+        object, which is serialized and uploaded by
+        :func:`upload_cf_template_stream` without building the json string.
+    :type bucket_name: str
+    :type prefix: str
+    :type stack_tags: list
+    :type stack_parameters: list
+    :type snapshot_path: str
+    :param snapshot_path: default is ``.lbdrabbit/deployed/<stack_name>.json``
+    :type previous_template_path: str
+    :param previous_template_path: compare with this template file instead
+        of the snapshot, the stack parameters and tags are not compared.
+
+    :rtype: lbdrabbit.template_diff.TemplateDiff
+    :return: the diff, ``diff.has_change`` is False if the deploy is skipped.
+
+    **中文文档**
+
+    部署前与上一次部署的模板对比, 没有变化时跳过上传模板以及更新 Stack.
+    """
+    if snapshot_path is None:
+        snapshot_path = os.path.join(
+            DEFAULT_DEPLOY_SNAPSHOT_DIR, "{}.json".format(stack_name))
+    previous = DeploySnapshot.from_file(previous_template_path or snapshot_path)
+    if isinstance(template_content, Template):
+        template = template_content.to_dict()
+    else:
+        template = json.loads(template_content)
+    diff = diff_templates(
+        None if previous is None else previous.template, template)
+
+    if previous is not None and not diff.has_change:
+        same_parameters = previous.stack_parameters is None \
+                          or previous.stack_parameters == stack_parameters
+        same_tags = previous.stack_tags is None \
+                    or previous.stack_tags == stack_tags
+        if same_parameters and same_tags:
+            return diff
+
+    if isinstance(template_content, Template):
+        template_url = upload_cf_template_stream(
+            boto_ses=boto_ses,
+            template=template_content,
+            bucket_name=bucket_name,
+            prefix=prefix,
+        )
+    else:
+        template_url = upload_cf_template(
+            boto_ses=boto_ses,
+            template_content=template_content,
+            bucket_name=bucket_name,
+            prefix=prefix,
+        )
+    try:
+        deploy_stack(
+            boto_ses=boto_ses,
+            stack_name=stack_name,
+            template_url=template_url,
+            stack_tags=stack_tags,
+            stack_parameters=stack_parameters,
+            execution_role_arn=execution_role_arn,
+        )
+    except Exception as e:
+        if "No updates are to be performed" not in str(e):
+            raise
+    else:
+        wait_stack_deployed(boto_ses=boto_ses, stack_name=stack_name)
+    DeploySnapshot(
+        template=template,
+        stack_parameters=stack_parameters,
+        stack_tags=stack_tags,
+    ).to_file(snapshot_path)
+    return diff
+
+
 def deploy_stack_set(boto_ses,
                      stack_set_name,
                      template_url,
@@ -88,7 +285,7 @@ def deploy_stack_set(boto_ses,
                      stack_set_admin_role,
                      accounts,
                      regions):
-    cf_client = boto_ses.client("cloudformation")
+    cf_client = get_client("cloudformation", boto_ses=boto_ses)
     try:
         res_describe_stack_set = cf_client.describe_stack_set(
             StackSetName=stack_set_name
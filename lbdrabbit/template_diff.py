@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compare a newly generated CloudFormation template with the last deployed one.
+
+The previous template is loaded from a local snapshot, written by
+:func:`~lbdrabbit.stack.deploy_stack_if_changed` after a successful deploy,
+or from any supplied template file. :func:`diff_templates` compares the
+resources by logical id and properties:
+
+- ``added``, ``removed``: logical ids only in the new / old template.
+- ``modified``: same logical id, different type, properties or resource
+  attributes (``DependsOn``, ``DeletionPolicy``, ...), with the changed
+  paths. A changed type, or a changed property known to force a
+  replacement, is flagged.
+- ``renamed``: a removed and an added resource of the same type, with the
+  same properties or the same physical name. CloudFormation treats a
+  renamed logical id as delete + create, the resource is replaced.
+
+If nothing changed, the upload and the stack update can be skipped.
+
+Example::
+
+    >>> from lbdrabbit.template_diff import DeploySnapshot, diff_templates
+    >>> previous = DeploySnapshot.from_file(".lbdrabbit/deployed.json")
+    >>> diff = diff_templates(previous.template, template.to_dict())
+    >>> print(diff.render_table())
+
+**中文文档**
+
+部署前对比新生成的模板和上一次部署的模板, 列出新增, 删除, 修改的资源, 并标记
+会导致资源被替换的 Logic Id 重命名. 没有任何变化时可以跳过上传和更新 Stack.
+"""
+
+import os
+import json
+import typing
+import attr
+
+#: properties whose change forces a replacement, by resource type
+REPLACEMENT_PROPERTIES = {
+    "AWS::ApiGateway::Authorizer": ("RestApiId",),
+    "AWS::ApiGateway::Method": ("HttpMethod", "ResourceId", "RestApiId"),
+    "AWS::ApiGateway::Resource": ("ParentId", "PathPart", "RestApiId"),
+    "AWS::Events::Rule": ("Name",),
+    "AWS::IAM::Role": ("Path", "RoleName"),
+    "AWS::Lambda::Function": ("FunctionName",),
+    "AWS::Lambda::Permission": ("Action", "EventSourceToken", "FunctionName",
+                                "Principal", "SourceAccount", "SourceArn"),
+    "AWS::S3::Bucket": ("BucketName",),
+}
+
+#: the property holds the physical name, by resource type
+NAME_PROPERTIES = {
+    "AWS::ApiGateway::Authorizer": "Name",
+    "AWS::ApiGateway::RestApi": "Name",
+    "AWS::Events::Rule": "Name",
+    "AWS::IAM::Role": "RoleName",
+    "AWS::Lambda::Function": "FunctionName",
+    "AWS::S3::Bucket": "BucketName",
+}
+
+#: template sections other than ``Resources``
+OTHER_SECTIONS = (
+    "AWSTemplateFormatVersion", "Transform", "Description", "Metadata",
+    "Parameters", "Mappings", "Conditions", "Outputs",
+)
+
+
+def _changed_paths(old, new, prefix: str = "") -> typing.List[str]:
+    """
+    Paths of the changed values between two json values.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths = list()
+        for key in sorted(set(old).union(new)):
+            path = "{}.{}".format(prefix, key) if prefix else key
+            if key not in old or key not in new:
+                paths.append(path)
+            else:
+                paths.extend(_changed_paths(old[key], new[key], path))
+        return paths
+    if old != new:
+        return [prefix, ]
+    return list()
+
+
+@attr.s
+class ResourceChange(object):
+    """
+    :param logical_id: logical id in the new template, or in the old template
+        if it is removed.
+    :param resource_type: for example ``AWS::Lambda::Function``
+    :param old_logical_id: the logical id in the old template, if renamed.
+    :param paths: changed paths, for example ``Properties.Timeout``
+    :param replacement: True if the change replaces the resource.
+    """
+    logical_id = attr.ib()  # type: str
+    resource_type = attr.ib()  # type: str
+    old_logical_id = attr.ib(default=None)  # type: str
+    paths = attr.ib(factory=list)  # type: typing.List[str]
+    replacement = attr.ib(default=False)  # type: bool
+
+
+@attr.s
+class TemplateDiff(object):
+    """
+    The result of :func:`diff_templates`.
+
+    :param sections: changed template sections other than ``Resources``,
+        for example ``Parameters``.
+    """
+    added = attr.ib(factory=list)  # type: typing.List[ResourceChange]
+    removed = attr.ib(factory=list)  # type: typing.List[ResourceChange]
+    modified = attr.ib(factory=list)  # type: typing.List[ResourceChange]
+    renamed = attr.ib(factory=list)  # type: typing.List[ResourceChange]
+    sections = attr.ib(factory=list)  # type: typing.List[str]
+
+    @property
+    def has_change(self) -> bool:
+        return bool(self.added or self.removed or self.modified
+                    or self.renamed or self.sections)
+
+    @property
+    def replacements(self) -> typing.List[ResourceChange]:
+        """
+        Changes that replace an existing resource.
+        """
+        return [
+            change for change in self.modified + self.renamed
+            if change.replacement
+        ]
+
+    def to_dict(self) -> dict:
+        return attr.asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4)
+
+    def render_table(self) -> str:
+        if not self.has_change:
+            return "no changes"
+        lines = ["{} added, {} removed, {} modified, {} renamed, {} replacements".format(
+            len(self.added), len(self.removed), len(self.modified),
+            len(self.renamed), len(self.replacements),
+        )]
+        for sign, changes in [
+            ("+", self.added), ("-", self.removed),
+            ("~", self.modified), ("R", self.renamed),
+        ]:
+            for change in changes:
+                if change.old_logical_id is not None:
+                    name = "{} -> {}".format(change.old_logical_id, change.logical_id)
+                else:
+                    name = change.logical_id
+                lines.append("{} {:<36} {}{}".format(
+                    sign, change.resource_type, name,
+                    " (replacement)" if change.replacement else ""))
+                for path in change.paths:
+                    lines.append("    {}".format(path))
+        for section in self.sections:
+            lines.append("~ {}".format(section))
+        return "\n".join(lines)
+
+
+def _is_renamed(old_resource: dict, new_resource: dict) -> bool:
+    old_props = old_resource.get("Properties", dict())
+    new_props = new_resource.get("Properties", dict())
+    if old_props == new_props:
+        return True
+    name_property = NAME_PROPERTIES.get(new_resource.get("Type"))
+    if name_property is not None and name_property in new_props:
+        return old_props.get(name_property) == new_props[name_property]
+    return False
+
+
+def diff_templates(old: dict, new: dict) -> TemplateDiff:
+    """
+    Compare two templates, as dict.
+
+    :param old: the deployed template, None if never deployed.
+    :param new: the newly generated template.
+    """
+    if old is None:
+        old = dict()
+    diff = TemplateDiff()
+    old_resources = old.get("Resources", dict())
+    new_resources = new.get("Resources", dict())
+
+    removed = [
+        logical_id for logical_id in old_resources
+        if logical_id not in new_resources
+    ]
+    for logical_id, new_resource in new_resources.items():
+        resource_type = new_resource.get("Type")
+        if logical_id not in old_resources:
+            for old_logical_id in removed:
+                old_resource = old_resources[old_logical_id]
+                if old_resource.get("Type") == resource_type \
+                        and _is_renamed(old_resource, new_resource):
+                    removed.remove(old_logical_id)
+                    diff.renamed.append(ResourceChange(
+                        logical_id=logical_id,
+                        resource_type=resource_type,
+                        old_logical_id=old_logical_id,
+                        paths=_changed_paths(old_resource, new_resource),
+                        replacement=True,
+                    ))
+                    break
+            else:
+                diff.added.append(ResourceChange(
+                    logical_id=logical_id, resource_type=resource_type))
+            continue
+
+        old_resource = old_resources[logical_id]
+        paths = _changed_paths(old_resource, new_resource)
+        if not paths:
+            continue
+        replacement_paths = [
+            "Properties.{}".format(name)
+            for name in REPLACEMENT_PROPERTIES.get(resource_type, ())
+        ]
+        replacement = ("Type" in paths) or bool([
+            path for path in paths
+            if [p for p in replacement_paths if path == p or path.startswith(p + ".")]
+        ])
+        diff.modified.append(ResourceChange(
+            logical_id=logical_id,
+            resource_type=resource_type,
+            paths=paths,
+            replacement=replacement,
+        ))
+
+    for logical_id in removed:
+        diff.removed.append(ResourceChange(
+            logical_id=logical_id,
+            resource_type=old_resources[logical_id].get("Type"),
+        ))
+
+    for section in OTHER_SECTIONS:
+        if old.get(section) != new.get(section):
+            diff.sections.append(section)
+    return diff
+
+
+@attr.s
+class DeploySnapshot(object):
+    """
+    What has been deployed to a stack.
+
+    :param template: the deployed template, as dict.
+    :param stack_parameters: the ``Parameters`` of the last stack update,
+        None if unknown.
+    :param stack_tags: the ``Tags`` of the last stack update, None if unknown.
+    """
+    template = attr.ib()  # type: dict
+    stack_parameters = attr.ib(default=None)  # type: typing.List[dict]
+    stack_tags = attr.ib(default=None)  # type: typing.List[dict]
+
+    @classmethod
+    def from_file(cls, path: str) -> typing.Union['DeploySnapshot', None]:
+        """
+        Load a snapshot, or a plain template file. None if the file doesn't
+        exist.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+        if "template" in data and "Resources" not in data:
+            return cls(**data)
+        return cls(template=data)
+
+    def to_file(self, path: str):
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(attr.asdict(self), indent=2).encode("utf-8"))
+        os.replace(tmp_path, path)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming JSON template writer.
+
+``Template.to_json()`` encodes the whole template to a dict, then dumps it
+to one string, and the string is encoded again to bytes to hash and upload.
+:func:`write_template` serializes the template section by section and
+resource by resource, writes the bytes to a binary file object, and computes
+the fingerprint on the fly. Peak memory is bounded by the largest single
+resource.
+
+The output is identical to ``Template.to_json()`` with the default
+arguments (``indent=4``, ``sort_keys=True``), the fingerprint is identical
+to ``fingerprint.of_text(template.to_json())``.
+
+Example::
+
+    >>> from lbdrabbit.template_writer import write_template_file
+    >>> result = write_template_file(template, "master.json")
+    >>> result.fingerprint, result.size
+
+**中文文档**
+
+流式的 JSON 模板序列化. 逐个资源地将模板写入文件或缓冲区, 同时计算指纹, 内存
+峰值只取决于最大的单个资源, 而不是整个模板. 输出与 ``Template.to_json()`` 完全
+一致.
+"""
+
+import json
+import typing
+import attr
+from troposphere import encode_to_dict
+from troposphere_mate import Template
+
+from .pkg.fingerprint import fingerprint
+
+
+@attr.s
+class WriteResult(object):
+    """
+    :param fingerprint: hash of the written bytes, same algorithm as
+        :data:`lbdrabbit.pkg.fingerprint.fingerprint`.
+    :param size: number of written bytes.
+    """
+    fingerprint = attr.ib()  # type: str
+    size = attr.ib()  # type: int
+
+
+def _dumps(value, indent: int, level: int) -> str:
+    """
+    Dump a json value nested at ``level``, json strings never contain a raw
+    new line, so the lines can be indented by a plain replace.
+    """
+    content = json.dumps(value, indent=indent, sort_keys=True, separators=(",", ": "))
+    return content.replace("\n", "\n" + " " * (indent * level))
+
+
+def _get_sections(template: Template) -> dict:
+    """
+    Template sections other than ``Resources``, same as
+    ``Template.to_dict()``.
+    """
+    sections = dict()
+    if template.description:
+        sections["Description"] = template.description
+    if template.metadata:
+        sections["Metadata"] = template.metadata
+    if template.conditions:
+        sections["Conditions"] = template.conditions
+    if template.mappings:
+        sections["Mappings"] = template.mappings
+    if template.outputs:
+        sections["Outputs"] = template.outputs
+    if template.parameters:
+        sections["Parameters"] = template.parameters
+    if template.version:
+        sections["AWSTemplateFormatVersion"] = template.version
+    if template.transform:
+        sections["Transform"] = template.transform
+    return sections
+
+
+def iter_template_json(template: Template, indent: int = 4) -> typing.Iterator[str]:
+    """
+    Yield the json of the template in chunks, a resource is encoded only
+    when it is written.
+    """
+    sections = _get_sections(template)
+    pad = " " * indent
+    yield "{"
+    for i, key in enumerate(sorted(list(sections) + ["Resources", ])):
+        yield "{}\n{}{}: ".format("," if i else "", pad, json.dumps(key))
+        if key != "Resources":
+            yield _dumps(encode_to_dict(sections[key]), indent, 1)
+            continue
+        if not template.resources:
+            yield "{}"
+            continue
+        yield "{"
+        for j, title in enumerate(sorted(template.resources)):
+            yield "{}\n{}{}: {}".format(
+                "," if j else "", pad * 2, json.dumps(title),
+                _dumps(encode_to_dict(template.resources[title]), indent, 2),
+            )
+        yield "\n{}}}".format(pad)
+    yield "\n}"
+
+
+def write_template(template: Template,
+                   fileobj: typing.BinaryIO,
+                   indent: int = 4) -> WriteResult:
+    """
+    Write the template json to a binary file object, for example a file
+    opened in ``"wb"`` mode or a ``io.BytesIO``.
+    """
+    m = fingerprint.hash_algo()
+    size = 0
+    for chunk in iter_template_json(template, indent=indent):
+        data = chunk.encode("utf-8")
+        m.update(data)
+        fileobj.write(data)
+        size += len(data)
+    return WriteResult(fingerprint=fingerprint.digest(m), size=size)
+
+
+def write_template_file(template: Template,
+                        path: str,
+                        indent: int = 4) -> WriteResult:
+    """
+    Streaming version of ``Template.to_file(path)``.
+    """
+    template.set_version()
+    with open(path, "wb") as f:
+        return write_template(template, f, indent=indent)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""
+Handler modules with invalid configs, for validation testing.
+"""
+
+from troposphere_mate import Parameter, apigateway, awslambda
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+rest_api = apigateway.RestApi("RestApi", Name="invalid-handlers")
+
+__lbd_func_config__ = LbdFuncConfig()
+__lbd_func_config__.param_env_name = Parameter("EnvironmentName", Type="String")
+__lbd_func_config__.lbd_func_code = awslambda.Code(ZipFile="pass")
+__lbd_func_config__.lbd_func_iam_role = "arn:aws:iam::111122223333:role/lbd-func"
+__lbd_func_config__.lbd_func_runtime = "python3.6"
+__lbd_func_config__.apigw_restapi = rest_api
+__lbd_func_config__.apigw_resource_yes = True
+__lbd_func_config__.apigw_method_yes = True
+__lbd_func_config__.apigw_method_int_type = LbdFuncConfig.ApiMethodIntType.rest
+__lbd_func_config__.apigw_method_authorization_type = LbdFuncConfig.ApigwMethodAuthorizationType.none
+__lbd_func_config__.fill_na_with_default()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig()
+
+
+def get(event, context): pass
+
+
+get.__lbd_func_config__ = LbdFuncConfig()
+
+
+# invalid authorization type
+def post(event, context): pass
+
+
+post.__lbd_func_config__ = LbdFuncConfig(
+    apigw_method_authorization_type="ANYONE",
+)
+
+
+# invalid iam role
+def delete(event, context): pass
+
+
+delete.__lbd_func_config__ = LbdFuncConfig(
+    lbd_func_iam_role=123,
+)
+
+
+# scheduled job without expression
+def put(event, context): pass
+
+
+put.__lbd_func_config__ = LbdFuncConfig(
+    apigw_method_yes=False,
+    scheduled_job_yes=True,
+)
+
+
+# alias without scaling actions, valid
+def patch(event, context): pass
+
+
+patch.__lbd_func_config__ = LbdFuncConfig(
+    lbd_alias_yes=True,
+)
+
+
+# keep warm without ping
+def head(event, context): pass
+
+
+head.__lbd_func_config__ = LbdFuncConfig(
+    keep_warm_yes=True,
+    keep_warm_concurrency=0,
+)
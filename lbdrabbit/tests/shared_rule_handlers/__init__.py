@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+"""
+Two sub packages, each with a scheduled job on the same shared rule.
+"""
+
+import troposphere_mate as tm
+from troposphere_mate import awslambda
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+param_env_name = tm.Parameter("EnvironmentName", Type="String")
+
+__lbd_func_config__ = LbdFuncConfig()
+__lbd_func_config__.param_env_name = param_env_name
+__lbd_func_config__.lbd_func_yes = True
+__lbd_func_config__.lbd_func_code = awslambda.Code(S3Bucket="my-bucket", S3Key="source.zip")
+__lbd_func_config__.lbd_func_iam_role = "arn:aws:iam::111122223333:role/lbd-func"
+__lbd_func_config__.lbd_func_runtime = "python3.6"
+__lbd_func_config__.apigw_resource_yes = False
+__lbd_func_config__.apigw_method_yes = False
+__lbd_func_config__.scheduled_job_yes = True
+__lbd_func_config__.scheduled_job_expression = "rate(5 minutes)"
+__lbd_func_config__.scheduled_job_event_rule_shared_yes = True
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig()
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+
+def handler(event, context):
+    pass
+
+
+handler.__lbd_func_config__ = LbdFuncConfig()
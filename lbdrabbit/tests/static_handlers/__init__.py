@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+"""
+Handler modules for static discovery testing. Except ``dynamic.py``, these
+modules should never be imported by
+:func:`~lbdrabbit.lbd_func_config.static_iterator.walk_lbd_handler_static`.
+"""
+
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig(
+    lbd_func_timeout=3,
+)
+__lbd_func_config__.lbd_func_runtime = "python3.6"
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+import os
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig()
+__lbd_func_config__.lbd_func_description = os.environ.get(
+    "LBDRABBIT_TEST_DESCRIPTION", "dynamic")
+
+
+def handler(event, context):
+    return "hello"
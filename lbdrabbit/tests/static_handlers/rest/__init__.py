@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig()
+__lbd_func_config__.apigw_method_int_type = LbdFuncConfig.ApiMethodIntType.rest
+__lbd_func_config__.apigw_method_enable_cors_yes = True
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+import json
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+users = {
+    "uid_1": {"user_id": "uid_1", "name": "Alice"},
+}
+
+
+def get(event, context):
+    return {
+        "status_code": "200",
+        "body": json.dumps(list(users.values()))
+    }
+
+
+def post(event, context):
+    return {
+        "status_code": "200",
+        "body": json.dumps({"post_data": event})
+    }
+
+
+post.__lbd_func_config__ = LbdFuncConfig(
+    lbd_func_timeout=60,
+)
+post.__lbd_func_config__.s3_event_lbd_config_list = [
+    LbdFuncConfig.S3EventLambdaConfig(
+        event=LbdFuncConfig.S3EventLambdaConfig.EventEnum.created_put,
+    )
+]
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import types
+import pytest
+from troposphere_mate import Template, Parameter, apigateway
+from lbdrabbit.lbd_func_config.lbd_func_config import LbdFuncConfig, awslambda
+from lbdrabbit.lbd_func_config.base import NOTHING
+from lbdrabbit.lbd_func_config.validation import validate_config
+
+
+def get(event, context):
+    pass
+
+
+def new_config(py_function, **kwargs) -> LbdFuncConfig:
+    config = LbdFuncConfig(
+        param_env_name=Parameter("EnvironmentName", Type="String"),
+        lbd_func_name="users-{}".format(py_function.__name__),
+        lbd_func_code=awslambda.Code(ZipFile="pass"),
+        lbd_func_runtime="python3.6",
+        lbd_func_iam_role="arn:aws:iam::111122223333:role/lbd",
+        apigw_restapi=apigateway.RestApi("RestApi", Name="api"),
+        apigw_method_yes=True,
+        apigw_method_int_type=LbdFuncConfig.ApiMethodIntType.rest,
+        apigw_method_authorization_type="NONE",
+        **kwargs
+    )
+    config.fill_na_with_default()
+    config._root_module_name = "my_project.handlers"
+    config._py_module = types.ModuleType("my_project.handlers.users")
+    config._py_function = py_function
+    return config
+
+
+def test_method_scope():
+    config = new_config(get)
+    assert config.apigw_method_lbd_permission_aws_object_ready() is True
+    permission = config.apigw_method_lbd_permission_aws_object
+    data = permission.to_dict()
+    assert data["Properties"]["SourceArn"]["Fn::Sub"][0] == \
+           "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*/GET/users"
+
+
+def test_function_scope():
+    config = new_config(
+        get,
+        apigw_method_lbd_permission_scope=LbdFuncConfig.ApigwMethodLbdPermissionScope.function,
+    )
+    assert config.apigw_method_lbd_permission_aws_object_ready() is True
+    permission = config.apigw_method_lbd_permission_aws_object
+    assert permission.title == "LbdPermissionApigwLbdFuncUsersGet"
+    data = permission.to_dict()
+    assert data["DependsOn"] == ["LbdFuncUsersGet"]
+    assert data["Properties"]["SourceArn"]["Fn::Sub"][0] == \
+           "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*"
+    assert validate_config(config) == []
+
+    # switching the scope drops the cached permission
+    config.apigw_method_lbd_permission_scope = LbdFuncConfig.ApigwMethodLbdPermissionScope.method
+    assert config.apigw_method_lbd_permission_aws_object.title == "LbdPermissionApigwMethodUsersGet"
+
+
+def test_default_scope():
+    config = new_config(get)
+    config.apigw_method_lbd_permission_scope = NOTHING
+    assert config.apigw_method_lbd_permission_aws_object.title == "LbdPermissionApigwMethodUsersGet"
+    assert validate_config(config) == []
+
+
+def test_invalid_scope():
+    config = new_config(get, apigw_method_lbd_permission_scope="rest_api")
+    with pytest.raises(ValueError):
+        config.apigw_method_lbd_permission_aws_object_pre_check()
+    issues = validate_config(config)
+    assert [(issue.resource, issue.level) for issue in issues] == \
+           [("apigw_method_lbd_permission", "error")]
+    assert "apigw_method_lbd_permission_scope" in issues[0].message
+
+
+def test_monolith_router_scope():
+    config = new_config(get)
+    router_lbd_func = awslambda.Function(
+        "LbdFuncRouter",
+        Code=awslambda.Code(ZipFile="pass"),
+        Handler="my_project.router.handler",
+        Role="arn:aws:iam::111122223333:role/lbd",
+        Runtime="python3.6",
+    )
+    config._monolith_router_lbd_func = router_lbd_func
+    assert config.apigw_method_lbd_permission_aws_object_ready() is True
+    permission = config.apigw_method_lbd_permission_aws_object
+    assert permission.title == "LbdPermissionApigwLbdFuncRouter"
+    data = permission.to_dict()
+    assert data["DependsOn"] == ["LbdFuncRouter"]
+    assert data["Properties"]["SourceArn"]["Fn::Sub"][0] == \
+           "arn:aws:execute-api:${Region}:${AccountId}:${RestApiId}/*"
+
+    # one permission per function, shared by the routed methods
+    template = Template()
+    config.add_aws_object(template, "apigw_method_lbd_permission")
+    config.add_aws_object(template, "apigw_method_lbd_permission")
+    assert list(template.resources) == ["LbdPermissionApigwLbdFuncRouter"]
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import io
+import contextlib
+import pytest
+from pytest import raises
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.builder import (
+    ResourceBuilder, BuilderRegistry, BuilderTimer,
+)
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, LBD_FUNC_BUILDER_REGISTRY, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    build_template,
+)
+
+
+class TestBuilderRegistry(object):
+    def test_ordered(self):
+        registry = BuilderRegistry([
+            ResourceBuilder(name="permission", build="b", depends_on=["func", "rule"]),
+            ResourceBuilder(name="rule", build="b", references=["func"]),
+            ResourceBuilder(name="func", build="b"),
+            ResourceBuilder(name="bucket", build="b"),
+        ])
+        assert [builder.name for builder in registry.ordered] == \
+               ["func", "rule", "permission", "bucket"]
+
+        with raises(ValueError):
+            registry.register(ResourceBuilder(name="func", build="b"))
+
+        registry = BuilderRegistry([
+            ResourceBuilder(name="a", build="b", depends_on=["b"]),
+            ResourceBuilder(name="b", build="b", references=["a"]),
+        ])
+        with raises(ValueError):
+            registry.ordered
+
+        registry = BuilderRegistry([
+            ResourceBuilder(name="a", build="b", depends_on=["unknown"]),
+        ])
+        with raises(ValueError):
+            registry.ordered
+
+    def test_affected_by(self):
+        registry = LBD_FUNC_BUILDER_REGISTRY
+        assert [builder.name for builder in registry.ordered][:5] == \
+               ["lbd_func", "lbd_version", "lbd_alias", "apigw_resource", "apigw_method"]
+
+        # every resource referencing the lambda function
+        assert registry.affected_by("lbd_func_timeout") == {
+            "lbd_func",
+            "lbd_version",
+            "lbd_alias",
+            "lbd_alias_scalable_target",
+            "apigw_method",
+            "apigw_method_lbd_permission",
+            "apigw_authorizer",
+            "apigw_authorizer_lbd_permission",
+            "scheduled_job_event_rule",
+            "scheduled_job_event_lbd_permission",
+            "keep_warm_event_rule",
+            "keep_warm_event_lbd_permission",
+            "s3_event_bucket",
+            "s3_event_bucket_lbd_permission",
+        }
+        assert registry.affected_by("scheduled_job_expression") == {
+            "scheduled_job_event_rule",
+            "scheduled_job_event_lbd_permission",
+        }
+        # the invoked arn changes when the alias changes
+        assert registry.affected_by("lbd_alias_name") == {
+            "lbd_alias",
+            "lbd_alias_scalable_target",
+            "apigw_method",
+            "apigw_method_lbd_permission",
+            "apigw_authorizer",
+            "apigw_authorizer_lbd_permission",
+            "scheduled_job_event_rule",
+            "scheduled_job_event_lbd_permission",
+            "keep_warm_event_rule",
+            "keep_warm_event_lbd_permission",
+            "s3_event_bucket",
+            "s3_event_bucket_lbd_permission",
+        }
+        assert registry.affected_by("keep_warm_concurrency") == {
+            "keep_warm_event_rule",
+            "keep_warm_event_lbd_permission",
+        }
+        assert registry.affected_by("boto3_ses") == set()
+
+
+def test_build_template_with_timer():
+    timer = BuilderTimer()
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name="lbdrabbit.example.handlers",
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=template,
+            builder_timer=timer,
+        )
+    assert timer.timings["lbd_func"].n_object == 8
+    # the cors options method is shared by the methods of a resource
+    assert sum([
+        timing.n_object for timing in timer.timings.values()
+    ]) >= len(template.resources)
+    assert "apigw_method" in timer.render_table()
+
+    # cached aws object is dropped only if its input changes
+    config = [
+        config for config in handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        if config.is_function() and config.scheduled_job_yes is True
+    ][0]
+    lbd_func = config.lbd_func_aws_object
+    event_rules = config.scheduled_job_event_rule_aws_objects
+    expression = config.scheduled_job_expression
+    try:
+        config.scheduled_job_expression = "rate(5 minutes)"
+        assert config.lbd_func_aws_object is lbd_func
+        assert config.scheduled_job_event_rule_aws_objects is not event_rules
+        assert list(config.scheduled_job_event_rule_aws_objects) == ["rate(5 minutes)", ]
+    finally:
+        config.scheduled_job_expression = expression
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -46,6 +46,19 @@ class TestBaseConfig(object):
         assert c2.memory == 1024
         assert c1.timeout == 120
 
+    def test_absorb_no_copy(self, monkeypatch):
+        def asdict(*args, **kwargs):
+            raise AssertionError("absorb should not materialize a dict")
+
+        monkeypatch.setattr(attr, "asdict", asdict)
+        layers = ["arn-1", "arn-2"]
+        c1 = LbdFuncConfig(memory=1024, alias=layers)
+        c2 = LbdFuncConfig()
+        c2.absorb(c1)
+        assert c2.memory == 1024
+        assert c2.alias is layers
+        assert c2.timeout is REQUIRED
+
     def test_fill_na_with_default(self):
         c = LbdFuncConfig(
             memory=1024,
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import io
+import contextlib
+import pytest
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    build_template, template_creation_handler,
+)
+from lbdrabbit.lbd_func_config.event_rule import (
+    EventRuleTarget, assign_event_rule_groups,
+    get_event_rule_group_logic_id, get_event_target_id,
+)
+
+module_name = "lbdrabbit.example.handlers"
+
+
+def create_template(handler_index) -> dict:
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        template_creation_handler(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            template=template,
+            handler_index=handler_index,
+        )
+    return template.to_dict()["Resources"]
+
+
+def get_rules(resources: dict) -> dict:
+    return {
+        logical_id: resource
+        for logical_id, resource in resources.items()
+        if resource["Type"] == "AWS::Events::Rule"
+    }
+
+
+def test_shared_event_rule():
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=Template(),
+        )
+    configs = [
+        config for config in handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        if config.is_function() and config.scheduled_job_yes is True
+    ]
+    assert len(configs) == 2
+    lbd_func_logic_id_list = sorted([config.lbd_func_logic_id for config in configs])
+
+    resources = create_template(handler_index)
+    rules = get_rules(resources)
+    assert len(rules) == 2
+    for rule in rules.values():
+        assert rule["Properties"]["Targets"][0]["Id"] in lbd_func_logic_id_list
+
+    expression_list = [config.scheduled_job_expression for config in configs]
+    expression = "rate(5 minutes)"
+    try:
+        for config in configs:
+            config.scheduled_job_expression = expression
+            config.scheduled_job_event_rule_shared_yes = True
+        groups = assign_event_rule_groups(handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        assert list(groups) == [expression, ]
+        assert groups[expression][0].lbd_func_logic_id_list == lbd_func_logic_id_list
+
+        resources = create_template(handler_index)
+        rules = get_rules(resources)
+        rule_logic_id = get_event_rule_group_logic_id(expression, 1)
+        assert list(rules) == [rule_logic_id, ]
+        targets = rules[rule_logic_id]["Properties"]["Targets"]
+        assert [target["Id"] for target in targets] == lbd_func_logic_id_list
+        assert [target["Arn"]["Fn::GetAtt"][0] for target in targets] == lbd_func_logic_id_list
+
+        # the permissions keep their logical id, and allow the shared rule
+        for config in configs:
+            permission = config.scheduled_job_event_lbd_permission_aws_objects[expression]
+            assert permission.title in resources
+            assert resources[permission.title]["Properties"]["SourceArn"] == \
+                   {"Fn::GetAtt": [rule_logic_id, "Arn"]}
+
+        # a rule has at most max_targets targets
+        assign_event_rule_groups(handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD, max_targets=1)
+        rules = get_rules(create_template(handler_index))
+        assert sorted(rules) == sorted([
+            get_event_rule_group_logic_id(expression, 1),
+            get_event_rule_group_logic_id(expression, 2),
+        ])
+        for rule in rules.values():
+            assert len(rule["Properties"]["Targets"]) == 1
+    finally:
+        for config, config_expression in zip(configs, expression_list):
+            config.scheduled_job_expression = config_expression
+            config.scheduled_job_event_rule_shared_yes = False
+        assign_event_rule_groups(handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD)
+
+
+def test_get_event_target_id():
+    assert get_event_target_id("LbdFuncSchedBackupDbHandler") == "LbdFuncSchedBackupDbHandler"
+    assert len(get_event_target_id("LbdFunc" + "A" * 100)) <= 64
+
+
+def test_event_rule_target():
+    target = EventRuleTarget(lbd_func_logic_id="LbdFuncA")
+    assert target.arn.to_dict() == {"Fn::GetAtt": ["LbdFuncA", "Arn"]}
+    target = EventRuleTarget(lbd_func_logic_id="LbdFuncA", lbd_alias_logic_id="LbdFuncAAlias")
+    assert target.arn.to_dict() == {"Ref": "LbdFuncAAlias"}
+    assert target.id == "LbdFuncA"
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import json
+import time
+import contextlib
+import pytest
+from troposphere_mate import Template, apigateway
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    build_template,
+)
+from lbdrabbit.lbd_func_config.base import NOTHING
+from lbdrabbit.lbd_func_config.fragment_cache import FragmentCache, encode_key_value
+
+module_name = "lbdrabbit.example.handlers"
+
+
+def new_cache(path):
+    return FragmentCache(path=path, module_name=module_name, config_class=LbdFuncConfig)
+
+
+def create_template(handler_index, cache):
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache.create_template(
+            handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD), template)
+    return template
+
+
+def test_incremental_template(tmpdir):
+    path = str(tmpdir.join(".lbdrabbit", "fragments.json"))
+
+    full_template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=full_template,
+        )
+    n_config = len(list(handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)))
+
+    cache = new_cache(path)
+    template = create_template(handler_index, cache)
+    assert len(cache.last_diff.rebuilt) == n_config
+    assert template.to_json() == full_template.to_json()
+
+    # nothing changed, every fragment is spliced from the cache
+    cache = new_cache(path)
+    template = create_template(handler_index, cache)
+    assert len(cache.last_diff.reused) == n_config
+    assert template.to_json() == full_template.to_json()
+
+    # a changed config value
+    config = [
+        config for config in handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        if config.is_function() and config.scheduled_job_yes is True
+    ][0]
+    expression = config.scheduled_job_expression
+    try:
+        config.scheduled_job_expression = "rate(5 minutes)"
+        cache = new_cache(path)
+        template = create_template(handler_index, cache)
+        assert cache.last_diff.rebuilt == [config.identifier, ]
+        assert "rate(5 minutes)" in template.to_json()
+    finally:
+        config.scheduled_job_expression = expression
+
+    # a changed module source, the record key doesn't match
+    with open(path, "rb") as f:
+        data = json.loads(f.read().decode("utf-8"))
+    for dct in data["fragments"]:
+        dct["key"] = "modified"
+    with open(path, "wb") as f:
+        f.write(json.dumps(data).encode("utf-8"))
+    cache = new_cache(path)
+    template = create_template(handler_index, cache)
+    assert len(cache.last_diff.rebuilt) == n_config
+    assert template.to_json() == full_template.to_json()
+
+
+def test_encode_key_value_memo():
+    rest_api = apigateway.RestApi("RestApi", Name="my-api")
+    memo = dict()
+    encoded = encode_key_value([rest_api, rest_api], memo)
+    assert encoded[0] is encoded[1]
+    assert list(memo) == [id(rest_api), ]
+    # the memo doesn't change the key
+    assert encoded == encode_key_value([rest_api, rest_api])
+
+
+def test_benchmark(tmpdir):
+    """
+    Plain build vs cold (empty cache) and warm (nothing changed) build.
+    """
+    path = str(tmpdir.join(".lbdrabbit", "fragments.json"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=Template(),
+        )
+    configs = list(handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD))
+
+    def clear_aws_object_cache():
+        for config in configs:
+            object.__setattr__(config, "_aws_object_cache", NOTHING)
+
+    def run_plain():
+        clear_aws_object_cache()
+        template = Template()
+        for config in configs:
+            config.create_aws_resource(template)
+        return template.to_json()
+
+    def run_cache():
+        clear_aws_object_cache()
+        template = Template()
+        new_cache(path).create_template(configs, template, verbose=False)
+        return template.to_json()
+
+    def run_cold():
+        if os.path.exists(path):
+            os.remove(path)
+        return run_cache()
+
+    def timeit(func, repeat=5):
+        elapsed = list()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed.append(time.perf_counter() - start)
+        return min(elapsed)
+
+    plain_time, cold_time = timeit(run_plain), timeit(run_cold)
+    warm_time = timeit(run_cache)
+    print("plain: {:.2f} ms, cold cache: {:.2f} ms, warm cache: {:.2f} ms".format(
+        plain_time * 1000, cold_time * 1000, warm_time * 1000))
+    assert run_plain() == run_cold() == run_cache()
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
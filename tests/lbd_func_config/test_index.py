@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.iterator import walk_lbd_handler
+from lbdrabbit.lbd_func_config.index import HandlerIndex, get_handler_index
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD, build_template,
+)
+
+
+class TestHandlerIndex(object):
+    def test_walk(self):
+        module_name = "lbdrabbit.tests.handlers"
+        index = HandlerIndex.build(
+            module_name=module_name,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+        )
+        assert list(index.walk()) == list(walk_lbd_handler(module_name, VALID_LBD_HANDLER_FUNC_NAME_LIST))
+        assert index.n_module == 3
+        assert index.n_handler == 3
+
+        names = [node.name for node in index.nodes]
+        assert names.index("lbdrabbit.tests.handlers") < names.index("lbdrabbit.tests.handlers.rest")
+        assert names.index("lbdrabbit.tests.handlers.rest") < names.index("lbdrabbit.tests.handlers.rest.users")
+
+    def test_build_conflict(self):
+        kwargs = dict(
+            module_name="lbdrabbit.tests.handlers",
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            parallel=True,
+        )
+        with pytest.raises(ValueError):
+            HandlerIndex.build(static=True, **kwargs)
+        with pytest.raises(ValueError):
+            HandlerIndex.build(cache_path="handler-index.json", **kwargs)
+
+
+def test_get_handler_index(tmpdir):
+    kwargs = dict(
+        module_name="lbdrabbit.tests.handlers",
+        valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        config_class=LbdFuncConfig,
+    )
+    index = get_handler_index(**kwargs)
+    assert get_handler_index(**kwargs) is index
+    assert get_handler_index(refresh=True, **kwargs) is not index
+
+    # the first call's options don't win
+    cache_path = str(tmpdir.join("handler-index.json"))
+    cached_index = get_handler_index(cache_path=cache_path, **kwargs)
+    assert cached_index is not get_handler_index(**kwargs)
+    assert get_handler_index(cache_path=cache_path, **kwargs) is cached_index
+    assert os.path.exists(cache_path)
+
+
+def test_build_template():
+    kwargs = dict(
+        module_name="lbdrabbit.example.handlers",
+        config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        config_class=LbdFuncConfig,
+        valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+    )
+    template = Template()
+    index = build_template(template=template, **kwargs)
+    assert "LbdFuncRestUsersGet" in template.resources
+    assert "ApigwMethodRestUsersGet" in template.resources
+
+    # repeated build reuses the index and produces the same template
+    template_again = Template()
+    build_template(template=template_again, handler_index=index, **kwargs)
+    assert template_again.to_dict() == template.to_dict()
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+)
+from lbdrabbit.lbd_func_config.index import HandlerIndex
+from lbdrabbit.lbd_func_config.index_cache import HandlerIndexCache
+
+module_name = "lbdrabbit.tests.static_handlers"
+users_module_name = "lbdrabbit.tests.static_handlers.rest.users"
+
+
+def new_cache(path, valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST):
+    return HandlerIndexCache(
+        path=path,
+        module_name=module_name,
+        valid_func_name_list=valid_func_name_list,
+        config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        config_class=LbdFuncConfig,
+        static=True,
+    )
+
+
+def edit_record(path, name, **kwargs):
+    with open(path, "rb") as f:
+        data = json.loads(f.read().decode("utf-8"))
+    for dct in data["modules"]:
+        if dct["name"] == name:
+            dct.update(kwargs)
+    with open(path, "wb") as f:
+        f.write(json.dumps(data).encode("utf-8"))
+
+
+def test_incremental_walk(tmpdir):
+    path = str(tmpdir.join(".lbdrabbit", "index.json"))
+
+    cache = new_cache(path)
+    first = HandlerIndex.from_walker(module_name, cache.walk())
+    assert len(cache.last_diff.added) == first.n_module == 4
+    assert first.n_handler == 3
+    assert cache.records[users_module_name].handler_names == ["get", "post"]
+
+    # nothing changed, the stand in modules are reused
+    cache = new_cache(path)
+    second = HandlerIndex.from_walker(module_name, cache.walk())
+    assert cache.last_diff.has_change is False
+    assert len(cache.last_diff.unchanged) == 4
+    assert [node.py_module for node in second.nodes] == [node.py_module for node in first.nodes]
+
+    # mtime changed but content not
+    edit_record(path, users_module_name, mtime=0)
+    cache = new_cache(path)
+    list(cache.walk())
+    assert cache.last_diff.has_change is False
+
+    # content changed
+    edit_record(path, users_module_name, mtime=0, fingerprint="modified")
+    cache = new_cache(path)
+    third = HandlerIndex.from_walker(module_name, cache.walk())
+    assert cache.last_diff.changed == [users_module_name, ]
+    users_node = [node for node in third.nodes if node.name == users_module_name][0]
+    assert getattr(users_node.py_handler_funcs[1], DEFAULT_LBD_FUNC_CONFIG_FIELD).lbd_func_timeout == 60
+
+    # settings changed, all cached records are invalid
+    cache = new_cache(path, valid_func_name_list=["handler", ])
+    assert len(cache.records) == 0
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import re
+import sys
 import pytest
 from lbdrabbit.lbd_func_config import iterator
 from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST
@@ -16,6 +18,70 @@ def test_walk_lbd_handler():
         )
 
 
+def to_names(walker):
+    names = list()
+    for current_module, parent_module, lbd_handler_func in walker:
+        if lbd_handler_func is None:
+            names.append(current_module.__name__)
+        else:
+            names.append("{}.{}".format(current_module.__name__, lbd_handler_func.__name__))
+    return names
+
+
+class TestModuleFilter(object):
+    def test_is_selected(self):
+        module_filter = iterator.ModuleFilter(
+            include=["*.rest", re.compile(r".*\.sched\.backup_\w+")],
+            exclude="*.tests",
+        )
+        assert module_filter.is_selected("handlers.rest")
+        assert module_filter.is_selected("handlers.rest.users")
+        assert module_filter.is_selected("handlers.sched.backup_db")
+        assert not module_filter.is_selected("handlers.sched")
+        assert not module_filter.is_selected("handlers.sched.heart_beat")
+        assert module_filter.is_excluded("handlers.rest.tests")
+        assert not module_filter.is_excluded("handlers.rest")
+
+        module_filter = iterator.ModuleFilter(subtree="handlers.rest")
+        assert module_filter.is_selected("handlers.rest.users")
+        assert not module_filter.is_selected("handlers.restful")
+        assert not module_filter.is_selected("handlers")
+
+    def test_subtree(self):
+        names = to_names(iterator.walk_lbd_handler(
+            "lbdrabbit.example.handlers", VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            subtree="lbdrabbit.example.handlers.rest",
+        ))
+        assert names == [
+            "lbdrabbit.example.handlers",
+            "lbdrabbit.example.handlers.rest",
+            "lbdrabbit.example.handlers.rest.users",
+            "lbdrabbit.example.handlers.rest.users.get",
+            "lbdrabbit.example.handlers.rest.users.post",
+        ]
+
+    def test_include(self):
+        names = to_names(iterator.walk_lbd_handler(
+            "lbdrabbit.example.handlers", VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            include=re.compile(r".*\.sched\.backup_\w+"),
+        ))
+        assert names == [
+            "lbdrabbit.example.handlers",
+            "lbdrabbit.example.handlers.sched",
+            "lbdrabbit.example.handlers.sched.backup_db",
+            "lbdrabbit.example.handlers.sched.backup_db.handler",
+        ]
+
+    def test_exclude(self):
+        names = to_names(iterator.walk_lbd_handler(
+            "lbdrabbit.tests.static_handlers", VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            exclude=["*.rest", "*.dynamic"],
+        ))
+        assert names == ["lbdrabbit.tests.static_handlers", ]
+        # excluded modules are never imported
+        assert "lbdrabbit.tests.static_handlers.rest" not in sys.modules
+
+
 if __name__ == "__main__":
     import os
 
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import contextlib
+import pytest
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.keep_warm import KEEP_WARM_EVENT_KEY
+from lbdrabbit.lbd_func_config.base import NOTHING
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    build_template, template_creation_handler,
+)
+
+module_name = "lbdrabbit.example.handlers"
+
+
+def create_template(handler_index) -> dict:
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        template_creation_handler(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            template=template,
+            handler_index=handler_index,
+        )
+    return template.to_dict()["Resources"]
+
+
+def test_keep_warm_event():
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=Template(),
+        )
+    config = [
+        config for config in handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        if config.is_function() and config.apigw_method_yes is True
+    ][0]
+    assert not config.readiness["keep_warm_event_rule"]
+    n_resources = len(create_template(handler_index))
+
+    try:
+        config.keep_warm_yes = True
+        config.keep_warm_expression = "rate(5 minutes)"
+        config.keep_warm_concurrency = 1
+        resources = create_template(handler_index)
+        rule_logic_id = "{}KeepWarm1".format(config.lbd_func_logic_id)
+        permission_logic_id = "LbdPermission{}".format(rule_logic_id)
+        assert len(resources) == n_resources + 2
+        rule = resources[rule_logic_id]["Properties"]
+        assert rule["ScheduleExpression"] == "rate(5 minutes)"
+        assert len(rule["Targets"]) == 1
+        assert rule["Targets"][0]["Arn"] == {"Fn::GetAtt": [config.lbd_func_logic_id, "Arn"]}
+        assert json.loads(rule["Targets"][0]["Input"]) == {
+            KEEP_WARM_EVENT_KEY: {"index": 1, "concurrency": 1, "delay_ms": 0}}
+        assert resources[permission_logic_id]["Properties"]["SourceArn"] == \
+               {"Fn::GetAtt": [rule_logic_id, "Arn"]}
+
+        # 7 parallel pings, at most 5 targets per rule
+        config.keep_warm_concurrency = 7
+        config.keep_warm_expression = "rate(10 minutes)"
+        rules = config.keep_warm_event_rule_aws_objects
+        assert list(rules) == [1, 2]
+        assert [len(rule.Targets) for rule in rules.values()] == [5, 2]
+        target_id_list = [
+            target.Id for rule in rules.values() for target in rule.Targets
+        ]
+        assert target_id_list == ["KeepWarm{}".format(i) for i in range(1, 8)]
+        assert len(config.keep_warm_event_lbd_permission_aws_objects) == 2
+        assert len(create_template(handler_index)) == n_resources + 4
+
+        config.keep_warm_concurrency = 0
+        assert not config.readiness["keep_warm_event_rule"]
+    finally:
+        config.keep_warm_yes = NOTHING
+        config.keep_warm_concurrency = NOTHING
+        config.keep_warm_expression = NOTHING
+    assert len(create_template(handler_index)) == n_resources
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
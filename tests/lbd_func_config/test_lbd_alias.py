@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import types
+import pytest
+from troposphere_mate import Template, Parameter, apigateway, applicationautoscaling
+from lbdrabbit.lbd_func_config.lbd_func_config import LbdFuncConfig, awslambda
+
+
+def get(event, context):
+    pass
+
+
+def new_config(**kwargs) -> LbdFuncConfig:
+    config = LbdFuncConfig(
+        param_env_name=Parameter("EnvironmentName", Type="String"),
+        lbd_func_name="users-get",
+        lbd_func_code=awslambda.Code(S3Bucket="my-bucket", S3Key="source/0001.zip"),
+        lbd_func_runtime="python3.6",
+        lbd_func_iam_role="arn:aws:iam::111122223333:role/lbd",
+        apigw_restapi=apigateway.RestApi("RestApi", Name="api"),
+        apigw_method_yes=True,
+        apigw_method_int_type=LbdFuncConfig.ApiMethodIntType.rest,
+        apigw_method_authorization_type="NONE",
+        **kwargs
+    )
+    config.fill_na_with_default()
+    config._root_module_name = "my_project.handlers"
+    config._py_module = types.ModuleType("my_project.handlers.users")
+    config._py_function = get
+    return config
+
+
+def test_alias():
+    config = new_config()
+    assert config.lbd_alias_aws_object_ready() is False
+    assert config.lbd_func_invoke_arn.to_dict() == {"Fn::GetAtt": ["LbdFuncUsersGet", "Arn"]}
+
+    config = new_config(lbd_alias_yes=True, lbd_alias_provisioned_concurrency=5)
+    assert config.lbd_version_aws_object_ready() is True
+    assert config.lbd_alias_aws_object_ready() is True
+    assert config.lbd_alias_scalable_target_aws_object_ready() is False
+
+    version_logic_id = config.lbd_version_aws_object.title
+    assert version_logic_id.startswith("LbdFuncUsersGetVersion")
+    alias = config.lbd_alias_aws_object.to_dict()
+    assert alias["Properties"]["FunctionVersion"] == \
+           {"Fn::GetAtt": [version_logic_id, "Version"]}
+    assert alias["Properties"]["Name"] == "live"
+    assert alias["Properties"]["ProvisionedConcurrencyConfig"] == \
+           {"ProvisionedConcurrentExecutions": 5}
+
+    # api gateway invokes the alias
+    uri = config.apigw_method_aws_object.to_dict()["Properties"]["Integration"]["Uri"]
+    assert uri["Fn::Sub"][1]["LambdaArn"] == {"Ref": "LbdFuncUsersGetAlias"}
+    permission = config.apigw_method_lbd_permission_aws_object.to_dict()
+    assert permission["Properties"]["FunctionName"] == {"Ref": "LbdFuncUsersGetAlias"}
+
+    # a new version only when the code or the config changed
+    config.lbd_alias_provisioned_concurrency = 10
+    assert config.lbd_version_aws_object.title == version_logic_id
+    config.lbd_func_code = awslambda.Code(S3Bucket="my-bucket", S3Key="source/0002.zip")
+    assert config.lbd_version_aws_object.title != version_logic_id
+    config.lbd_func_memory_size = 256
+    assert config.lbd_version_aws_object.title != version_logic_id
+
+    template = Template()
+    config.create_aws_resource(template)
+    assert "LbdFuncUsersGetAlias" in template.resources
+    assert config.lbd_version_aws_object.title in template.resources
+
+
+def test_alias_scheduled_scaling():
+    config = new_config(
+        lbd_alias_yes=True,
+        lbd_alias_provisioned_concurrency=2,
+        lbd_alias_scaling_max_capacity=20,
+        lbd_alias_scaling_scheduled_actions=[
+            applicationautoscaling.ScheduledAction(
+                ScheduledActionName="scale-out",
+                Schedule="cron(0 8 * * ? *)",
+                ScalableTargetAction=applicationautoscaling.ScalableTargetAction(
+                    MinCapacity=20, MaxCapacity=20,
+                ),
+            ),
+            applicationautoscaling.ScheduledAction(
+                ScheduledActionName="scale-in",
+                Schedule="cron(0 20 * * ? *)",
+                ScalableTargetAction=applicationautoscaling.ScalableTargetAction(
+                    MinCapacity=2, MaxCapacity=2,
+                ),
+            ),
+        ],
+    )
+    assert config.lbd_alias_scalable_target_aws_object_ready() is True
+    data = config.lbd_alias_scalable_target_aws_object.to_dict()
+    assert data["DependsOn"] == ["LbdFuncUsersGetAlias"]
+    assert data["Properties"]["MinCapacity"] == 2
+    assert data["Properties"]["MaxCapacity"] == 20
+    assert data["Properties"]["ScalableDimension"] == "lambda:function:ProvisionedConcurrency"
+    assert len(data["Properties"]["ScheduledActions"]) == 2
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
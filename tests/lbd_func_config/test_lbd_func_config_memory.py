@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory benchmark of ``LbdFuncConfig``, compare the slotted class with a
+``__dict__`` based class having the same fields.
+"""
+
+import gc
+import attr
+import pytest
+import tracemalloc
+from lbdrabbit.lbd_func_config.lbd_func_config import LbdFuncConfig
+
+DictLbdFuncConfig = attr.make_class(
+    "DictLbdFuncConfig",
+    {
+        field.name: attr.ib(default=field.default)
+        for field in attr.fields(LbdFuncConfig)
+    },
+    slots=False,
+)
+
+
+def measure(factory, n=10000) -> float:
+    """
+    :return: average memory allocated per instance, in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        instances = [factory() for _ in range(n)]
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(instances) == n
+    return size / n
+
+
+def test_memory_usage():
+    assert not hasattr(LbdFuncConfig(), "__dict__")
+    assert not hasattr(LbdFuncConfig.S3EventLambdaConfig(), "__dict__")
+
+    slots_size = measure(LbdFuncConfig)
+    dict_size = measure(DictLbdFuncConfig)
+    print("{} fields, slots: {:.0f} bytes, __dict__: {:.0f} bytes per instance".format(
+        len(attr.fields(LbdFuncConfig)), slots_size, dict_size))
+    assert slots_size < dict_size * 0.5
+
+
+def test_public_api():
+    assert LbdFuncConfig._default == LbdFuncConfig()._default
+    config = LbdFuncConfig(lbd_func_timeout=30)
+    config.fill_na_with_default()
+    assert config.lbd_func_timeout == 30
+    with pytest.raises(AttributeError):
+        config.lbd_func_memory = 128  # typo is an error now
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
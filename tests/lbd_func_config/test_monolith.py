@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import io
+import types
+import contextlib
+import pytest
+from pytest import raises
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    build_template, template_creation_handler,
+)
+from lbdrabbit.keep_warm import get_keep_warm_event
+from lbdrabbit.lbd_func_config.monolith import (
+    MonolithRouter, ROUTER_LBD_FUNC_LOGIC_ID, build_route_trie,
+)
+
+module_name = "lbdrabbit.example.handlers"
+
+
+def create_template(handler_index, monolith_router=None) -> dict:
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        template_creation_handler(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            template=template,
+            handler_index=handler_index,
+            monolith_router=monolith_router,
+        )
+    return template.to_dict()["Resources"]
+
+
+def get_resources(resources: dict, resource_type: str) -> dict:
+    return {
+        logical_id: resource
+        for logical_id, resource in resources.items()
+        if resource["Type"] == resource_type
+    }
+
+
+def test_build_route_trie():
+    trie = build_route_trie({
+        ("/rest/users", "GET"): "a.rest.users:get",
+        ("/rest/users", "POST"): "a.rest.users:post",
+        ("/rest", "GET"): "a.rest:get",
+    })
+    assert trie["children"]["rest"]["methods"] == {"GET": "a.rest:get"}
+    assert trie["children"]["rest"]["children"]["users"]["methods"] == {
+        "GET": "a.rest.users:get",
+        "POST": "a.rest.users:post",
+    }
+
+
+def test_monolith_router(tmpdir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name=module_name,
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=Template(),
+        )
+    resources = create_template(handler_index)
+    functions = get_resources(resources, "AWS::Lambda::Function")
+
+    router = MonolithRouter.build(
+        handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD, "lbdrabbit.example.router")
+    assert router.routes[("/rest/users", "GET")] == "lbdrabbit.example.handlers.rest.users:get"
+    assert router.routes[("/rest/users", "POST")] == "lbdrabbit.example.handlers.rest.users:post"
+    # authorizer, scheduled job and s3 event handlers are not routed
+    targets = list(router.routes.values())
+    for target in targets:
+        assert ".auth:" not in target
+        assert ".sched." not in target
+        assert ".event." not in target
+
+    try:
+        resources = create_template(handler_index, monolith_router=router)
+        routed_functions = get_resources(resources, "AWS::Lambda::Function")
+        assert len(routed_functions) == len(functions) - len(targets) + 1
+        assert routed_functions[ROUTER_LBD_FUNC_LOGIC_ID]["Properties"]["Handler"] == \
+               "lbdrabbit.example.router.handler"
+
+        for method in get_resources(resources, "AWS::ApiGateway::Method").values():
+            integration = method["Properties"]["Integration"]
+            if "Uri" in integration:
+                lambda_arn = integration["Uri"]["Fn::Sub"][1]["LambdaArn"]
+                assert lambda_arn == {"Fn::GetAtt": [ROUTER_LBD_FUNC_LOGIC_ID, "Arn"]}
+                assert "$context.resourcePath" in \
+                       integration["RequestTemplates"]["application/json"]
+
+        # one permission for all the methods invoking the router
+        permissions = [
+            permission
+            for permission in get_resources(resources, "AWS::Lambda::Permission").values()
+            if permission["Properties"]["FunctionName"] ==
+               {"Fn::GetAtt": [ROUTER_LBD_FUNC_LOGIC_ID, "Arn"]}
+        ]
+        assert len(permissions) == 1
+    finally:
+        router.reset()
+    assert ROUTER_LBD_FUNC_LOGIC_ID not in create_template(handler_index)
+
+    # the generated router module dispatches to the handler functions
+    path = router.write(str(tmpdir.join("router.py")))
+    module = types.ModuleType("router")
+    with open(path, "rb") as f:
+        exec(f.read().decode("utf-8"), module.__dict__)
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = module.handler(
+            {"resource_path": "/rest/users", "http_method": "POST", "body": {"name": "Alice"}},
+            None,
+        )
+    assert response["body"] == '{"post_data": {"name": "Alice"}}'
+    with raises(ValueError):
+        module.handler({"resource_path": "/unknown", "http_method": "GET", "body": {}}, None)
+
+    # the router answers the keep warm pings
+    ping = get_keep_warm_event(index=1, concurrency=1)
+    assert module.handler(ping, None) == ping
+
+    # a handler overriding the lambda settings of the root config keeps its
+    # own function
+    users_get_config = [
+        config for config in handler_index.iter_configs(DEFAULT_LBD_FUNC_CONFIG_FIELD)
+        if config.is_function()
+           and config._py_module.__name__ == "lbdrabbit.example.handlers.rest.users"
+           and config._py_function.__name__ == "get"
+    ][0]
+    timeout = users_get_config.lbd_func_timeout
+    try:
+        users_get_config.lbd_func_timeout = 900
+        router = MonolithRouter.build(
+            handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD, "lbdrabbit.example.router")
+        assert ("/rest/users", "GET") not in router.routes
+        assert ("/rest/users", "POST") in router.routes
+    finally:
+        users_get_config.lbd_func_timeout = timeout
+
+    # so does a handler with its own alias or keep warm settings
+    for field_name, value in [
+        ("lbd_alias_provisioned_concurrency", 3),
+        ("keep_warm_concurrency", 7),
+    ]:
+        old_value = getattr(users_get_config, field_name)
+        try:
+            setattr(users_get_config, field_name, value)
+            router = MonolithRouter.build(
+                handler_index, DEFAULT_LBD_FUNC_CONFIG_FIELD, "lbdrabbit.example.router")
+            assert ("/rest/users", "GET") not in router.routes
+            assert ("/rest/users", "POST") in router.routes
+        finally:
+            setattr(users_get_config, field_name, old_value)
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import attr
+import pytest
+from troposphere import Ref
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST
+from lbdrabbit.example import cf
+from lbdrabbit.lbd_func_config.iterator import walk_lbd_handler
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD, NOTHING,
+)
+from lbdrabbit.lbd_func_config.parallel_iterator import (
+    ValueEncoder, decode_value, walk_lbd_handler_parallel,
+)
+
+
+def test_encode_decode():
+    encoder = ValueEncoder("lbdrabbit.example.handlers")
+    config = LbdFuncConfig(
+        lbd_func_timeout=30,
+        lbd_func_code=cf.lambda_code,
+        apigw_restapi=cf.rest_api,
+        lbd_func_iam_role=Ref(cf.iam_role),
+        s3_event_lbd_config_list=[
+            LbdFuncConfig.S3EventLambdaConfig(
+                event=LbdFuncConfig.S3EventLambdaConfig.EventEnum.created),
+        ],
+    )
+    new_config = decode_value(encoder.encode(config))  # type: LbdFuncConfig
+    assert new_config.lbd_func_timeout == 30
+    assert new_config.lbd_func_runtime is config.lbd_func_runtime
+    assert new_config.lbd_func_description is NOTHING
+    # module level troposphere object is passed by reference
+    assert new_config.apigw_restapi is cf.rest_api
+    assert new_config.lbd_func_code is cf.lambda_code
+    assert new_config.lbd_func_iam_role.to_dict() == Ref(cf.iam_role).to_dict()
+    assert new_config.s3_event_lbd_config_list == config.s3_event_lbd_config_list
+
+
+def public_fields(config):
+    return attr.asdict(
+        config, recurse=False,
+        filter=lambda field, value: not field.name.startswith("_"),
+    )
+
+
+def to_names(walker):
+    names = list()
+    for py_current_module, py_parent_module, py_handler_func in walker:
+        names.append((
+            py_current_module.__name__,
+            None if py_parent_module is None else py_parent_module.__name__,
+            None if py_handler_func is None else py_handler_func.__name__,
+        ))
+    return names
+
+
+def test_walk_lbd_handler_parallel():
+    module_name = "lbdrabbit.example.handlers"
+    results = list(walk_lbd_handler_parallel(
+        module_name,
+        VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        max_workers=2,
+    ))
+    assert to_names(results) == to_names(
+        walk_lbd_handler(module_name, VALID_LBD_HANDLER_FUNC_NAME_LIST))
+
+    for py_current_module, _, py_handler_func in results:
+        if py_handler_func is not None \
+                and hasattr(py_handler_func, DEFAULT_LBD_FUNC_CONFIG_FIELD):
+            real_handler_func = getattr(
+                __import__(py_current_module.__name__, fromlist=[""]),
+                py_handler_func.__name__,
+            )
+            assert public_fields(getattr(py_handler_func, DEFAULT_LBD_FUNC_CONFIG_FIELD)) == \
+                   public_fields(getattr(real_handler_func, DEFAULT_LBD_FUNC_CONFIG_FIELD))
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
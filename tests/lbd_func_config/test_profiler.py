@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from lbdrabbit.lbd_func_config.profiler import (
+    parse_importtime, profile_handler_discovery,
+)
+
+IMPORTTIME_OUTPUT = """
+import time: self [us] | cumulative | imported package
+import time:        50 |         50 |     c
+import time:       100 |        150 |   b
+import time:        10 |         10 |   d
+import time:       300 |        460 | a
+import time:        20 |         20 | e
+""".strip()
+
+
+def test_parse_importtime():
+    roots = parse_importtime(IMPORTTIME_OUTPUT)
+    assert [root.name for root in roots] == ["a", "e"]
+    a = roots[0]
+    assert a.cumulative_us == 460
+    assert [child.name for child in a.children] == ["b", "d"]
+    assert [r.name for r in a.iter_descendants()] == ["b", "c", "d"]
+
+
+def test_profile_handler_discovery():
+    module_name = "lbdrabbit.tests.handlers"
+    profile = profile_handler_discovery(module_name, top_n=3)
+    assert {module.name for module in profile.modules} == {
+        "lbdrabbit.tests.handlers",
+        "lbdrabbit.tests.handlers.rest",
+        "lbdrabbit.tests.handlers.rest.users",
+    }
+    assert sum([module.n_handler for module in profile.modules]) == 3
+    for module in profile.modules:
+        assert len(module.heavy_imports) <= 3
+    costs = [module.cumulative_time for module in profile.modules]
+    assert costs == sorted(costs, reverse=True)
+    assert profile.to_dict()["module_name"] == module_name
+    assert module_name in profile.render_table()
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from troposphere_mate import apigateway
+from lbdrabbit.lbd_func_config.base import get_field_names
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, LBD_FUNC_BUILDER_REGISTRY, NOTHING,
+    awslambda,
+)
+
+
+def handler(event, context):
+    pass
+
+
+def new_config(**kwargs) -> LbdFuncConfig:
+    config = LbdFuncConfig(
+        lbd_func_code=awslambda.Code(ZipFile="pass"),
+        lbd_func_runtime="python3.6",
+        apigw_restapi=apigateway.RestApi("RestApi"),
+        **kwargs
+    )
+    config.fill_na_with_default()
+    config._py_function = handler
+    return config
+
+
+def test_graph_order():
+    seen = set()
+    for builder in LBD_FUNC_BUILDER_REGISTRY.ordered:
+        for dep in builder.depends_on:
+            assert dep in seen
+        seen.add(builder.name)
+
+
+def test_readiness():
+    config = new_config(apigw_method_yes=True)
+    assert config.lbd_func_aws_object_ready() is True
+    assert config.apigw_resource_aws_object_ready() is False
+    assert config.apigw_method_aws_object_ready() is True
+    assert config.apigw_method_lbd_permission_aws_object_ready() is True
+    assert config.apigw_method_options_for_cors_aws_object_ready() is False
+    assert config.apigw_authorizer_lbd_permission_aws_object_ready() is False
+    assert config.scheduled_job_event_rule_aws_objects_ready() is False
+    assert config.s3_event_bucket_lbd_permission_aws_object_ready() is False
+
+    # a ready resource passes the pre check
+    config.lbd_func_aws_object_pre_check()
+    config.apigw_method_lbd_permission_aws_object_pre_check()
+
+    # permission depends on the lambda function
+    config.lbd_func_yes = False
+    assert config.apigw_method_aws_object_ready() is True
+    assert config.apigw_method_lbd_permission_aws_object_ready() is False
+
+    config = new_config(scheduled_job_yes=True, scheduled_job_expression="rate(1 minute)")
+    assert config.scheduled_job_event_rule_aws_objects_ready() is True
+    assert config.scheduled_job_event_lbd_permission_aws_objects_ready() is True
+
+
+def test_cache():
+    config = new_config()
+    readiness = config.readiness
+    assert config.readiness is readiness
+    assert readiness["apigw_method"] is False
+
+    # aws object caches don't invalidate the readiness
+    config._aws_object_cache = {"lbd_func": awslambda.Function(
+        "LbdFunc", Code=config.lbd_func_code, Handler="handler", Role="arn",
+        Runtime=config.lbd_func_runtime,
+    )}
+    assert config.readiness is readiness
+
+    config.apigw_method_yes = True
+    assert config.readiness is not readiness
+    assert config.readiness["apigw_method"] is True
+
+    # derived per config, never inherited
+    assert "_readiness_cache" not in get_field_names(LbdFuncConfig)
+    child = LbdFuncConfig()
+    child.absorb(config)
+    assert child._readiness_cache is NOTHING
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+import io
+import contextlib
+import pytest
+from pytest import raises
+from troposphere_mate import Template
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD, build_template,
+)
+from lbdrabbit.lbd_func_config.shard import (
+    shard_template, assign_shards, split_template, get_resource_owners,
+    NESTED_STACK_TYPE, MAX_OUTPUTS, MAX_PARAMETERS,
+)
+
+
+def iter_refs(value):
+    if isinstance(value, list):
+        for v in value:
+            for name in iter_refs(v):
+                yield name
+    elif isinstance(value, dict):
+        if "Ref" in value:
+            yield value["Ref"]
+        elif "Fn::GetAtt" in value:
+            yield value["Fn::GetAtt"][0]
+        else:
+            for v in value.values():
+                for name in iter_refs(v):
+                    yield name
+
+
+def test_shard_example():
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name="lbdrabbit.example.handlers",
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=template,
+        )
+    template_data = template.to_dict()
+    kwargs = dict(handler_index=handler_index, config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD)
+    assert shard_template(template_data, **kwargs).is_sharded is False
+
+    sharded = shard_template(template_data, max_resources=9, **kwargs)
+    assert list(sharded.shards)[:3] == ["event", "rest", "rest.users"]
+
+    # every aws object is moved exactly once
+    logical_ids = [
+        logical_id for logical_id, resource in sharded.master["Resources"].items()
+        if resource["Type"] != NESTED_STACK_TYPE
+    ]
+    for shard in sharded.shards.values():
+        assert len(shard["Resources"]) <= 9
+        logical_ids.extend(shard["Resources"])
+    assert sorted(logical_ids) == sorted(template_data["Resources"])
+
+    # references are either local, or shard parameters
+    for name, shard in sharded.shards.items():
+        for ref in iter_refs(shard["Resources"]):
+            assert ref.startswith("AWS::") or ref in shard["Resources"] \
+                   or ref in shard["Parameters"]
+        stack = sharded.master["Resources"][sharded.stack_logical_ids[name]]
+        assert set(stack["Properties"]["Parameters"]) == set(shard["Parameters"])
+        for value in stack["Properties"]["Parameters"].values():
+            if "Fn::GetAtt" in value and value["Fn::GetAtt"][1].startswith("Outputs."):
+                other = [
+                    shard_name for shard_name, logical_id in sharded.stack_logical_ids.items()
+                    if logical_id == value["Fn::GetAtt"][0]
+                ][0]
+                output_name = value["Fn::GetAtt"][1].split(".", 1)[1]
+                assert output_name in sharded.shards[other]["Outputs"]
+
+    users_stack = sharded.master["Resources"]["NestedStackRestUsers"]
+    assert users_stack["Properties"]["Parameters"]["ApigwResourceRest"] == \
+           {"Fn::GetAtt": ["NestedStackRest", "Outputs.ApigwResourceRest"]}
+
+    sharded.set_template_urls({"rest": "https://s3.amazonaws.com/bucket/rest.json"})
+    assert sharded.master["Resources"]["NestedStackRest"]["Properties"]["TemplateURL"] \
+           == "https://s3.amazonaws.com/bucket/rest.json"
+
+    # conditions can't be evaluated in a nested stack
+    template_data["Conditions"] = {"IsProd": {"Fn::Equals": ["prod", "dev"]}}
+    with raises(ValueError):
+        shard_template(template_data, force=True, **kwargs)
+
+
+def test_shard_shared_event_rule():
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_index = build_template(
+            module_name="lbdrabbit.tests.shared_rule_handlers",
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=template,
+        )
+    template_data = template.to_dict()
+    rules = [
+        logical_id for logical_id, resource in template_data["Resources"].items()
+        if resource["Type"] == "AWS::Events::Rule"
+    ]
+    assert len(rules) == 1
+    rule = rules[0]
+
+    # the rule targets functions in both sub packages, it stays in the
+    # master template, with the permissions referencing it
+    kwargs = dict(handler_index=handler_index, config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD)
+    owners = get_resource_owners(template_data=template_data, **kwargs)
+    assert owners[rule] == ""
+    for logical_id, resource in template_data["Resources"].items():
+        if resource["Type"] == "AWS::Lambda::Permission":
+            assert owners[logical_id] == ""
+        elif resource["Type"] == "AWS::Lambda::Function":
+            assert owners[logical_id] in ("a.job", "b.job")
+
+    sharded = shard_template(template_data, force=True, **kwargs)
+    assert list(sharded.shards) == ["a", "b"]
+    assert rule in sharded.master["Resources"]
+    for shard in sharded.shards.values():
+        assert list(shard["Parameters"]) == ["EnvironmentName"]
+
+
+def test_split_template():
+    template_data = {
+        "Parameters": {"Stage": {"Type": "String", "Default": "dev"}},
+        "Resources": {
+            "Role": {"Type": "AWS::IAM::Role", "Properties": {}},
+            "FuncA": {
+                "Type": "AWS::Lambda::Function",
+                "Properties": {
+                    "Role": {"Fn::GetAtt": ["Role", "Arn"]},
+                    "FunctionName": {"Fn::Sub": "${Stage}-a-${AWS::Region}"},
+                },
+                "DependsOn": "Role",
+            },
+            "FuncB": {
+                "Type": "AWS::Lambda::Function",
+                "Properties": {
+                    "Description": {"Fn::Sub": "calls ${FuncA.Arn}"},
+                },
+                "DependsOn": ["FuncA"],
+            },
+        },
+        "Outputs": {"FuncAArn": {"Value": {"Fn::GetAtt": ["FuncA", "Arn"]}}},
+    }
+    sharded = split_template(template_data, {"FuncA": "a", "FuncB": "b"})
+    shard_a, shard_b = sharded.shards["a"], sharded.shards["b"]
+    master = sharded.master
+
+    assert shard_a["Parameters"] == {"RoleArn": {"Type": "String"}, "Stage": {"Type": "String"}}
+    assert shard_a["Resources"]["FuncA"]["Properties"]["Role"] == {"Ref": "RoleArn"}
+    assert shard_a["Resources"]["FuncA"]["Properties"]["FunctionName"] == \
+           {"Fn::Sub": "${Stage}-a-${AWS::Region}"}
+    assert "DependsOn" not in shard_a["Resources"]["FuncA"]
+    assert master["Resources"]["NestedStackA"]["DependsOn"] == ["Role"]
+
+    assert shard_b["Resources"]["FuncB"]["Properties"]["Description"] == \
+           {"Fn::Sub": "calls ${FuncAArn}"}
+    assert master["Resources"]["NestedStackB"]["DependsOn"] == ["NestedStackA"]
+    assert master["Resources"]["NestedStackB"]["Properties"]["Parameters"] == \
+           {"FuncAArn": {"Fn::GetAtt": ["NestedStackA", "Outputs.FuncAArn"]}}
+    assert master["Outputs"]["FuncAArn"]["Value"] == \
+           {"Fn::GetAtt": ["NestedStackA", "Outputs.FuncAArn"]}
+
+    # shards referencing each other
+    template_data["Resources"]["FuncA"]["Properties"]["Description"] = {"Ref": "FuncB"}
+    with raises(ValueError):
+        split_template(template_data, {"FuncA": "a", "FuncB": "b"})
+
+
+def test_assign_shards_outputs():
+    # 250 functions in two modules, each one exported by the master template
+    resources = dict()
+    outputs = dict()
+    owners = dict()
+    for module_name in ("a.x", "a.y"):
+        for i in range(125):
+            logical_id = "Func{}{}".format(module_name.split(".")[1].upper(), i)
+            resources[logical_id] = {
+                "Type": "AWS::Lambda::Function",
+                "Properties": {"Role": {"Ref": "Role{}".format(i)}},
+            }
+            outputs[logical_id + "Arn"] = {"Value": {"Fn::GetAtt": [logical_id, "Arn"]}}
+            owners[logical_id] = module_name
+    template_data = {"Resources": resources, "Outputs": outputs}
+
+    # the top level sub package "a" would need 250 outputs
+    shard_of = assign_shards(template_data, owners)
+    assert set(shard_of.values()) == {"a.x", "a.y"}
+    sharded = split_template(template_data, shard_of)
+    for shard in sharded.shards.values():
+        assert len(shard["Outputs"]) <= MAX_OUTPUTS
+        assert len(shard["Parameters"]) <= MAX_PARAMETERS
+
+    # a single module can't be split
+    with raises(ValueError):
+        assign_shards(template_data, owners, max_outputs=100)
+    # 125 distinct parameters per module
+    with raises(ValueError):
+        assign_shards(template_data, owners, max_parameters=100)
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
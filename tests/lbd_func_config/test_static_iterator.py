@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import pytest
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST
+from lbdrabbit.lbd_func_config.base import config_inherit_handler
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD, NOTHING,
+)
+from lbdrabbit.lbd_func_config.static_iterator import (
+    ModuleSpec, parse_module_spec, materialize_config, walk_lbd_handler_static,
+)
+
+
+def parse(source, module_name="my_handlers.rest.users", is_package=False):
+    return parse_module_spec(
+        source=source,
+        module_name=module_name,
+        is_package=is_package,
+        valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        config_class=LbdFuncConfig,
+    )
+
+
+class TestParseModuleSpec(object):
+    def test_literal_config(self):
+        spec = parse("""
+import json
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig(lbd_func_timeout=30)
+__lbd_func_config__.apigw_method_int_type = LbdFuncConfig.ApiMethodIntType.rest
+
+def get(event, context):
+    return json.dumps({}.get("a"))
+
+def helper():
+    pass
+
+get.__lbd_func_config__ = LbdFuncConfig()
+get.__lbd_func_config__.lbd_func_layers = ["arn-1", "arn-2"]
+
+def post(event, context):
+    pass
+
+if __name__ == "__main__":
+    post = None
+""")
+        assert spec.need_import is False
+        assert spec.handler_names == ["get", "post"]
+        assert list(spec.func_configs) == ["get", ]
+
+        conf = materialize_config(spec.module_config, LbdFuncConfig)
+        assert conf.lbd_func_timeout == 30
+        assert conf.apigw_method_int_type == "rest"
+
+        conf = materialize_config(spec.func_configs["get"], LbdFuncConfig)
+        assert conf.lbd_func_layers == ["arn-1", "arn-2"]
+
+        # spec is json serializable
+        assert ModuleSpec.from_dict(json.loads(json.dumps(spec.to_dict()))) == spec
+
+    def test_config_class_call(self):
+        spec = parse("""
+from lbdrabbit.lbd_func_config import LbdFuncConfig as Conf
+
+def handler(event, context): pass
+
+handler.__lbd_func_config__ = Conf()
+handler.__lbd_func_config__.s3_event_lbd_config_list = [
+    Conf.S3EventLambdaConfig(event=Conf.S3EventLambdaConfig.EventEnum.created),
+]
+""")
+        assert spec.need_import is False
+        conf = materialize_config(spec.func_configs["handler"], LbdFuncConfig)
+        assert conf.s3_event_lbd_config_list[0].event == "s3:ObjectCreated:*"
+
+    def test_literal_values(self):
+        spec = parse("""
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+
+__lbd_func_config__ = LbdFuncConfig(
+    lbd_func_timeout=30,
+    lbd_func_memory_size=-1,
+    lbd_func_metadata={"STAGE": "dev", "DEBUG": None},
+    apigw_method_enable_cors_yes=True,
+)
+
+def handler(event, context): pass
+""")
+        assert spec.need_import is False
+        conf = materialize_config(spec.module_config, LbdFuncConfig)
+        assert conf.lbd_func_timeout == 30
+        assert conf.lbd_func_memory_size == -1
+        assert conf.lbd_func_metadata == {"STAGE": "dev", "DEBUG": None}
+        assert conf.apigw_method_enable_cors_yes is True
+
+    @pytest.mark.parametrize("source", [
+        # value is not a literal
+        """
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+from my_project import cf
+__lbd_func_config__ = LbdFuncConfig()
+__lbd_func_config__.apigw_restapi = cf.rest_api
+""",
+        # config is modified in a try block
+        """
+from lbdrabbit.lbd_func_config import LbdFuncConfig
+__lbd_func_config__ = LbdFuncConfig()
+try:
+    __lbd_func_config__.lbd_func_timeout = 30
+except:
+    pass
+""",
+        # config class is not verified
+        """
+from my_project.config import LbdFuncConfig
+__lbd_func_config__ = LbdFuncConfig()
+""",
+        # handler is imported from somewhere else
+        """
+from my_project.handlers import handler
+""",
+        # handler is decorated
+        """
+import functools
+@functools.lru_cache()
+def handler(event, context): pass
+""",
+        # handler is re-bound
+        """
+def handler(event, context): pass
+handler = print
+""",
+        """
+from my_project import *
+""",
+        # handler is defined in a compound statement
+        """
+import os
+if os.environ.get("X"):
+    def handler(event, context): pass
+""",
+        """
+try:
+    import numpy
+except ImportError:
+    numpy = None
+else:
+    def handler(event, context): pass
+""",
+    ])
+    def test_need_import(self, source):
+        spec = parse(source)
+        assert spec.need_import is True
+        assert isinstance(spec.reason, str)
+
+
+def test_walk_lbd_handler_static():
+    module_name = "lbdrabbit.tests.static_handlers"
+    mapper = dict()
+    for py_current_module, py_parent_module, py_handler_func in walk_lbd_handler_static(
+            module_name,
+            VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            LbdFuncConfig,
+    ):
+        if py_handler_func is None:
+            mapper[py_current_module.__name__] = py_current_module
+        else:
+            mapper["{}.{}".format(py_current_module.__name__, py_handler_func.__name__)] = py_handler_func
+
+    assert set(mapper) == {
+        "lbdrabbit.tests.static_handlers",
+        "lbdrabbit.tests.static_handlers.dynamic",
+        "lbdrabbit.tests.static_handlers.dynamic.handler",
+        "lbdrabbit.tests.static_handlers.rest",
+        "lbdrabbit.tests.static_handlers.rest.users",
+        "lbdrabbit.tests.static_handlers.rest.users.get",
+        "lbdrabbit.tests.static_handlers.rest.users.post",
+    }
+
+    # only the module has dynamic config is imported
+    assert "lbdrabbit.tests.static_handlers.rest.users" not in sys.modules
+    assert "lbdrabbit.tests.static_handlers.dynamic" in sys.modules
+
+    users_post = mapper["lbdrabbit.tests.static_handlers.rest.users.post"]
+    assert users_post.__module__ == "lbdrabbit.tests.static_handlers.rest.users"
+    assert getattr(users_post, DEFAULT_LBD_FUNC_CONFIG_FIELD).lbd_func_timeout == 60
+
+    config_inherit_handler(
+        module_name=module_name,
+        config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        config_class=LbdFuncConfig,
+        valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        static=True,
+    )
+    users_get_conf = getattr(
+        mapper["lbdrabbit.tests.static_handlers.rest.users.get"],
+        DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    )  # type: LbdFuncConfig
+    assert users_get_conf.lbd_func_timeout == 3
+    assert users_get_conf.lbd_func_runtime == "python3.6"
+    assert users_get_conf.apigw_method_int_type == "rest"
+    assert users_get_conf.lbd_func_description is NOTHING
+
+    dynamic_handler_conf = getattr(
+        mapper["lbdrabbit.tests.static_handlers.dynamic.handler"],
+        DEFAULT_LBD_FUNC_CONFIG_FIELD,
+    )  # type: LbdFuncConfig
+    assert dynamic_handler_conf.lbd_func_description == "dynamic"
+    assert dynamic_handler_conf.lbd_func_runtime == "python3.6"
+
+    # importing dynamic.py imported the real root package, the next walks
+    # still use the stand in, the configs inherited above are kept
+    assert module_name in sys.modules
+    py_root_module = next(walk_lbd_handler_static(
+        module_name,
+        VALID_LBD_HANDLER_FUNC_NAME_LIST,
+        DEFAULT_LBD_FUNC_CONFIG_FIELD,
+        LbdFuncConfig,
+    ))[0]
+    assert py_root_module is mapper[module_name]
+    assert py_root_module is not sys.modules[module_name]
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+from pytest import raises
+from lbdrabbit.lbd_func_config.lbd_func_config import LbdFuncConfig
+from lbdrabbit.lbd_func_config.validation import (
+    validate_handler_tree, ConfigValidationError, _pre_check_message,
+)
+
+module_name = "lbdrabbit.tests.invalid_handlers"
+
+
+def test_validate_handler_tree():
+    report = validate_handler_tree(module_name)
+    assert report.n_config == 8
+    issues = {
+        (issue.identifier.split(".")[-2], issue.resource, issue.level)
+        for issue in report.issues
+    }
+    assert issues == {
+        ("post", "apigw_method", "error"),
+        ("post", "apigw_method_lbd_permission", "skipped"),
+        ("delete", "lbd_func", "error"),
+        ("delete", "apigw_method", "error"),
+        ("delete", "apigw_method_lbd_permission", "skipped"),
+        ("put", "scheduled_job_event_rule", "error"),
+        ("put", "scheduled_job_event_lbd_permission", "skipped"),
+        ("head", "keep_warm_event_rule", "error"),
+        ("head", "keep_warm_event_lbd_permission", "skipped"),
+    }
+    assert len(report.errors) == 5
+    assert len(report.skipped) == 4
+
+    data = json.loads(report.to_json())
+    assert len(data["issues"]) == 9
+    assert "scheduled_job_expression is not defined" in report.render_table()
+    assert "keep_warm_concurrency has to be a positive integer" in report.render_table()
+
+    with raises(ConfigValidationError) as e:
+        report.raise_for_error()
+    assert "5 invalid config values" in str(e.value)
+
+    # an alias without scaling actions doesn't need a scalable target
+    assert "patch" not in {issue.identifier.split(".")[-2] for issue in report.issues}
+
+
+def test_pre_check_message():
+    # a resource kind without pre check
+    assert _pre_check_message(LbdFuncConfig(), "my_resource") == "my_resource is not valid"
+
+
+def test_validate_example():
+    report = validate_handler_tree("lbdrabbit.example.handlers")
+    assert report.n_config == 21
+    assert report.issues == []
+    report.raise_for_error()
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from lbdrabbit.lbd_func_config.base import REQUIRED, NOTHING
+from lbdrabbit.lbd_func_config.lbd_func_config import LbdFuncConfig
+from lbdrabbit.lbd_func_config.view import is_view, unlink_config, clear_views
+
+
+def is_stored(config, name):
+    """
+    Is the value stored on the instance, without resolving it.
+    """
+    try:
+        object.__getattribute__(config, name)
+        return True
+    except AttributeError:
+        return False
+
+
+@pytest.fixture
+def chain():
+    root = LbdFuncConfig(lbd_func_runtime="python3.6", lbd_func_timeout=3)
+    module = LbdFuncConfig(lbd_func_timeout=30)
+    func = LbdFuncConfig()
+    module.link_parent(root)
+    func.link_parent(module)
+    yield root, module, func
+    clear_views([root, module, func])
+
+
+def test_lazy_resolve(chain):
+    root, module, func = chain
+    assert is_view(func)
+    assert not is_stored(func, "lbd_func_runtime")
+
+    assert func.lbd_func_runtime == "python3.6"
+    assert func.lbd_func_timeout == 30
+    assert func.lbd_func_name is REQUIRED
+    assert func.lbd_func_description is NOTHING
+    # memoized
+    assert is_stored(func, "lbd_func_runtime")
+    assert is_stored(module, "lbd_func_runtime")
+    # private fields are not inherited
+    assert func._py_module is NOTHING
+
+
+def test_invalidate(chain):
+    root, module, func = chain
+    assert func.lbd_func_runtime == "python3.6"
+    assert func.lbd_func_timeout == 30
+
+    func._aws_object_cache = {"lbd_func": "cached"}
+    root.lbd_func_runtime = "python3.8"
+    root.lbd_func_timeout = 10
+    assert func.lbd_func_runtime == "python3.8"
+    # module value overrides the root value
+    assert func.lbd_func_timeout == 30
+    assert func._aws_object_cache is NOTHING
+
+    # explicitly set value is not inherited any more
+    func.lbd_func_runtime = "python3.7"
+    root.lbd_func_runtime = "python3.6"
+    assert func.lbd_func_runtime == "python3.7"
+    assert module.lbd_func_runtime == "python3.6"
+
+
+def test_unlink(chain):
+    root, module, func = chain
+    unlink_config(func)
+    assert not is_view(func)
+    assert is_stored(func, "lbd_func_timeout")
+    root.lbd_func_timeout = 10
+    assert func.lbd_func_timeout == 30
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
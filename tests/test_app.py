@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from pytest import raises
+from lbdrabbit.app import AppConfig
+
+
+def test_check_HANDLER_MODULE_NAME():
+    app_config = AppConfig()
+    app_config.HANDLER_MODULE_NAME.set_value("lbdrabbit.example.handlers")
+    app_config.HANDLER_MODULE_NAME.validate(app_config)
+
+    app_config.HANDLER_MODULE_NAME.set_value("lbdrabbit.not_exists")
+    with raises(ImportError):
+        app_config.HANDLER_MODULE_NAME.validate(app_config)
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from lbdrabbit.boto_client import ClientRegistry
+from lbdrabbit import boto_client, stack
+
+
+class FakeS3Client(object):
+    def __init__(self):
+        self.keys = list()
+
+    def put_object(self, Body, Bucket, Key):
+        self.keys.append(Key)
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.n_clients = 0
+
+    def client(self, service_name, region_name=None, config=None):
+        self.n_clients += 1
+        return FakeS3Client()
+
+
+def test_client_registry():
+    registry = ClientRegistry(
+        max_pool_connections=50, max_attempts=5, connect_timeout=2, read_timeout=10)
+    client = registry.get_client("s3", region_name="us-east-1")
+    assert registry.get_client("s3", region_name="us-east-1") is client
+    assert registry.get_client("s3", region_name="us-west-2") is not client
+    assert registry.get_client("sqs", region_name="us-east-1") is not client
+
+    config = client.meta.config
+    assert config.max_pool_connections == 50
+    assert config.retries == {"total_max_attempts": 5, "mode": "standard"}
+    assert config.connect_timeout == 2
+    assert config.read_timeout == 10
+
+    registry.clear()
+    assert registry.get_client("s3", region_name="us-east-1") is not client
+
+
+def test_session_clients(monkeypatch):
+    registry = ClientRegistry()
+    monkeypatch.setattr(boto_client, "registry", registry)
+
+    boto_ses = FakeSession()
+    for _ in range(3):
+        stack.upload_cf_template(
+            boto_ses=boto_ses,
+            template_content="{}",
+            bucket_name="my-bucket",
+            prefix="cf",
+        )
+    assert boto_ses.n_clients == 1
+    assert registry.get_client("s3", boto_ses=boto_ses).keys == [
+        stack._get_template_s3_key("cf", stack.fingerprint.of_text("{}"), "json"),
+    ] * 3
+
+    other_boto_ses = FakeSession()
+    registry.get_client("s3", boto_ses=other_boto_ses)
+    assert other_boto_ses.n_clients == 1
+
+    # clients of a session are dropped with the session
+    del boto_ses
+    assert len(registry._session_clients) == 1
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+import timeit
+import pytest
+from pytest import raises
+from lbdrabbit.event_model import coerce_value, Event
+
+raw_event = {
+    "body-json": {
+        "name": "Alice"
+    },
+    "params": {
+        "path": {},
+        "querystring": {
+            "limit": "5",
+            "ratio": "0.5",
+            "desc": "true",
+            "zip": "02134",
+            "name": "alice",
+        },
+        "header": {
+            "Accept": "*/*",
+            "Accept-Encoding": "gzip, deflate",
+            "auth": "allow",
+            "Cache-Control": "no-cache",
+            "Content-Type": "application/json",
+            "Host": "npwh0mpo01.execute-api.us-east-1.amazonaws.com",
+            "Postman-Token": "86ae9783-bbff-492e-a86a-5b147395a464",
+            "User-Agent": "PostmanRuntime/7.15.2",
+            "X-Amzn-Trace-Id": "Root=1-5d9908b5-c1d528d87a2b9890924332ac",
+            "X-Forwarded-For": "138.88.94.112",
+            "X-Forwarded-Port": "443",
+            "X-Forwarded-Proto": "https"
+        }
+    },
+    "stage-variables": {},
+    "context": {
+        "account-id": "",
+        "api-id": "npwh0mpo01",
+        "api-key": "",
+        "authorizer-principal-id": "",
+        "caller": "",
+        "cognito-authentication-provider": "",
+        "cognito-authentication-type": "",
+        "cognito-identity-id": "",
+        "cognito-identity-pool-id": "",
+        "http-method": "POST",
+        "stage": "dev",
+        "source-ip": "138.88.94.112",
+        "user": "",
+        "user-agent": "PostmanRuntime/7.15.2",
+        "user-arn": "",
+        "request-id": "1734556b-0647-42aa-9e62-4982cb9a52cc",
+        "resource-id": "gpwyfh",
+        "resource-path": "/users2"
+    }
+}
+
+
+def test_coerce_value():
+    assert coerce_value("5") == 5
+    assert coerce_value("-5") == -5
+    assert coerce_value("1.5") == 1.5
+    assert coerce_value("0") == 0
+    assert coerce_value("0.5") == 0.5
+    # leading zeros are not numbers, e.g. zip codes, ids
+    assert coerce_value("02134") == "02134"
+    assert coerce_value("-007") == "-007"
+    assert coerce_value("00.5") == "00.5"
+    assert coerce_value("TRUE") is True
+    assert coerce_value("false") is False
+    assert coerce_value("nan") == "nan"
+    assert coerce_value("1e5") == "1e5"
+    assert coerce_value("") == ""
+
+
+def test_event():
+    event = Event(raw_event)
+    assert not hasattr(event, "__dict__")
+    assert event.body == {"name": "Alice"}
+    assert event.stage_variables == {}
+    assert event.params.path == {}
+
+    query_string = event.params.query_string
+    assert query_string["limit"] == 5
+    assert query_string.get("ratio") == 0.5
+    assert query_string.get("desc") is True
+    assert query_string.get("zip", coerce=False) == "02134"
+    assert query_string.get("zip") == "02134"
+    assert query_string.get("name") == "alice"
+    assert query_string.get("unknown", 10) == 10
+    assert "limit" in query_string
+    with raises(KeyError):
+        _ = query_string["unknown"]
+
+    header = event.params.header
+    assert header.get("Content-Type") == "application/json"
+    assert header._lower is None  # exact match doesn't build the index
+    assert header.get("content-type") == "application/json"
+    assert header["USER-AGENT"] == "PostmanRuntime/7.15.2"
+    assert "x-forwarded-port" in header
+    assert header.get("unknown") is None
+    with raises(KeyError):
+        _ = header["unknown"]
+
+    context = event.context
+    assert context.http_method == "POST"
+    assert context.resource_path == "/users2"
+    assert context.source_ip == "138.88.94.112"
+    assert context.api_key is None
+    assert context.to_dict()["request_id"] == "1734556b-0647-42aa-9e62-4982cb9a52cc"
+
+    empty_event = Event(dict())
+    assert empty_event.body is None
+    assert empty_event.params.header.get("Accept") is None
+    assert empty_event.params.query_string.to_dict() == {}
+    assert empty_event.context.http_method is None
+
+
+def eager_parse(raw: dict) -> dict:
+    """
+    Convert the whole event up front.
+    """
+    params = raw["params"]
+    return {
+        "body": raw["body-json"],
+        "query_string": {
+            key: coerce_value(value) for key, value in params["querystring"].items()
+        },
+        "header": {key.lower(): value for key, value in params["header"].items()},
+        "context": {
+            key.replace("-", "_"): (value or None)
+            for key, value in raw["context"].items()
+        },
+    }
+
+
+def test_benchmark():
+    """
+    Read one header and one query string value per invocation.
+    """
+    number = 20000
+
+    def run_dict():
+        params = raw_event["params"]
+        return params["header"]["Content-Type"], params["querystring"]["limit"]
+
+    def run_event():
+        params = Event(raw_event).params
+        return params.header.get("Content-Type"), params.query_string.get("limit")
+
+    def run_eager():
+        parsed = eager_parse(raw_event)
+        return parsed["header"]["content-type"], parsed["query_string"]["limit"]
+
+    dict_time, event_time, eager_time = [
+        min(timeit.repeat(func, number=number, repeat=3))
+        for func in [run_dict, run_event, run_eager]
+    ]
+    print("plain dict: {:.3f} us, lazy event: {:.3f} us, eager parse: {:.3f} us".format(
+        dict_time / number * 10 ** 6,
+        event_time / number * 10 ** 6,
+        eager_time / number * 10 ** 6,
+    ))
+    assert run_event() == run_eager() == ("application/json", 5)
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
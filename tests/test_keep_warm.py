@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import pytest
+from lbdrabbit.keep_warm import (
+    KEEP_WARM_EVENT_KEY, keep_warm, is_keep_warm_event,
+    get_keep_warm_event, get_keep_warm_input,
+)
+
+
+@keep_warm
+def handler(event, context):
+    """
+    The handler docstring.
+    """
+    return {"body": event}
+
+
+def test_keep_warm():
+    assert handler.__name__ == "handler"
+    assert handler.__doc__.strip() == "The handler docstring."
+
+    # the user code is not called by a ping
+    event = get_keep_warm_event(index=1, concurrency=1)
+    assert is_keep_warm_event(event)
+    assert handler(event, None) == event
+    assert not is_keep_warm_event({"name": "Alice"})
+    assert not is_keep_warm_event("Alice")
+    assert handler({"name": "Alice"}, None) == {"body": {"name": "Alice"}}
+    assert handler("Alice", None) == {"body": "Alice"}
+
+    # parallel pings hold their container
+    event = get_keep_warm_event(index=2, concurrency=3, delay_ms=50)
+    start = time.perf_counter()
+    assert handler(event, None) == event
+    assert time.perf_counter() - start >= 0.05
+    assert json.loads(get_keep_warm_input(index=2, concurrency=3, delay_ms=50)) == event
+    assert get_keep_warm_event(index=1, concurrency=1, delay_ms=50)[KEEP_WARM_EVENT_KEY]["delay_ms"] == 0
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
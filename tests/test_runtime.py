@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+from lbdrabbit.runtime import LbdFuncConfig, anything, RUNTIME_RECORDER_ENV_VAR
+
+BUILD_TIME_PACKAGES = [
+    "troposphere", "troposphere_mate", "picage", "configirl", "constant2", "attr",
+]
+
+CHECK_MODULES = """
+import sys, json
+{code}
+print(json.dumps(sorted(set([
+    name.split(".")[0] for name in sys.modules
+]).intersection({packages}))))
+"""
+
+
+def get_loaded_build_time_packages(code: str, recorder: bool, lambda_runtime: bool = True) -> list:
+    env = dict(os.environ)
+    env.pop(RUNTIME_RECORDER_ENV_VAR, None)
+    env.pop("AWS_LAMBDA_FUNCTION_NAME", None)
+    if recorder:
+        env[RUNTIME_RECORDER_ENV_VAR] = "true"
+    if lambda_runtime:
+        env["AWS_LAMBDA_FUNCTION_NAME"] = "my-func"
+    output = subprocess.check_output(
+        [sys.executable, "-c", CHECK_MODULES.format(code=code, packages=BUILD_TIME_PACKAGES)],
+        env=env,
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def test_import_time():
+    assert get_loaded_build_time_packages(
+        "import lbdrabbit", recorder=True) == []
+
+    code = "\n".join([
+        "from lbdrabbit import LbdFuncConfig",
+        "config = LbdFuncConfig(lbd_func_timeout=30)",
+        "config.apigw_method_int_type = LbdFuncConfig.ApiMethodIntType.html",
+        "config.apigw_method_authorizer = LbdFuncConfig.get_authorizer_id('auth')",
+    ])
+    assert get_loaded_build_time_packages(code, recorder=True) == []
+
+    # it is opt-in, the real config class is still used to build the
+    # template, even in a lambda function
+    assert "troposphere_mate" in get_loaded_build_time_packages(code, recorder=False)
+    assert "troposphere_mate" in get_loaded_build_time_packages(
+        code, recorder=False, lambda_runtime=False)
+
+
+def test_runtime_lbd_func_config():
+    config = LbdFuncConfig(lbd_func_timeout=30)
+    config.scheduled_job_yes = True
+    assert config.lbd_func_timeout == 30
+    assert config.scheduled_job_yes is True
+    assert config.lbd_func_memory_size is anything
+
+    s3_event_config = LbdFuncConfig.S3EventLambdaConfig(
+        event=LbdFuncConfig.S3EventLambdaConfig.EventEnum.created,
+    )
+    assert s3_event_config is anything
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
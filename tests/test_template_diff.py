@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import pytest
+from troposphere_mate import Template, apigateway
+from lbdrabbit.template_diff import DeploySnapshot, diff_templates
+from lbdrabbit.stack import deploy_stack_if_changed
+
+old_template = {
+    "Parameters": {"EnvName": {"Type": "String"}},
+    "Resources": {
+        "LbdFuncUsersGet": {
+            "Type": "AWS::Lambda::Function",
+            "Properties": {"FunctionName": "users-get", "Timeout": 3},
+        },
+        "LbdFuncUsersPost": {
+            "Type": "AWS::Lambda::Function",
+            "Properties": {"FunctionName": "users-post", "Timeout": 3},
+        },
+        "ApigwResourceUsers": {
+            "Type": "AWS::ApiGateway::Resource",
+            "Properties": {"PathPart": "users", "RestApiId": "api"},
+        },
+        "EventRuleBackup": {
+            "Type": "AWS::Events::Rule",
+            "Properties": {"ScheduleExpression": "rate(1 hour)"},
+        },
+    },
+}
+
+
+def test_diff_templates():
+    assert diff_templates(old_template, copy.deepcopy(old_template)).has_change is False
+
+    new_template = copy.deepcopy(old_template)
+    resources = new_template["Resources"]
+    resources["LbdFuncUsersGet"]["Properties"]["Timeout"] = 30
+    resources["ApigwResourceUsers"]["Properties"]["PathPart"] = "members"
+    resources["LbdFuncUsersCreate"] = resources.pop("LbdFuncUsersPost")
+    resources["LbdFuncUsersCreate"]["Properties"]["Timeout"] = 10
+    resources.pop("EventRuleBackup")
+    resources["EventRuleCleanUp"] = {
+        "Type": "AWS::Events::Rule",
+        "Properties": {"ScheduleExpression": "rate(1 day)"},
+    }
+
+    diff = diff_templates(old_template, new_template)
+    assert diff.has_change is True
+    assert [c.logical_id for c in diff.added] == ["EventRuleCleanUp"]
+    assert [c.logical_id for c in diff.removed] == ["EventRuleBackup"]
+    assert [(c.logical_id, c.paths, c.replacement) for c in diff.modified] == [
+        ("LbdFuncUsersGet", ["Properties.Timeout"], False),
+        ("ApigwResourceUsers", ["Properties.PathPart"], True),
+    ]
+    # same function name, different logical id
+    assert [(c.old_logical_id, c.logical_id) for c in diff.renamed] == \
+           [("LbdFuncUsersPost", "LbdFuncUsersCreate")]
+    assert len(diff.replacements) == 2
+    assert "LbdFuncUsersPost -> LbdFuncUsersCreate" in diff.render_table()
+    json.loads(diff.to_json())
+
+    new_template = copy.deepcopy(old_template)
+    new_template["Parameters"]["StageName"] = {"Type": "String"}
+    assert diff_templates(old_template, new_template).sections == ["Parameters"]
+    assert len(diff_templates(None, new_template).added) == 4
+
+
+class FakeWaiter(object):
+    def __init__(self, calls, name, error):
+        self.calls = calls
+        self.name = name
+        self.error = error
+
+    def wait(self, **kwargs):
+        self.calls.append(self.name)
+        if self.error:
+            raise Exception("Waiter {} failed: UPDATE_ROLLBACK_COMPLETE".format(self.name))
+
+
+class FakeClient(object):
+    def __init__(self, calls, waiter_error=False):
+        self.calls = calls
+        self.waiter_error = waiter_error
+
+    def put_object(self, **kwargs):
+        self.calls.append("put_object")
+
+    def describe_stacks(self, **kwargs):
+        return {"Stacks": [{}]}
+
+    def update_stack(self, **kwargs):
+        self.calls.append("update_stack")
+
+    def get_waiter(self, name):
+        return FakeWaiter(self.calls, name, self.waiter_error)
+
+
+class FakeSession(object):
+    def __init__(self, waiter_error=False):
+        self.calls = list()
+        self.waiter_error = waiter_error
+
+    def client(self, service_name, **kwargs):
+        return FakeClient(self.calls, self.waiter_error)
+
+
+def test_deploy_stack_if_changed(tmpdir):
+    snapshot_path = str(tmpdir.join("deployed", "my-stack.json"))
+    kwargs = dict(
+        stack_name="my-stack",
+        bucket_name="my-bucket",
+        prefix="cloudformation/upload",
+        stack_tags=[],
+        stack_parameters=[{"ParameterKey": "EnvName", "ParameterValue": "dev"}],
+        snapshot_path=snapshot_path,
+    )
+    template_content = json.dumps(old_template)
+
+    # the update is rolled back, the snapshot is not written
+    boto_ses = FakeSession(waiter_error=True)
+    with pytest.raises(Exception):
+        deploy_stack_if_changed(boto_ses, template_content=template_content, **kwargs)
+    assert boto_ses.calls == ["put_object", "update_stack", "stack_update_complete"]
+    assert DeploySnapshot.from_file(snapshot_path) is None
+
+    boto_ses = FakeSession()
+    diff = deploy_stack_if_changed(boto_ses, template_content=template_content, **kwargs)
+    assert diff.has_change is True
+    assert boto_ses.calls == ["put_object", "update_stack", "stack_update_complete"]
+    assert DeploySnapshot.from_file(snapshot_path).template == old_template
+
+    # nothing changed, skipped
+    boto_ses = FakeSession()
+    diff = deploy_stack_if_changed(boto_ses, template_content=template_content, **kwargs)
+    assert diff.has_change is False
+    assert boto_ses.calls == []
+
+    # same template, different stack parameters
+    kwargs["stack_parameters"] = [{"ParameterKey": "EnvName", "ParameterValue": "prod"}]
+    boto_ses = FakeSession()
+    deploy_stack_if_changed(boto_ses, template_content=template_content, **kwargs)
+    assert boto_ses.calls == ["put_object", "update_stack", "stack_update_complete"]
+
+
+def test_deploy_stack_if_changed_template_object(tmpdir):
+    snapshot_path = str(tmpdir.join("deployed", "my-stack.json"))
+    kwargs = dict(
+        stack_name="my-stack",
+        bucket_name="my-bucket",
+        prefix="cloudformation/upload",
+        stack_tags=[],
+        stack_parameters=[],
+        snapshot_path=snapshot_path,
+    )
+    template = Template()
+    template.add_resource(apigateway.RestApi("RestApi", Name="my-api"))
+
+    boto_ses = FakeSession()
+    diff = deploy_stack_if_changed(boto_ses, template_content=template, **kwargs)
+    assert diff.has_change is True
+    assert boto_ses.calls == ["put_object", "update_stack", "stack_update_complete"]
+    assert DeploySnapshot.from_file(snapshot_path).template == json.loads(template.to_json())
+
+    # the json string of the same template is not a change
+    boto_ses = FakeSession()
+    diff = deploy_stack_if_changed(boto_ses, template_content=template.to_json(), **kwargs)
+    assert diff.has_change is False
+    assert boto_ses.calls == []
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])
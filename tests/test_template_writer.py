@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import io
+import contextlib
+import pytest
+from troposphere_mate import Template, Parameter, Output, Ref, apigateway
+from lbdrabbit.const import VALID_LBD_HANDLER_FUNC_NAME_LIST, DEFAULT_LBD_HANDLER_FUNC_NAME
+from lbdrabbit.lbd_func_config.lbd_func_config import (
+    LbdFuncConfig, DEFAULT_LBD_FUNC_CONFIG_FIELD, build_template,
+)
+from lbdrabbit.pkg.fingerprint import fingerprint
+from lbdrabbit.template_writer import write_template, write_template_file
+from lbdrabbit.stack import upload_cf_template, upload_cf_template_stream
+
+
+def assert_same_as_to_json(template):
+    buffer = io.BytesIO()
+    result = write_template(template, buffer)
+    content = template.to_json()
+    assert buffer.getvalue() == content.encode("utf-8")
+    assert result.fingerprint == fingerprint.of_text(content)
+    assert result.size == len(buffer.getvalue())
+
+
+def test_write_template(tmpdir):
+    template = Template()
+    assert_same_as_to_json(template)
+
+    rest_api = apigateway.RestApi("RestApi", Name="my-api")
+    template.add_resource(rest_api)
+    template.add_parameter(Parameter("EnvName", Type="String"))
+    template.add_output(Output("RestApiId", Value=Ref(rest_api)))
+    template.set_description('description with \n "quotes" and unicode 中文')
+    assert_same_as_to_json(template)
+
+    template = Template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_template(
+            module_name="lbdrabbit.example.handlers",
+            config_field=DEFAULT_LBD_FUNC_CONFIG_FIELD,
+            config_class=LbdFuncConfig,
+            valid_func_name_list=VALID_LBD_HANDLER_FUNC_NAME_LIST,
+            default_lbd_handler_name=DEFAULT_LBD_HANDLER_FUNC_NAME,
+            template=template,
+        )
+    assert_same_as_to_json(template)
+
+    path = str(tmpdir.join("master.json"))
+    write_template_file(template, path)
+    with open(path, "rb") as f:
+        assert f.read() == template.to_json().encode("utf-8")
+
+
+class FakeS3Client(object):
+    def __init__(self):
+        self.objects = dict()
+
+    def put_object(self, Body, Bucket, Key):
+        if not isinstance(Body, str):
+            Body = Body.read().decode("utf-8")
+        self.objects[Key] = Body
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.s3_client = FakeS3Client()
+
+    def client(self, service_name, **kwargs):
+        return self.s3_client
+
+
+def test_upload_cf_template_stream():
+    template = Template()
+    template.add_resource(apigateway.RestApi("RestApi", Name="my-api"))
+    boto_ses = FakeSession()
+    url = upload_cf_template(
+        boto_ses, template.to_json(), "my-bucket", "cloudformation/upload")
+    stream_url = upload_cf_template_stream(
+        boto_ses, template, "my-bucket", "cloudformation/upload/", max_memory_size=16)
+    assert stream_url == url
+    assert list(boto_ses.s3_client.objects.values()) == [template.to_json(), ]
+
+
+if __name__ == "__main__":
+    import os
+
+    basename = os.path.basename(__file__)
+    pytest.main([basename, "-s", "--tb=native"])